@@ -0,0 +1,166 @@
+"""Demand forecast and inventory planning model helpers."""
+
+from .backtest import (
+    BACKTEST_METHODS,
+    DEFAULT_REFERENCE_FILE,
+    BacktestResults,
+    backtest,
+    naive_forecast,
+    reference_accuracy,
+    ros_forecast,
+    statistical_forecast,
+)
+from .cache import DEFAULT_CACHE_MAX_BYTES, InputCache, file_hash
+from .compact import (
+    INTERNED_COLUMNS,
+    MONTH_OFFSET_DTYPE,
+    QUANTITY_DTYPE,
+    UNITS_DTYPE,
+    intern_columns,
+    label_codes,
+    month_offsets,
+    scatter_months,
+)
+from .context import (
+    DEFAULT_CURRENT_DATE,
+    DEFAULT_FORECAST_END,
+    DEFAULT_HISTORY_START,
+    DEFAULT_INPUT_FILES,
+    DEFAULT_OUTPUT_FILE,
+    REPO_ROOT,
+    ModelContext,
+    build_context,
+    input_paths,
+    load_context,
+    load_inputs,
+    load_sales_aggregate,
+)
+from .cube import (
+    CUBE_ARRAYS,
+    CUBE_VERSION,
+    DEFAULT_CUBE_DIR,
+    DEFAULT_WRITE_BLOCK_ROWS,
+    ForecastCube,
+    write_cube,
+)
+from .daily import (
+    DAILY_MONTHS,
+    DEFAULT_REVENUE_PLAN_FILE,
+    DailyForecast,
+    DailyProfile,
+    daily_forecast,
+    daily_receipts,
+    load_daily_profile,
+    read_daily_revenue_plan,
+    revenue_vs_plan,
+)
+from .export import (
+    EXCEL_WRITER_MODES,
+    add_formats,
+    open_workbook,
+    sheet_name_for,
+    sku_block_cells,
+    write_category_sheet,
+)
+from .facts import DEFAULT_SEED_FILE, FACT_COLUMNS, category_fact_table, write_fact_tables
+from .forecast import (
+    PLANNING_CATEGORY_TO_CURVE,
+    build_curve_matrix,
+    calculate_forecast,
+    curve_adjustments,
+    forecast_matrix,
+    get_curve_category,
+)
+from .hierarchy import (
+    HIERARCHY_LEVELS,
+    SUMMARY_MEASURES,
+    UNKNOWN_GROUP,
+    HierarchyIndex,
+    HierarchyLevel,
+    category_subtotals,
+    hierarchy_summary,
+)
+from .incremental import (
+    FINGERPRINT_SOURCES,
+    STATE_VERSION,
+    load_run_state,
+    merge_rows,
+    model_fingerprint,
+    plan_incremental_run,
+    save_run_state,
+    sku_input_fingerprints,
+)
+from .instrumentation import NULL_REPORT, REPORT_VERSION, NullReport, RunReport, Span
+from .loaders import (
+    CLEANING_VERSIONS,
+    DEFAULT_SALES_CHUNK_ROWS,
+    LEAD_TIME_COLUMNS,
+    aggregate_on_order,
+    aggregate_sales,
+    index_curve_data,
+    read_catalog,
+    read_curve,
+    read_daily_sales,
+    read_inventory,
+    read_lead_times,
+    read_on_order,
+    read_ros,
+    read_sales,
+    read_sales_aggregate,
+)
+from .partition import average_sales, category_rows, partition_skus
+from .pipeline import (
+    OUTPUT_FORMATS,
+    ForecastResults,
+    compute_forecast,
+    compute_projection,
+    export_category_workbooks,
+    export_fact_tables,
+    export_workbook,
+    run_forecast,
+    run_model,
+)
+from .projection import (
+    build_demand_matrix,
+    build_receipts_matrix,
+    month_positions,
+    project_eom_inventory,
+    stockout_summary,
+)
+from .receipts import DEFAULT_RECEIPT_TIMING, RECEIPT_TIMINGS, OnOrderSchema, ReceiptsStore
+from .replenishment import (
+    DEFAULT_LEAD_TIME_FILE,
+    DEFAULT_SERVICE_LEVEL,
+    ORDER_COLUMNS,
+    VENDOR_COLUMNS,
+    ReplenishmentPlan,
+    load_lead_times,
+    parse_moq,
+    recommend_orders,
+    sku_parameters,
+)
+from .scenarios import (
+    ALL_SKUS,
+    CATEGORY_COLUMNS,
+    DEFAULT_BLOCK_SKUS,
+    SUMMARY_COLUMNS,
+    Scenario,
+    ScenarioResults,
+    run_scenarios,
+)
+from .sheets import (
+    category_workbook_path,
+    write_category_workbooks,
+)
+from .statistical import (
+    FIT_METHODS,
+    FIT_VERSION,
+    FORECAST_METHODS,
+    FitCache,
+    StatisticalForecast,
+    StatisticalForecaster,
+    fit_chunk,
+    fit_croston,
+    fit_ses,
+    fit_tsb,
+)
@@ -0,0 +1,368 @@
+"""
+Rolling-origin backtest of forecast accuracy.
+
+Each origin is a past month: a method forecasts the following months using
+only sales before the origin, and the forecasts are scored against the
+units actually sold (ModelContext.sales_units, complete months only). Every
+origin and horizon is computed at once as (origin x SKU x horizon) arrays,
+processed in blocks of SKUs.
+
+Methods:
+
+    ros          ROS x curve, with the ROS as of the origin taken from the
+                 curve-adjusted average of the preceding ros_window months
+                 (the ROS extract itself is a snapshot of today)
+    statistical  the StatisticalForecaster models (see statistical), fitted
+                 on the history before each origin, with the ros method for
+                 SKUs with too little history
+    naive        last month's sales, flat
+
+Accuracy is reported per SKU, planning category and horizon (months ahead,
+1 = the origin month):
+
+    WAPE  sum |forecast - actual| / sum actual
+    BIAS  sum (forecast - actual) / sum actual
+    MASE  mean |forecast - actual| scaled by the SKU's in-sample mean
+          absolute month-over-month change before the origin
+
+reference_accuracy() scores an external demand plan (UNIT DEMAND in
+data/CZ Demand Forecast Sample.csv) against its UNIT SALES the same way.
+
+    python -m demand_forecast.backtest --origins 12 --horizon 6 --output backtest
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .compact import label_codes, month_offsets
+from .forecast import build_curve_matrix
+from .instrumentation import NULL_REPORT
+from .statistical import DEFAULT_CHUNK_SKUS, DEFAULT_MIN_HISTORY_MONTHS, fit_chunk, history_length
+
+DEFAULT_ORIGINS = 12
+DEFAULT_HORIZON = 6
+DEFAULT_ROS_WINDOW = 3
+DEFAULT_BLOCK_SKUS = 20_000
+DEFAULT_METHODS = ('ros', 'statistical', 'naive')
+
+# External demand plan with UNIT DEMAND (forecast) and UNIT SALES (actuals) per SKU and month
+DEFAULT_REFERENCE_FILE = os.path.join('data', 'CZ Demand Forecast Sample.csv')
+
+# Sums accumulated per SKU and horizon; the metrics are ratios of these
+_SUMS = ('CELLS', 'ACTUAL_UNITS', 'FORECAST_UNITS', 'ABS_ERROR', 'SCALED_ERROR', 'SCALED_CELLS')
+METRIC_COLUMNS = ['CELLS', 'ACTUAL_UNITS', 'FORECAST_UNITS', 'WAPE', 'BIAS', 'MASE']
+
+
+@dataclass
+class BacktestResults:
+    """
+    Accuracy tables from backtest() or reference_accuracy().
+
+    overall has one row per method; by_sku, by_category and by_horizon add a
+    SKU, PLANNING_CATEGORY or HORIZON column. Each row has the number of
+    scored cells, actual and forecast units, WAPE, BIAS and MASE (NaN where
+    undefined, e.g. WAPE without actual sales).
+    """
+
+    origins: list
+    overall: pd.DataFrame
+    by_sku: pd.DataFrame
+    by_category: pd.DataFrame
+    by_horizon: pd.DataFrame
+    seconds: float
+
+
+def backtest(context, methods=DEFAULT_METHODS, n_origins=DEFAULT_ORIGINS, horizon=DEFAULT_HORIZON,
+             ros_window=DEFAULT_ROS_WINDOW, min_history_months=DEFAULT_MIN_HISTORY_MONTHS,
+             block_skus=DEFAULT_BLOCK_SKUS, report=NULL_REPORT):
+    """
+    Replay forecasts from the last n_origins complete months.
+
+    Args:
+        context: ModelContext
+        methods: Names from BACKTEST_METHODS
+        n_origins: Number of origins, ending with the last complete month
+        horizon: Months forecast from each origin
+        ros_window: Months averaged for the ros method's ROS
+        min_history_months: History the statistical method needs per SKU
+        block_skus: SKUs evaluated per block
+        report: RunReport receiving the 'backtest' span
+
+    Returns:
+        BacktestResults
+    """
+    unknown = [method for method in methods if method not in BACKTEST_METHODS]
+    if unknown:
+        raise ValueError(f"Unknown backtest methods {unknown}, expected some of {list(BACKTEST_METHODS)}")
+    started = time.perf_counter()
+
+    # Complete months only, for SKUs that sold at some point
+    n_history = context.projection_start
+    sold = context.sales_units[:, :n_history].any(axis=1)
+    rows = np.flatnonzero(sold)
+    origins = np.arange(max(n_history - n_origins, 1), n_history)
+    history_months = context.all_months[:n_history]
+    sku_rows = context.sku_master.iloc[rows]
+    curve_matrix = build_curve_matrix(sku_rows['PLANNING_CATEGORY'], context.curve_data)
+    history_curve = curve_matrix[:, [month.month - 1 for month in history_months]]
+    options = {'ros_window': ros_window, 'min_history_months': min_history_months}
+
+    sums = {method: np.zeros((len(rows), horizon, len(_SUMS))) for method in methods}
+    with report.span('backtest', skus=len(rows), origins=len(origins), horizon=horizon) as span:
+        for start in range(0, len(rows), block_skus):
+            block = slice(start, start + block_skus)
+            sales = context.sales_units[rows[block], :n_history].astype(float)
+            curve = history_curve[block]
+            actual, valid = _actuals(sales, origins, horizon)
+            scale = _naive_scale(sales, origins)
+            for method in methods:
+                forecast = BACKTEST_METHODS[method](sales, curve, origins, horizon, **options)
+                sums[method][block] = _cell_sums(actual, forecast, valid, scale)
+        span.count('cells', int(sum(s[..., 0].sum() for s in sums.values())))
+
+    return _results(
+        sums, sku_rows['SKU'], sku_rows['PLANNING_CATEGORY'],
+        [month.strftime('%Y-%m') for month in history_months[origins]], time.perf_counter() - started,
+    )
+
+
+def reference_accuracy(context, path=DEFAULT_REFERENCE_FILE, method='reference'):
+    """
+    Score an external demand plan against its own actuals.
+
+    The plan's first month is taken as its origin, so its horizon 1 is that
+    month. Only months before the current month have actuals. MASE is scaled
+    by each SKU's sales history in the context up to the origin (NaN for
+    SKUs without history there).
+
+    Args:
+        context: ModelContext
+        path: CSV with SKU, MONTH, UNIT DEMAND and UNIT SALES columns
+        method: Name used in the METHOD column
+
+    Returns:
+        BacktestResults
+    """
+    started = time.perf_counter()
+    plan = pd.read_csv(path, encoding='utf-8-sig')
+    plan['MONTH'] = pd.to_datetime(plan['MONTH'], format='%m/%d/%Y').dt.to_period('M').dt.to_timestamp()
+    origin = plan['MONTH'].min()
+    plan = plan[plan['MONTH'] < context.current_date]
+
+    codes, skus = label_codes(plan['SKU'])
+    cols = month_offsets(plan['MONTH'], origin).astype(np.int64)
+    horizon = int(cols.max()) + 1 if len(cols) else 1
+    actual = np.zeros((1, len(skus), horizon))
+    forecast = np.zeros_like(actual)
+    valid = np.zeros(actual.shape, dtype=bool)
+    np.add.at(actual, (0, codes, cols), plan['UNIT SALES'].to_numpy(dtype=float))
+    np.add.at(forecast, (0, codes, cols), plan['UNIT DEMAND'].to_numpy(dtype=float))
+    valid[0, codes, cols] = True
+
+    # Scale from the sales history before the plan's origin
+    first_rows = pd.Series(np.arange(len(context.sku_master)), index=context.sku_master['SKU'].astype(str).to_numpy())
+    first_rows = first_rows[~first_rows.index.duplicated()]
+    master_rows = first_rows.reindex(skus.astype(str)).fillna(-1).to_numpy(dtype=np.int64)
+    origin_col = int(context.all_months.searchsorted(origin))
+    history = np.zeros((len(skus), origin_col))
+    known = master_rows >= 0
+    history[known] = context.sales_units[master_rows[known], :origin_col]
+    scale = np.where(known[None, :], _naive_scale(history, np.array([origin_col])), np.nan)
+
+    categories = pd.Series(pd.NA, index=range(len(skus)), dtype=object)
+    categories[known] = context.sku_master['PLANNING_CATEGORY'].to_numpy(dtype=object)[master_rows[known]]
+    sums = {method: _cell_sums(actual, forecast, valid, scale)}
+    return _results(sums, pd.Series(skus), categories, [origin.strftime('%Y-%m')], time.perf_counter() - started)
+
+
+def ros_forecast(sales, curve, origins, horizon, ros_window=DEFAULT_ROS_WINDOW, **options):
+    """ROS x curve with the ROS as of each origin (see module docstring)"""
+    return _seasonalise(_ros_levels(sales, curve, origins, ros_window), curve, origins, horizon)
+
+
+def statistical_forecast(sales, curve, origins, horizon, ros_window=DEFAULT_ROS_WINDOW,
+                         min_history_months=DEFAULT_MIN_HISTORY_MONTHS, **options):
+    """StatisticalForecaster models fitted on the history before each origin"""
+    n_origins, (n_skus, n_months) = len(origins), sales.shape
+    width = int(origins.max())
+    # Right-align each origin's history so every origin is fitted in one call
+    stacked = np.zeros((n_origins, n_skus, width))
+    stacked_curve = np.zeros_like(stacked)
+    for idx, origin in enumerate(origins):
+        stacked[idx, :, width - origin:] = sales[:, :origin]
+        stacked_curve[idx, :, width - origin:] = curve[:, :origin]
+    stacked = stacked.reshape(n_origins * n_skus, width)
+    stacked_curve = stacked_curve.reshape(n_origins * n_skus, width)
+
+    levels = _ros_levels(sales, curve, origins, ros_window).ravel()
+    eligible = np.flatnonzero(history_length(stacked) >= max(min_history_months, 1))
+    for start in range(0, len(eligible), DEFAULT_CHUNK_SKUS):
+        chunk = eligible[start:start + DEFAULT_CHUNK_SKUS]
+        levels[chunk] = fit_chunk(stacked[chunk], stacked_curve[chunk])[1]
+    return _seasonalise(levels.reshape(n_origins, n_skus), curve, origins, horizon)
+
+
+def naive_forecast(sales, curve, origins, horizon, **options):
+    """Sales of the month before each origin, flat"""
+    last = sales[:, origins - 1].T
+    return np.repeat(last[:, :, None], horizon, axis=2)
+
+
+# Forecast function of each backtest method: (sales, curve, origins, horizon, **options) -> origin x SKU x horizon
+BACKTEST_METHODS = {
+    'ros': ros_forecast,
+    'statistical': statistical_forecast,
+    'naive': naive_forecast,
+}
+
+
+def _ros_levels(sales, curve, origins, ros_window):
+    """Curve-adjusted average monthly sales over the ros_window months before each origin (origin x SKU)"""
+    deseasonalised = np.divide(sales, curve, out=sales.copy(), where=curve > 0)
+    cumulative = np.zeros((len(sales), sales.shape[1] + 1))
+    np.cumsum(deseasonalised, axis=1, out=cumulative[:, 1:])
+    window_start = np.maximum(origins - ros_window, 0)
+    return ((cumulative[:, origins] - cumulative[:, window_start]) / (origins - window_start)).T
+
+
+def _seasonalise(levels, curve, origins, horizon):
+    """Flat levels (origin x SKU) times the curve of each forecast month; NaN past the history"""
+    months = origins[:, None] + np.arange(horizon)[None, :]
+    in_history = months < curve.shape[1]
+    month_curve = curve[:, np.where(in_history, months, 0)]
+    forecast = levels[:, :, None] * month_curve.transpose(1, 0, 2)
+    forecast[~np.broadcast_to(in_history[:, None, :], forecast.shape)] = np.nan
+    return forecast
+
+
+def _actuals(sales, origins, horizon):
+    """Actual units (origin x SKU x horizon) and where they exist"""
+    months = origins[:, None] + np.arange(horizon)[None, :]
+    valid = months < sales.shape[1]
+    actual = sales[:, np.where(valid, months, 0)].transpose(1, 0, 2)
+    return actual, np.broadcast_to(valid[:, None, :], actual.shape)
+
+
+def _naive_scale(sales, origins):
+    """Mean absolute month-over-month change from the first sale up to each origin (origin x SKU)"""
+    n_skus, n_months = sales.shape
+    if n_months < 2:
+        return np.full((len(origins), n_skus), np.nan)
+    changes = np.abs(np.diff(sales, axis=1))
+    first_sale = np.where(sales.any(axis=1), (sales > 0).argmax(axis=1), n_months)
+    active = np.arange(1, n_months)[None, :] > first_sale[:, None]
+    change_sums = np.zeros((n_skus, n_months))
+    change_counts = np.zeros((n_skus, n_months))
+    np.cumsum(np.where(active, changes, 0.0), axis=1, out=change_sums[:, 1:])
+    np.cumsum(active, axis=1, out=change_counts[:, 1:])
+    # Changes between months before the origin: the first origin - 1 of them
+    last = np.clip(origins - 1, 0, n_months - 1)
+    counts = change_counts[:, last]
+    scale = np.divide(change_sums[:, last], counts, out=np.full(counts.shape, np.nan), where=counts > 0)
+    return scale.T
+
+
+def _cell_sums(actual, forecast, valid, scale):
+    """_SUMS per SKU and horizon, summed over origins (SKU x horizon x len(_SUMS))"""
+    valid = valid & ~np.isnan(forecast)
+    error = np.where(valid, forecast - actual, 0.0)
+    abs_error = np.abs(error)
+    scale = np.broadcast_to(scale[:, :, None], actual.shape)
+    scaled = valid & (scale > 0)
+    sums = np.stack([
+        valid,
+        np.where(valid, actual, 0.0),
+        np.where(valid, forecast, 0.0),
+        abs_error,
+        np.divide(abs_error, scale, out=np.zeros(actual.shape), where=scaled),
+        scaled,
+    ], axis=-1).astype(float)
+    return sums.sum(axis=0)
+
+
+def _results(sums, skus, categories, origins, seconds):
+    """Accuracy tables from per-method (SKU x horizon x _SUMS) arrays"""
+    skus = np.asarray(skus, dtype=object)
+    codes, labels = label_codes(pd.Series(categories).astype(object))
+    tables = {'overall': [], 'by_sku': [], 'by_category': [], 'by_horizon': []}
+    for method, method_sums in sums.items():
+        by_sku = method_sums.sum(axis=1)
+        tables['overall'].append(_metrics(by_sku.sum(axis=0, keepdims=True), METHOD=[method]))
+        tables['by_sku'].append(_metrics(by_sku, METHOD=method, SKU=skus))
+        tables['by_horizon'].append(_metrics(
+            method_sums.sum(axis=0), METHOD=method, HORIZON=np.arange(1, method_sums.shape[1] + 1)
+        ))
+        # Codes are -1 for SKUs without a category; they land in the last row and are dropped
+        by_category = np.zeros((len(labels) + 1, len(_SUMS)))
+        np.add.at(by_category, codes, by_sku)
+        tables['by_category'].append(_metrics(
+            by_category[:-1], METHOD=method, PLANNING_CATEGORY=np.asarray(labels, dtype=object)
+        ))
+    frames = {name: pd.concat(parts, ignore_index=True) for name, parts in tables.items()}
+    frames['by_category'] = frames['by_category'][frames['by_category']['CELLS'] > 0].reset_index(drop=True)
+    return BacktestResults(origins=origins, seconds=seconds, **frames)
+
+
+def _metrics(sums, **keys):
+    """Metric table for rows of _SUMS"""
+    sums = dict(zip(_SUMS, np.asarray(sums, dtype=float).T))
+    actual = sums['ACTUAL_UNITS']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'CELLS': sums['CELLS'].astype(int),
+            'ACTUAL_UNITS': actual,
+            'FORECAST_UNITS': sums['FORECAST_UNITS'],
+            'WAPE': np.where(actual > 0, sums['ABS_ERROR'] / actual, np.nan),
+            'BIAS': np.where(actual > 0, (sums['FORECAST_UNITS'] - actual) / actual, np.nan),
+            'MASE': np.where(sums['SCALED_CELLS'] > 0, sums['SCALED_ERROR'] / sums['SCALED_CELLS'], np.nan),
+        }
+    return pd.DataFrame({**keys, **metrics}, columns=list(keys) + METRIC_COLUMNS)
+
+
+def main(argv=None):
+    from .cache import InputCache
+    from .context import REPO_ROOT, input_paths, load_context
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-path', default=REPO_ROOT, help='Directory holding the input files')
+    parser.add_argument('--methods', nargs='+', default=list(DEFAULT_METHODS), choices=list(BACKTEST_METHODS))
+    parser.add_argument('--origins', type=int, default=DEFAULT_ORIGINS, help='Number of forecast origins')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help='Months forecast from each origin')
+    parser.add_argument('--ros-window', type=int, default=DEFAULT_ROS_WINDOW,
+                        help='Months averaged for the ROS of the ros method')
+    parser.add_argument('--reference', help='Also score this external demand plan '
+                        f"(default: {DEFAULT_REFERENCE_FILE} when it exists)")
+    parser.add_argument('--output', help='Write <output>_<table>.csv for every table')
+    args = parser.parse_args(argv)
+
+    context = load_context(input_paths(args.base_path), cache=InputCache(os.path.join(args.base_path, '.cache', 'inputs')))
+    results = backtest(context, args.methods, args.origins, args.horizon, args.ros_window)
+    print(f"Backtest over origins {results.origins[0]}..{results.origins[-1]}, horizon {args.horizon}: "
+          f"{results.seconds:.2f}s\n")
+    print(results.overall.to_string(index=False))
+    print()
+    print(results.by_horizon.to_string(index=False))
+    tables = {name: getattr(results, name) for name in ('overall', 'by_sku', 'by_category', 'by_horizon')}
+
+    reference_path = args.reference or os.path.join(args.base_path, DEFAULT_REFERENCE_FILE)
+    if args.reference or os.path.exists(reference_path):
+        reference = reference_accuracy(context, reference_path)
+        print(f"\nReference plan {os.path.basename(reference_path)} (origin {reference.origins[0]}):")
+        print(reference.overall.to_string(index=False))
+        for name in tables:
+            tables[name] = pd.concat([tables[name], getattr(reference, name)], ignore_index=True)
+
+    if args.output:
+        for name, table in tables.items():
+            table.to_csv(f"{args.output}_{name}.csv", index=False)
+        print(f"\nTables written to {args.output}_*.csv")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Benchmark the model on synthetic inputs.
+
+Generates inputs with demand_forecast.synthetic for each requested size,
+times the load, aggregate, forecast, projection and export stages separately
+and records peak memory. Each size runs in a fresh process so its memory
+high-water mark is its own.
+
+    python -m demand_forecast.benchmark --skus 10000 50000 --years 3 --output benchmark.json
+    python -m demand_forecast.benchmark --skus 10000 --baseline benchmark.json
+
+With --baseline the run is compared stage by stage against a saved result
+file and the command exits with status 1 if any stage got slower (or used
+more memory) than the tolerance allows.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+from .context import DEFAULT_CURRENT_DATE, load_context
+from .instrumentation import RunReport, peak_rss_mb
+from .pipeline import export_workbook, run_forecast
+from .synthetic import DEFAULT_LINES_PER_SKU_MONTH, generate_inputs
+
+BENCHMARK_VERSION = 2
+
+# Allowed slowdown before a stage counts as a regression
+DEFAULT_TOLERANCE = 0.25
+# Stages faster than this are too noisy to compare on time
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def run_case(n_skus, years, data_dir, seed=0, lines_per_sku_month=DEFAULT_LINES_PER_SKU_MONTH,
+             export=True, trace_memory=False):
+    """
+    Generate one synthetic input set and time every model stage on it.
+
+    Args:
+        n_skus: Number of catalog SKUs
+        years: Years of sales history
+        data_dir: Directory for the generated inputs and output workbook
+        seed: Random seed for the generator
+        lines_per_sku_month: Average order lines per selling SKU and month
+        export: Time the workbook export (slow at the largest sizes)
+        trace_memory: Also record Python heap peaks per stage with
+            tracemalloc (accurate per stage, but slows the run down)
+
+    Returns:
+        Dict with the case parameters, generated row counts and the run
+        report span of each stage
+    """
+    warnings.filterwarnings('ignore')
+    started = time.perf_counter()
+    generated = generate_inputs(
+        data_dir, n_skus, years=years, seed=seed, lines_per_sku_month=lines_per_sku_month
+    )
+    generate_seconds = time.perf_counter() - started
+    paths = generated['paths']
+
+    history_start = datetime(DEFAULT_CURRENT_DATE.year - years, DEFAULT_CURRENT_DATE.month, 1)
+    report = RunReport(trace_memory=trace_memory)
+    context = load_context(paths, history_start=history_start, report=report)
+    results = run_forecast(context, report=report)
+    if export:
+        export_workbook(context, results, os.path.join(data_dir, 'benchmark_output.xlsx'), report=report)
+    stages = report.stages()
+    peak = peak_rss_mb()
+
+    return {
+        'skus': n_skus,
+        'years': years,
+        'seed': seed,
+        'rows': generated['rows'],
+        'months': len(context.all_months),
+        'generate_seconds': round(generate_seconds, 2),
+        'stages': stages,
+        'total_seconds': round(sum(stage['wall_seconds'] for stage in stages.values()), 4),
+        'peak_rss_mb': None if peak is None else round(peak, 1),
+    }
+
+
+def run_benchmarks(sizes, years=3, seed=0, lines_per_sku_month=DEFAULT_LINES_PER_SKU_MONTH, export=True,
+                   trace_memory=False, data_dir=None, verbose=False):
+    """
+    Run run_case() for every size, each in a fresh process.
+
+    Args:
+        sizes: Catalog sizes (number of SKUs)
+        years: Years of sales history
+        seed: Random seed for the generator
+        lines_per_sku_month: Average order lines per selling SKU and month
+        export: Time the workbook export
+        trace_memory: Record tracemalloc peaks per stage
+        data_dir: Where to keep generated inputs (default: a temporary
+            directory removed afterwards)
+        verbose: Print each case as it finishes
+
+    Returns:
+        Result dict ready to be saved as JSON
+    """
+    # spawn, so earlier cases do not inflate the memory high-water mark of later ones
+    mp_context = multiprocessing.get_context('spawn')
+    cases = []
+    with tempfile.TemporaryDirectory(prefix='demand_forecast_bench_') as tmp_dir:
+        for n_skus in sizes:
+            case_dir = os.path.join(data_dir or tmp_dir, f"skus_{n_skus}_years_{years}")
+            with mp_context.Pool(1) as pool:
+                case = pool.apply(
+                    run_case, (n_skus, years, case_dir, seed, lines_per_sku_month, export, trace_memory)
+                )
+            cases.append(case)
+            if verbose:
+                stages = ', '.join(f"{name} {stage['wall_seconds']:.2f}s" for name, stage in case['stages'].items())
+                peak = '' if case['peak_rss_mb'] is None else f" | peak RSS {case['peak_rss_mb']:.0f} MB"
+                print(f"{n_skus:>8} SKUs x {years}y: {stages}{peak}")
+
+    return {
+        'version': BENCHMARK_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'cases': cases,
+    }
+
+
+def compare_results(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare a benchmark result against a saved baseline.
+
+    Cases are matched on (skus, years). A stage regresses when its time
+    exceeds the baseline by more than tolerance (stages under
+    MIN_COMPARABLE_SECONDS are ignored), and a case regresses when its peak
+    RSS does.
+
+    Returns:
+        List of regression descriptions (empty when nothing regressed)
+    """
+    if baseline.get('version') != BENCHMARK_VERSION:
+        raise ValueError(
+            f"Baseline has benchmark version {baseline.get('version')}, expected {BENCHMARK_VERSION}; "
+            "re-run the baseline"
+        )
+    baseline_cases = {(case['skus'], case['years']): case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in current['cases']:
+        previous = baseline_cases.get((case['skus'], case['years']))
+        if previous is None:
+            continue
+        label = f"{case['skus']} SKUs x {case['years']}y"
+        for name, stage in case['stages'].items():
+            before = previous['stages'].get(name, {}).get('wall_seconds')
+            after = stage['wall_seconds']
+            if before is None or max(before, after) < MIN_COMPARABLE_SECONDS:
+                continue
+            if after > before * (1 + tolerance):
+                regressions.append(f"{label} {name}: {before:.3f}s -> {after:.3f}s")
+        before, after = previous.get('peak_rss_mb'), case['peak_rss_mb']
+        if before is not None and after is not None and after > before * (1 + tolerance):
+            regressions.append(f"{label} peak RSS: {before:.0f} MB -> {after:.0f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--skus', type=int, nargs='+', default=[10_000], help='Catalog sizes to benchmark')
+    parser.add_argument('--years', type=int, default=3, help='Years of sales history')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--lines-per-sku-month', type=float, default=DEFAULT_LINES_PER_SKU_MONTH,
+                        help='Average order lines per selling SKU and month')
+    parser.add_argument('--no-export', action='store_true', help='Skip the workbook export stage')
+    parser.add_argument('--trace-memory', action='store_true', help='Record tracemalloc peaks per stage')
+    parser.add_argument('--data-dir', help='Keep generated inputs here instead of a temporary directory')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against this saved result file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown as a fraction of the baseline')
+    args = parser.parse_args(argv)
+
+    result = run_benchmarks(
+        args.skus, years=args.years, seed=args.seed, lines_per_sku_month=args.lines_per_sku_month,
+        export=not args.no_export, trace_memory=args.trace_memory, data_dir=args.data_dir, verbose=True,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Default cache size limit (bytes) before least recently used entries are evicted
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+_MANIFEST_NAME = 'manifest.json'
+
+
+def file_hash(path):
+    """Content hash (BLAKE2b) of a file, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InputCache:
+    """
+    Parquet cache of cleaned model inputs.
+
+    Each entry is keyed by the source file's content hash and the version of
+    the code that cleaned it, so a changed source file or reader is picked up
+    automatically. Source hashes are remembered by file size and mtime to
+    avoid re-reading unchanged files. When the cache grows past max_bytes the
+    least recently used entries are deleted.
+
+    Parquet support needs pyarrow; without it the cache passes every load
+    straight through to the reader.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_MAX_BYTES, enabled=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = bool(cache_dir) and enabled and _parquet_available()
+        self.hits = 0
+        self.misses = 0
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._manifest_path = os.path.join(cache_dir, _MANIFEST_NAME) if cache_dir else None
+        self._manifest = self._read_manifest() if self.enabled else {}
+
+    def load(self, name, source_path, reader, version=1):
+        """
+        Load a cleaned input, reading the source only when no cached copy matches.
+
+        Args:
+            name: Short input name used in the cache file name (e.g. 'catalog')
+            source_path: Path of the raw input file
+            reader: Function taking source_path and returning the cleaned DataFrame
+            version: Version of the reader's cleaning code
+
+        Returns:
+            The cleaned DataFrame
+        """
+        if not self.enabled:
+            return reader(source_path)
+
+        entry_path = os.path.join(self.cache_dir, f"{name}-v{version}-{self._source_hash(source_path)}.parquet")
+        if os.path.exists(entry_path):
+            try:
+                data = pd.read_parquet(entry_path)
+            except Exception as exc:
+                print(f"Ignoring unreadable cache entry {os.path.basename(entry_path)}: {exc}")
+            else:
+                # Refresh mtime so eviction treats it as recently used
+                os.utime(entry_path)
+                self.hits += 1
+                return data
+
+        self.misses += 1
+        data = reader(source_path)
+        self._store(entry_path, data)
+        return data
+
+    def clear(self):
+        """Delete every cache entry"""
+        for path, _size, _mtime in self._entries():
+            os.remove(path)
+        self._manifest = {}
+        self._write_manifest()
+
+    def size(self):
+        """Total size in bytes of the cached entries"""
+        return sum(size for _path, size, _mtime in self._entries())
+
+    def _store(self, entry_path, data):
+        """Write an entry atomically, then enforce the size limit"""
+        tmp_path = entry_path + '.tmp'
+        try:
+            data.to_parquet(tmp_path, index=False)
+        except Exception as exc:
+            # Inputs with mixed-type columns can't be stored as Parquet; they are simply not cached
+            print(f"Not caching {os.path.basename(entry_path)}: {exc}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        os.replace(tmp_path, entry_path)
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _path, size, _mtime in entries)
+        for path, size, _mtime in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def _entries(self):
+        """(path, size, mtime) for each cache entry"""
+        entries = []
+        if not self.enabled or not os.path.isdir(self.cache_dir):
+            return entries
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith('.parquet'):
+                stat = os.stat(os.path.join(self.cache_dir, file_name))
+                entries.append((os.path.join(self.cache_dir, file_name), stat.st_size, stat.st_mtime))
+        return entries
+
+    def _source_hash(self, source_path):
+        """Content hash of a source file, reusing the manifest when size and mtime are unchanged"""
+        stat = os.stat(source_path)
+        key = os.path.abspath(source_path)
+        known = self._manifest.get(key)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['hash']
+        digest = file_hash(source_path)
+        self._manifest[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+        self._write_manifest()
+        return digest
+
+    def _read_manifest(self):
+        if not os.path.exists(self._manifest_path):
+            return {}
+        try:
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        if not self.enabled:
+            return
+        tmp_path = self._manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path)
+
+
+def _parquet_available():
+    """Check for a Parquet engine (pyarrow)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,102 @@
+"""
+Compact in-memory representation of the model data.
+
+Labels (SKUs, categories, collections, ...) are interned to integer codes
+with pandas categoricals, months are int16 offsets on the month axis, and
+the SKU x month matrices use 4-byte dtypes: whole units (sales, demand) are
+int32 and quantities that can be fractional or missing (receipts, projected
+inventory) are float32. Every value the model produces is a whole number of
+units well below 2**24, so float32 holds it exactly and the workbook output
+is unchanged. Labels are only decoded when output is written.
+"""
+import numpy as np
+import pandas as pd
+
+UNITS_DTYPE = np.int32
+QUANTITY_DTYPE = np.float32
+MONTH_OFFSET_DTYPE = np.int16
+
+# Descriptive sku_master columns stored as categoricals. SKU is not one of
+# them: it is unique per sku_master row, so its categories would hold every
+# string anyway plus a code per row. SKUs are interned where they repeat
+# (sales records, see loaders.aggregate_sales) and mapped to rows with
+# label_codes().
+INTERNED_COLUMNS = (
+    'CATEGORY', 'SUB_CATEGORY', 'COLLECTION', 'COLOR_NAME', 'SIZE', 'PLANNING_CATEGORY',
+    'LAUNCH_YEAR_SEASON', 'PLANNING_STATUS', 'ASSORTMENT_STATUS', 'VENDOR_NAME',
+)
+
+
+def intern_columns(frame, columns=INTERNED_COLUMNS):
+    """Return frame with its object or string label columns converted to categoricals"""
+    converted = {
+        column: frame[column].astype('category')
+        for column in columns
+        if column in frame.columns and _is_label_dtype(frame[column].dtype)
+    }
+    return frame.assign(**converted) if converted else frame
+
+
+def label_codes(labels):
+    """
+    Integer codes for a column of labels.
+
+    Returns:
+        Tuple (codes, uniques): int32 codes (-1 for missing labels) and an
+        Index of the distinct labels they refer to
+    """
+    labels = pd.Series(labels)
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        codes, uniques = labels.cat.codes.to_numpy(), pd.Index(labels.cat.categories)
+    else:
+        codes, uniques = pd.factorize(labels)
+        uniques = pd.Index(uniques)
+    return codes.astype(np.int32, copy=False), uniques
+
+
+def month_offsets(months, first_month):
+    """Months (datetime-like) as int16 offsets from first_month; NaT becomes the int16 minimum"""
+    months = pd.DatetimeIndex(months)
+    first = pd.Timestamp(first_month)
+    offsets = (months.year - first.year) * 12 + (months.month - first.month)
+    offsets = np.where(months.isna(), np.iinfo(MONTH_OFFSET_DTYPE).min, offsets)
+    return offsets.astype(MONTH_OFFSET_DTYPE)
+
+
+def scatter_months(keys, months, values, target_keys, month_axis, dtype):
+    """
+    Sum a long (key, month, value) table onto a target_keys x month_axis grid.
+
+    Values are first summed into one row per distinct key, then rows are
+    picked for target_keys, so duplicate target keys are fine and keys that
+    are not targets cost nothing. Months outside month_axis are dropped.
+
+    Args:
+        keys: Key of each record (e.g. SKU)
+        months: Month of each record
+        values: Value of each record (missing values count as 0)
+        target_keys: Keys of the output rows
+        month_axis: DatetimeIndex of consecutive month starts (output columns)
+        dtype: Output dtype
+
+    Returns:
+        ndarray of shape (len(target_keys), len(month_axis)), zero where a
+        key has no records
+    """
+    n_months = len(month_axis)
+    codes, uniques = label_codes(keys)
+    cols = month_offsets(months, month_axis[0]) if n_months else np.zeros(len(codes), dtype=MONTH_OFFSET_DTYPE)
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    valid = (codes >= 0) & (cols >= 0) & (cols < n_months)
+
+    # Row 0 stays zero for target keys without records
+    by_key = np.zeros((len(uniques) + 1, n_months), dtype=dtype)
+    np.add.at(by_key, (codes[valid] + 1, cols[valid]), values[valid].astype(dtype))
+    rows = uniques.get_indexer(pd.Index(target_keys)) + 1
+    return by_key[rows]
+
+
+def _is_label_dtype(dtype):
+    return pd.api.types.is_object_dtype(dtype) or (
+        pd.api.types.is_string_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype)
+    )
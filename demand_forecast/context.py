@@ -0,0 +1,320 @@
+import os
+from dataclasses import dataclass, field
+from functools import cached_property
+from datetime import datetime
+
+import pandas as pd
+
+from .cache import InputCache
+from .compact import UNITS_DTYPE, intern_columns, scatter_months
+from .instrumentation import NULL_REPORT
+from .loaders import (
+    CLEANING_VERSIONS,
+    DEFAULT_SALES_CHUNK_ROWS,
+    aggregate_on_order,
+    aggregate_sales,
+    index_curve_data,
+    read_catalog,
+    read_curve,
+    read_inventory,
+    read_on_order,
+    read_ros,
+    read_sales,
+    read_sales_aggregate,
+)
+from .partition import average_sales, partition_skus
+from .projection import month_positions
+from .receipts import OnOrderSchema, ReceiptsStore
+
+# Repository root, where the input files live by default
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Input files (relative to repository root)
+DEFAULT_INPUT_FILES = {
+    'catalog': 'catalog_2025-12-09-1340.csv',
+    'inventory': 'on hand inventory_2025-12-09-1341.csv',
+    'sales': 'sku sales_2025-12-09-1347.csv',
+    'on_order': 'CZ On Order Sample Data.xlsx',
+    'ros': 'CZ Sample ROS Data.csv',
+    'curve': 'CZ Sample Curve data.xlsx',
+}
+DEFAULT_OUTPUT_FILE = 'Demand_Forecast_Inventory_Model.xlsx'
+
+# Current date and forecast horizon
+DEFAULT_CURRENT_DATE = datetime(2025, 12, 1)
+DEFAULT_HISTORY_START = datetime(2023, 1, 1)
+DEFAULT_FORECAST_END = datetime(2026, 12, 1)  # Forecast through end of 2026
+
+
+def input_paths(base_path=REPO_ROOT, **overrides):
+    """
+    Absolute paths of the model inputs.
+
+    Args:
+        base_path: Directory holding the default input files
+        **overrides: Replacement paths keyed like DEFAULT_INPUT_FILES
+
+    Returns:
+        Dict of input name -> path
+    """
+    paths = {name: os.path.join(base_path, file_name) for name, file_name in DEFAULT_INPUT_FILES.items()}
+    paths.update(overrides)
+    return paths
+
+
+@dataclass
+class ModelContext:
+    """
+    Loaded and cleaned model inputs, built once by load_context().
+
+    sku_master rows define the SKU order of every forecast, receipts and
+    projection matrix computed from this context. Descriptive sku_master
+    columns are categoricals (see compact.INTERNED_COLUMNS) and sales history
+    is held as the int32 sales_units matrix; the labelled sales_pivot
+    DataFrame is only built from sales_agg when something asks for it.
+    On-order receipts are held sparsely in receipts (see ReceiptsStore);
+    on_order_schema is the schema they were aggregated with (None for the
+    detected defaults).
+    """
+
+    paths: dict
+    catalog: pd.DataFrame
+    inventory: pd.DataFrame
+    sales_agg: pd.DataFrame
+    on_order: pd.DataFrame
+    on_order_agg: pd.DataFrame
+    ros_data: pd.DataFrame
+    ros_lookup: dict
+    curve_data: pd.DataFrame
+    sku_master: pd.DataFrame
+    current_date: datetime
+    history_start: datetime
+    forecast_end: datetime
+    on_order_schema: OnOrderSchema = None
+    all_months: pd.DatetimeIndex = field(init=False)
+    forecast_months: list = field(init=False)
+    projection_start: int = field(init=False)
+    forecast_start: int = field(init=False)
+    current_month_col: object = field(init=False)
+    sku_ros: object = field(init=False)
+    sales_units: object = field(init=False)
+    receipts: ReceiptsStore = field(init=False)
+
+    def __post_init__(self):
+        # Create month range for historical + forecast
+        self.all_months = pd.date_range(start=self.history_start, end=self.forecast_end, freq='MS')
+        self.forecast_months = [m for m in self.all_months if m > self.current_date]
+        self.projection_start, self.forecast_start = month_positions(self.all_months, self.current_date)
+        self.current_month_col = next(
+            (idx for idx, month in enumerate(self.all_months)
+             if month.year == self.current_date.year and month.month == self.current_date.month),
+            None,
+        )
+        # Daily ROS for every SKU
+        self.sku_ros = self.sku_master['SKU'].map(self.ros_lookup).fillna(0).to_numpy(dtype=float)
+        # Units sold per sku_master row and month up to the current month
+        self.sales_units = scatter_months(
+            self.sales_agg['SKU'], self.sales_agg['MONTH'], self.sales_agg['SALES_DEMAND'],
+            self.sku_master['SKU'], self.all_months[:self.forecast_start], UNITS_DTYPE,
+        )
+        # On-order receipts per sku_master row and month
+        self.receipts = ReceiptsStore.from_on_order_agg(self.on_order_agg, self.sku_master['SKU'], self.all_months)
+
+    @property
+    def planning_categories(self):
+        """Unique, non-blank planning categories in sku_master order"""
+        planning_categories = self.sku_master['PLANNING_CATEGORY'].dropna().unique()
+        return [pc for pc in planning_categories if pc and str(pc).strip()]
+
+    @cached_property
+    def sales_pivot(self):
+        """Units sold as a SKU x month DataFrame covering every SKU and month in the sales extract"""
+        sales_agg = self.sales_agg.assign(SKU=self.sales_agg['SKU'].astype(object))
+        return sales_agg.pivot(index='SKU', columns='MONTH', values='SALES_DEMAND').fillna(0)
+
+    @cached_property
+    def sku_avg_sales(self):
+        """Average positive monthly sales per sku_master row over the whole sales extract, used to rank SKUs"""
+        return average_sales(self.sales_agg, self.sku_master['SKU'])
+
+    @cached_property
+    def category_partitions(self):
+        """Dict of planning category -> sku_master rows ranked by average sales"""
+        return partition_skus(self.sku_master, self.sku_avg_sales, self.planning_categories)
+
+    def sku_rows(self, skus):
+        """Row positions of the given SKUs in sku_master (-1 for unknown SKUs)"""
+        return pd.Index(self.sku_master['SKU']).get_indexer(pd.Index(skus))
+
+
+def load_inputs(paths=None, cache=None, verbose=False):
+    """
+    Read the catalog, inventory, on-order, ROS and curve inputs.
+
+    Args:
+        paths: Input paths from input_paths() (default: the repository files)
+        cache: InputCache for cleaned inputs (default: no caching)
+        verbose: Print loading progress
+
+    Returns:
+        Dict with catalog, inventory, on_order, ros_data, ros_lookup and
+        curve_data entries
+    """
+    paths = paths or input_paths()
+    cache = cache or InputCache(None, enabled=False)
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    # Load catalog
+    catalog = cache.load('catalog', paths['catalog'], read_catalog, CLEANING_VERSIONS['catalog'])
+
+    # Load inventory
+    inventory = cache.load('inventory', paths['inventory'], read_inventory, CLEANING_VERSIONS['inventory'])
+
+    # Load on-order data
+    on_order = cache.load('on_order', paths['on_order'], read_on_order, CLEANING_VERSIONS['on_order'])
+    log(f"On-order columns: {on_order.columns.tolist()}")
+
+    # Load ROS data (daily rate of sale) and create a lookup dictionary by SKU
+    ros_data = cache.load('ros', paths['ros'], read_ros, CLEANING_VERSIONS['ros'])
+    ros_lookup = dict(zip(ros_data['VARIANT_SKU'], ros_data['NORMALIZED_ROS']))
+    log(f"Loaded ROS data for {len(ros_lookup)} SKUs")
+
+    # Load Curve data (monthly sales curve by planning category)
+    curve_data = index_curve_data(cache.load('curve', paths['curve'], read_curve, CLEANING_VERSIONS['curve']))
+    log(f"Loaded Curve data for {len(curve_data)} planning categories: {curve_data.index.tolist()}")
+
+    return {
+        'catalog': catalog,
+        'inventory': inventory,
+        'on_order': on_order,
+        'ros_data': ros_data,
+        'ros_lookup': ros_lookup,
+        'curve_data': curve_data,
+    }
+
+
+def load_sales_aggregate(paths=None, cache=None, sales_chunk_rows=DEFAULT_SALES_CHUNK_ROWS, verbose=False):
+    """
+    Read the sales extract as a SKU x month aggregate.
+
+    Args:
+        paths: Input paths from input_paths() (default: the repository files)
+        cache: InputCache for cleaned inputs (default: no caching)
+        sales_chunk_rows: Sales lines per chunk when streaming the sales
+            extract; 0 loads the whole file at once
+        verbose: Print loading progress
+
+    Returns:
+        DataFrame with SKU, MONTH and SALES_DEMAND columns
+    """
+    paths = paths or input_paths()
+    cache = cache or InputCache(None, enabled=False)
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    # Load sales aggregated by SKU and month, streamed in chunks unless sales_chunk_rows is 0
+    if sales_chunk_rows > 0:
+        sales_agg = cache.load(
+            'sales_agg', paths['sales'], lambda path: read_sales_aggregate(path, sales_chunk_rows),
+            CLEANING_VERSIONS['sales_agg'],
+        )
+    else:
+        sales = cache.load('sales', paths['sales'], read_sales, CLEANING_VERSIONS['sales'])
+        sales_agg = aggregate_sales(sales)
+    log(f"Loaded sales for {sales_agg['SKU'].nunique()} SKUs ({len(sales_agg)} SKU-months)")
+    return sales_agg
+
+
+def build_context(paths, inputs, sales_agg, current_date=DEFAULT_CURRENT_DATE,
+                  history_start=DEFAULT_HISTORY_START, forecast_end=DEFAULT_FORECAST_END, on_order_schema=None,
+                  verbose=False):
+    """
+    Join loaded inputs into a ModelContext.
+
+    Args:
+        paths: Input paths the inputs were read from
+        inputs: Dict returned by load_inputs()
+        sales_agg: SKU x month sales from load_sales_aggregate()
+        current_date: Current planning month
+        history_start: First month of history
+        forecast_end: Last forecast month
+        on_order_schema: OnOrderSchema for the on-order columns and receipt
+            timing (default: detected columns, land dates)
+        verbose: Print progress
+
+    Returns:
+        ModelContext
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    # Merge catalog with inventory, with descriptive columns interned to category codes
+    sku_master = inputs['catalog'].merge(inputs['inventory'], on='SKU', how='left')
+    sku_master = intern_columns(sku_master.fillna(0))
+
+    # Aggregate on-order quantities by SKU and receipt month
+    on_order_agg = aggregate_on_order(inputs['on_order'], on_order_schema, verbose=verbose)
+
+    context = ModelContext(
+        paths=paths,
+        catalog=inputs['catalog'],
+        inventory=inputs['inventory'],
+        sales_agg=sales_agg,
+        on_order=inputs['on_order'],
+        on_order_agg=on_order_agg,
+        ros_data=inputs['ros_data'],
+        ros_lookup=inputs['ros_lookup'],
+        curve_data=inputs['curve_data'],
+        sku_master=sku_master,
+        current_date=current_date,
+        history_start=history_start,
+        forecast_end=forecast_end,
+        on_order_schema=on_order_schema,
+    )
+    log(f"Historical months: {len(context.all_months) - len(context.forecast_months)}, "
+        f"Forecast months: {len(context.forecast_months)}")
+    return context
+
+
+def load_context(paths=None, current_date=DEFAULT_CURRENT_DATE, history_start=DEFAULT_HISTORY_START,
+                 forecast_end=DEFAULT_FORECAST_END, cache=None, sales_chunk_rows=DEFAULT_SALES_CHUNK_ROWS,
+                 on_order_schema=None, verbose=False, report=NULL_REPORT):
+    """
+    Load every model input once into a reusable ModelContext.
+
+    Args:
+        paths: Input paths from input_paths() (default: the repository files)
+        current_date: Current planning month
+        history_start: First month of history
+        forecast_end: Last forecast month
+        cache: InputCache for cleaned inputs (default: no caching)
+        sales_chunk_rows: Sales lines per chunk when streaming the sales
+            extract; 0 loads the whole file at once
+        on_order_schema: OnOrderSchema for the on-order columns and receipt
+            timing (default: detected columns, land dates)
+        verbose: Print loading progress
+        report: RunReport receiving the 'load' and 'aggregate' spans
+
+    Returns:
+        ModelContext
+    """
+    paths = paths or input_paths()
+    cache = cache or InputCache(None, enabled=False)
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    log("Loading data files...")
+    with report.span('load') as span:
+        inputs = load_inputs(paths, cache, verbose=verbose)
+        span.count('catalog_rows', len(inputs['catalog']))
+        span.count('on_order_records', len(inputs['on_order']))
+        span.count('ros_skus', len(inputs['ros_lookup']))
+
+    with report.span('aggregate') as span:
+        sales_agg = load_sales_aggregate(paths, cache, sales_chunk_rows, verbose=verbose)
+        if cache.enabled:
+            log(f"Input cache: {cache.hits} hits, {cache.misses} misses")
+        context = build_context(
+            paths, inputs, sales_agg, current_date, history_start, forecast_end, on_order_schema, verbose=verbose
+        )
+        span.count('sales_sku_months', len(sales_agg))
+        span.count('skus', len(context.sku_master))
+        span.count('on_order_receipts', context.receipts.nnz)
+    return context
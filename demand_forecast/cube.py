@@ -0,0 +1,376 @@
+"""
+Memory-mapped forecast cube for random access from notebooks and tools.
+
+write_cube() saves the core SKU x month arrays of a run as .npy files in a
+data directory of the cube directory, next to a small cube.json with the
+month axis, the row ranges of every planning category, the run parameters
+and the name of the data directory:
+
+    demand          Sales Demand (int32)
+    receipts        Receipts (On-Order) (float32)
+    committed       Committed Qty, current month only (float32)
+    backorder       Backorder Qty, current month only (float32)
+    projected_eom   Projected EOM Inv, NaN before the current month (float32)
+
+Rows are grouped by planning category (in workbook sheet order, SKUs
+ranked as on the sheets), so a category is a contiguous block of rows and
+any SKU or category slice of a memory-mapped array is a view: nothing is
+read until it is used. SKU labels are stored sorted next to their rows,
+so looking a SKU up is a binary search over the mapped labels.
+
+Every build writes a new data directory and then replaces cube.json, so a
+rebuild switches the arrays, labels and category ranges in one os.replace.
+A ForecastCube reads cube.json once and only maps files of the data
+directory it names; the previous build's directory is kept for readers
+opened before the rebuild, older ones are removed.
+
+    cube = ForecastCube('Demand_Forecast_Inventory_Model_cube')
+    cube.sku('P20001-05', 'projected_eom')       # one row, a view
+    cube.category('BEDDING - DUVETS', 'demand')  # rows x months, a view
+    cube.frame('demand', category='RUGS - RUNNERS', months=slice('2026-01', '2026-06'))
+
+From the command line, forecast and write the cube without the workbook:
+
+    python -m demand_forecast.cube --output Demand_Forecast_Inventory_Model_cube
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from .compact import QUANTITY_DTYPE, UNITS_DTYPE
+from .instrumentation import NULL_REPORT
+
+CUBE_VERSION = 2
+
+# Cube arrays and their dtypes, in file order
+CUBE_ARRAYS = {
+    'demand': UNITS_DTYPE,
+    'receipts': QUANTITY_DTYPE,
+    'committed': QUANTITY_DTYPE,
+    'backorder': QUANTITY_DTYPE,
+    'projected_eom': QUANTITY_DTYPE,
+}
+
+# Cube directory of the default run, next to the workbook
+DEFAULT_CUBE_DIR = 'Demand_Forecast_Inventory_Model_cube'
+
+# Rows copied into the memory-mapped files per step while writing
+DEFAULT_WRITE_BLOCK_ROWS = 50_000
+
+_CUBE_META = 'cube.json'
+# Prefix of the per-build data directories
+_DATA_PREFIX = 'data-'
+# Per-row label files: SKU per cube row, sku_master row per cube row, sorted SKUs and their cube rows
+_SKUS = 'skus.npy'
+_SKU_MASTER_ROWS = 'sku_master_rows.npy'
+_SORTED_SKUS = 'sorted_skus.npy'
+_SORTED_ROWS = 'sorted_rows.npy'
+
+
+def write_cube(cube_dir, context, results, params=None, block_rows=DEFAULT_WRITE_BLOCK_ROWS, report=NULL_REPORT):
+    """
+    Save a run's SKU x month arrays as a memory-mappable cube.
+
+    The files go to a new data directory that cube.json is then switched to
+    in one os.replace, so readers never see half a cube or arrays of one
+    build with labels of another; readers opened on the previous build
+    keep their data.
+
+    Args:
+        cube_dir: Directory of the cube (created if needed)
+        context: ModelContext
+        results: ForecastResults from run_forecast()
+        params: Extra run parameters to record (JSON serialisable)
+        block_rows: Rows copied per step
+        report: RunReport receiving the 'cube' span
+
+    Returns:
+        cube_dir
+    """
+    with report.span('cube', skus=len(context.sku_master)):
+        return _write_cube(cube_dir, context, results, params, block_rows)
+
+
+def _write_cube(cube_dir, context, results, params, block_rows):
+    os.makedirs(cube_dir, exist_ok=True)
+    data_dir = tempfile.mkdtemp(prefix=_DATA_PREFIX, dir=cube_dir)
+    sku_master = context.sku_master
+    order, categories = _cube_order(context)
+    n_rows, n_months = len(order), len(context.all_months)
+
+    def month_only(column):
+        quantities = sku_master[column].to_numpy(dtype=QUANTITY_DTYPE)
+
+        def values(rows):
+            block = np.zeros((len(rows), n_months), dtype=QUANTITY_DTYPE)
+            if context.current_month_col is not None:
+                block[:, context.current_month_col] = quantities[rows]
+            return block
+        return values
+
+    sources = {
+        'demand': lambda rows: results.demand[rows],
+        'receipts': lambda rows: results.receipts[rows],
+        'committed': month_only('QTY_COMMITTED'),
+        'backorder': month_only('QTY_BACKORDERED'),
+        'projected_eom': lambda rows: results.projected_eom[rows],
+    }
+
+    for name, dtype in CUBE_ARRAYS.items():
+        path = os.path.join(data_dir, f"{name}.npy")
+        array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_rows, n_months))
+        for start in range(0, n_rows, block_rows):
+            rows = order[start:start + block_rows]
+            array[start:start + len(rows)] = sources[name](rows)
+        array.flush()
+        del array
+
+    skus = sku_master['SKU'].astype(str).to_numpy()[order]
+    sorted_rows = np.argsort(skus, kind='stable')
+    for file_name, values in (
+        (_SKUS, skus.astype(str)),
+        (_SKU_MASTER_ROWS, order.astype(np.int64)),
+        (_SORTED_SKUS, skus[sorted_rows].astype(str)),
+        (_SORTED_ROWS, sorted_rows.astype(np.int64)),
+    ):
+        np.save(os.path.join(data_dir, file_name), values)
+
+    meta = {
+        'cube_version': CUBE_VERSION,
+        'data_dir': os.path.basename(data_dir),
+        'shape': [n_rows, n_months],
+        'arrays': {name: np.dtype(dtype).name for name, dtype in CUBE_ARRAYS.items()},
+        'months': [f"{month:%Y-%m}" for month in context.all_months],
+        'categories': categories,
+        'params': {
+            'current_date': f"{pd.Timestamp(context.current_date):%Y-%m-%d}",
+            'history_start': f"{pd.Timestamp(context.history_start):%Y-%m-%d}",
+            'forecast_end': f"{pd.Timestamp(context.forecast_end):%Y-%m-%d}",
+            'projection_start': context.projection_start,
+            'forecast_start': context.forecast_start,
+            'current_month_col': context.current_month_col,
+            **(params or {}),
+        },
+        'written_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+    }
+    meta_path = os.path.join(cube_dir, _CUBE_META)
+    previous = _current_data_dir(meta_path)
+    tmp_meta = meta_path + '.tmp'
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, meta_path)
+    _prune(cube_dir, keep={meta['data_dir'], previous})
+    return cube_dir
+
+
+def _current_data_dir(meta_path):
+    """Data directory named by an existing cube.json, or None"""
+    try:
+        with open(meta_path) as f:
+            return json.load(f).get('data_dir')
+    except (OSError, ValueError):
+        return None
+
+
+def _prune(cube_dir, keep):
+    """Remove data directories not in keep, and the top-level .npy files of version 1 cubes"""
+    for entry in os.scandir(cube_dir):
+        if entry.is_dir() and entry.name.startswith(_DATA_PREFIX) and entry.name not in keep:
+            shutil.rmtree(entry.path, ignore_errors=True)
+        elif entry.is_file() and entry.name.endswith('.npy'):
+            os.remove(entry.path)
+
+
+class ForecastCube:
+    """
+    Read-only view of a cube written by write_cube().
+
+    Opening a cube only reads cube.json; arrays and labels are memory
+    mapped on first use, from the data directory cube.json named when the
+    cube was opened. Lookups return views into the mapped files, so only
+    the pages that are touched are read from disk. Reopen the cube to see a
+    rebuild; a cube left open across more than one rebuild may find its
+    unmapped files removed.
+    """
+
+    def __init__(self, cube_dir):
+        self.cube_dir = cube_dir
+        with open(os.path.join(cube_dir, _CUBE_META)) as f:
+            self.meta = json.load(f)
+        if self.meta.get('cube_version') != CUBE_VERSION:
+            raise ValueError(
+                f"Cube in {cube_dir} has version {self.meta.get('cube_version')}, expected {CUBE_VERSION}"
+            )
+        self.data_dir = os.path.join(cube_dir, self.meta['data_dir'])
+        self.shape = tuple(self.meta['shape'])
+        self.months = pd.DatetimeIndex(pd.to_datetime(self.meta['months'], format='%Y-%m'))
+        self.params = self.meta['params']
+        self.category_rows = {name: slice(start, stop) for name, start, stop in self.meta['categories']}
+        self._arrays = {}
+
+    def __repr__(self):
+        return (f"ForecastCube({self.cube_dir!r}, {self.shape[0]} SKUs x {self.shape[1]} months, "
+                f"{len(self.category_rows)} categories)")
+
+    @property
+    def array_names(self):
+        return list(self.meta['arrays'])
+
+    @property
+    def categories(self):
+        return list(self.category_rows)
+
+    def array(self, name):
+        """Memory-mapped (SKU x month) array, read-only"""
+        if name not in self._arrays:
+            if name not in self.meta['arrays']:
+                raise KeyError(f"Unknown cube array {name!r}, expected one of {self.array_names}")
+            self._arrays[name] = self._load(f"{name}.npy")
+        return self._arrays[name]
+
+    __getitem__ = array
+
+    @cached_property
+    def skus(self):
+        """SKU of every cube row (memory mapped)"""
+        return self._load(_SKUS)
+
+    @cached_property
+    def sku_master_rows(self):
+        """sku_master row of every cube row, for joining back to a ModelContext"""
+        return self._load(_SKU_MASTER_ROWS)
+
+    @cached_property
+    def _sorted_skus(self):
+        return self._load(_SORTED_SKUS)
+
+    @cached_property
+    def _sorted_rows(self):
+        return self._load(_SORTED_ROWS)
+
+    def rows(self, skus):
+        """Cube rows of the given SKUs (-1 for unknown SKUs; the first row of duplicated SKUs)"""
+        labels = np.asarray([str(sku) for sku in skus], dtype=self._sorted_skus.dtype)
+        positions = np.searchsorted(self._sorted_skus, labels)
+        clipped = np.minimum(positions, len(self._sorted_skus) - 1)
+        found = (positions < len(self._sorted_skus)) & (self._sorted_skus[clipped] == labels)
+        return np.where(found, self._sorted_rows[clipped], -1)
+
+    def row(self, sku):
+        """Cube row of one SKU; raises KeyError for unknown SKUs"""
+        row = self.rows([sku])[0] if self.shape[0] else -1
+        if row < 0:
+            raise KeyError(sku)
+        return int(row)
+
+    def sku(self, sku, name=None):
+        """One SKU's month values: a view of one array, or a dict of views of every array"""
+        row = self.row(sku)
+        if name is not None:
+            return self.array(name)[row]
+        return {array_name: self.array(array_name)[row] for array_name in self.array_names}
+
+    def category(self, category, name):
+        """(SKU x month) view of one planning category's rows"""
+        if category not in self.category_rows:
+            raise KeyError(category)
+        return self.array(name)[self.category_rows[category]]
+
+    def month_cols(self, months):
+        """Column slice or positions for a month label, a list of them or a slice of them"""
+        if isinstance(months, slice):
+            start = None if months.start is None else self.months.searchsorted(_month(months.start), side='left')
+            stop = None if months.stop is None else self.months.searchsorted(_month(months.stop), side='right')
+            return slice(start, stop)
+        if isinstance(months, (list, tuple, np.ndarray, pd.Index)):
+            return self.months.get_indexer([_month(month) for month in months])
+        return self.months.get_loc(_month(months))
+
+    def value(self, name, sku, month):
+        """One cell"""
+        return self.array(name)[self.row(sku), self.month_cols(month)].item()
+
+    def frame(self, name, skus=None, category=None, months=None):
+        """
+        Labelled copy of a selection.
+
+        Args:
+            name: Cube array
+            skus: SKUs to select (default: every row of category, or all rows)
+            category: Planning category to select
+            months: Month label, list or slice of labels (default: all months)
+
+        Returns:
+            DataFrame indexed by SKU with one column per selected month
+        """
+        if skus is not None:
+            rows = self.rows(skus)
+            if (rows < 0).any():
+                raise KeyError([sku for sku, row in zip(skus, rows) if row < 0])
+        elif category is not None:
+            if category not in self.category_rows:
+                raise KeyError(category)
+            rows = self.category_rows[category]
+        else:
+            rows = slice(None)
+        cols = slice(None) if months is None else self.month_cols(months)
+        if np.isscalar(cols):
+            cols = [cols]
+        values = self.array(name)[rows][:, cols]
+        return pd.DataFrame(values, index=pd.Index(self.skus[rows], name='SKU'), columns=self.months[cols])
+
+    def _load(self, file_name):
+        return np.load(os.path.join(self.data_dir, file_name), mmap_mode='r')
+
+
+def _cube_order(context):
+    """sku_master rows in cube order, and [category, start, stop] row ranges"""
+    order, categories, start = [], [], 0
+    for category, positions in context.category_partitions.items():
+        order.append(np.asarray(positions, dtype=np.int64))
+        categories.append([str(category), start, start + len(positions)])
+        start += len(positions)
+    # SKUs without a planning category go last
+    placed = np.zeros(len(context.sku_master), dtype=bool)
+    for positions in order:
+        placed[positions] = True
+    if not placed.all():
+        order.append(np.flatnonzero(~placed))
+        categories.append([None, start, len(context.sku_master)])
+    order = np.concatenate(order) if order else np.zeros(0, dtype=np.int64)
+    return order, categories
+
+
+def _month(label):
+    return pd.Timestamp(label).to_period('M').to_timestamp()
+
+
+def main(argv=None):
+    from .cache import InputCache
+    from .context import REPO_ROOT, input_paths, load_context
+    from .pipeline import run_forecast
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-path', default=REPO_ROOT, help='Directory holding the input files')
+    parser.add_argument('--output', help=f"Cube directory (default: {DEFAULT_CUBE_DIR} in the base path)")
+    args = parser.parse_args(argv)
+
+    context = load_context(input_paths(args.base_path), cache=InputCache(os.path.join(args.base_path, '.cache', 'inputs')))
+    results = run_forecast(context)
+    cube_dir = write_cube(args.output or os.path.join(args.base_path, DEFAULT_CUBE_DIR), context, results)
+    cube = ForecastCube(cube_dir)
+    print(cube)
+    for name in cube.array_names:
+        print(f"  {name}: {cube[name].dtype} ({cube[name].nbytes / 1024 ** 2:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
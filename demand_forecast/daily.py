@@ -0,0 +1,408 @@
+"""
+Daily forecast and projected inventory for the current and next month.
+
+The monthly ROS x curve forecast of every SKU is split into days with a
+DailyProfile: a day-of-week and a day-of-month factor estimated from the
+order dates in the sales extract. Each month's day weights sum to 1, so the
+days of a month add up to its monthly forecast exactly.
+
+Per-SKU daily units are never stored: a DailyForecast keeps the two monthly
+forecasts per SKU and one weight per day, and builds units for the rows that
+ask for them. Receipts are placed on their exact on-order date in a
+ReceiptsStore with one column per day, and projected inventory is the
+running total of receipts - units from the as-of day, held as float32
+(about 240 bytes per SKU). Revenue rollups at FULL_PRICE_RETAIL only need
+the monthly totals, so they take one pass over the SKUs:
+
+    forecast = daily_forecast(context, load_daily_profile(context))
+    forecast.revenue_by_day()          # units and revenue per day
+    forecast.revenue_by_category()     # the same per planning category
+    forecast.stockouts()               # SKUs projected to run out, and when
+
+    python -m demand_forecast.daily --as-of 2025-12-10 --output daily
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .compact import QUANTITY_DTYPE, label_codes
+from .forecast import build_curve_matrix, forecast_matrix
+from .instrumentation import NULL_REPORT
+from .loaders import CLEANING_VERSIONS, read_daily_sales
+from .receipts import OnOrderSchema, ReceiptsStore
+
+# Months split into days: the current month and the next one
+DAILY_MONTHS = 2
+
+# Daily revenue plan with Month Day, Discounted Rev Forecast and Actual Discounted Revenue columns
+DEFAULT_REVENUE_PLAN_FILE = os.path.join('data', 'Current Month Daily Forecast.csv')
+
+
+@dataclass(frozen=True)
+class DailyProfile:
+    """
+    Relative sales by day of week (Monday first) and day of month.
+
+    A day's weight within its month is dow[weekday] * dom[day - 1],
+    normalised over the month.
+    """
+
+    dow: np.ndarray
+    dom: np.ndarray
+
+    @classmethod
+    def flat(cls):
+        """Profile spreading every month evenly over its days"""
+        return cls(np.ones(7), np.ones(31))
+
+    @classmethod
+    def fit(cls, daily_sales):
+        """
+        Estimate the profile from units sold per day.
+
+        Dates without sales count as zero-unit days. The day-of-week factors
+        are weekday means over the overall mean; the day-of-month factors are
+        the same ratio for the totals with the day-of-week effect divided out.
+
+        Args:
+            daily_sales: DataFrame with DATE and UNITS_SOLD columns, e.g. from
+                loaders.read_daily_sales()
+
+        Returns:
+            DailyProfile (flat when there are no sales)
+        """
+        if daily_sales.empty or daily_sales['UNITS_SOLD'].sum() <= 0:
+            return cls.flat()
+        units = daily_sales.groupby(pd.DatetimeIndex(daily_sales['DATE']).normalize())['UNITS_SOLD'].sum()
+        units = units.reindex(pd.date_range(units.index.min(), units.index.max(), freq='D'), fill_value=0)
+        units = units.astype(float)
+
+        dow = _relative_means(units, units.index.dayofweek, 7)
+        adjusted = units / np.where(dow > 0, dow, 1)[units.index.dayofweek]
+        dom = _relative_means(adjusted, units.index.day - 1, 31)
+        return cls(dow, dom)
+
+    def weights(self, days):
+        """
+        Share of its month's units falling on each day.
+
+        Args:
+            days: DatetimeIndex of consecutive days covering whole months
+
+        Returns:
+            float64 ndarray, one weight per day; each month's weights sum to 1
+        """
+        days = pd.DatetimeIndex(days)
+        raw = self.dow[days.dayofweek] * self.dom[days.day - 1]
+        month_codes, _ = pd.factorize(days.to_period('M'))
+        totals = np.bincount(month_codes, weights=raw)
+        lengths = np.bincount(month_codes)
+        # A month with no weight at all is spread evenly
+        return np.where(totals[month_codes] > 0, raw / np.where(totals > 0, totals, 1)[month_codes],
+                        1 / lengths[month_codes])
+
+
+@dataclass
+class DailyForecast:
+    """
+    Daily units, receipts and projected inventory of every sku_master row.
+
+    monthly_units holds the unrounded forecast of each SKU for the months of
+    days (one column per month); the units on a day are
+    monthly_units[:, day_month] * day_weights. projected is the inventory at
+    the end of each day from as_of on (NaN before it).
+    """
+
+    skus: np.ndarray
+    planning_categories: pd.Series
+    days: pd.DatetimeIndex
+    day_weights: np.ndarray
+    day_month: np.ndarray
+    monthly_units: np.ndarray
+    price: np.ndarray
+    receipts: ReceiptsStore
+    projected: np.ndarray
+    as_of: pd.Timestamp
+
+    @property
+    def as_of_col(self):
+        """Column of as_of in days"""
+        return int(self.days.get_loc(self.as_of))
+
+    @property
+    def nbytes(self):
+        """Memory held by the per-SKU arrays"""
+        return self.monthly_units.nbytes + self.price.nbytes + self.receipts.nbytes + self.projected.nbytes
+
+    def units(self, rows=None):
+        """
+        Daily forecast units.
+
+        Args:
+            rows: sku_master row positions (default: all SKUs)
+
+        Returns:
+            float32 ndarray of shape (n_rows, len(days))
+        """
+        monthly_units = self.monthly_units if rows is None else self.monthly_units[rows]
+        return monthly_units[:, self.day_month] * self.day_weights.astype(QUANTITY_DTYPE)
+
+    def revenue_by_day(self):
+        """DataFrame with DATE, UNITS and REVENUE (units x FULL_PRICE_RETAIL) per day"""
+        month_units = self.monthly_units.sum(axis=0, dtype=float)
+        month_revenue = self.price.astype(float) @ self.monthly_units.astype(float)
+        return pd.DataFrame({
+            'DATE': self.days,
+            'UNITS': month_units[self.day_month] * self.day_weights,
+            'REVENUE': month_revenue[self.day_month] * self.day_weights,
+        })
+
+    def revenue_by_category(self):
+        """DataFrame with PLANNING_CATEGORY, DATE, UNITS and REVENUE per planning category and day"""
+        codes, categories = label_codes(self.planning_categories)
+        has_category = codes >= 0
+        n_categories, n_months = len(categories), self.monthly_units.shape[1]
+        month_units = np.empty((n_categories, n_months))
+        month_revenue = np.empty((n_categories, n_months))
+        for month in range(n_months):
+            units = self.monthly_units[has_category, month].astype(float)
+            month_units[:, month] = np.bincount(codes[has_category], weights=units, minlength=n_categories)
+            month_revenue[:, month] = np.bincount(
+                codes[has_category], weights=units * self.price[has_category], minlength=n_categories
+            )
+        return pd.DataFrame({
+            'PLANNING_CATEGORY': np.repeat(np.asarray(categories, dtype=object), len(self.days)),
+            'DATE': np.tile(self.days, n_categories),
+            'UNITS': (month_units[:, self.day_month] * self.day_weights).ravel(),
+            'REVENUE': (month_revenue[:, self.day_month] * self.day_weights).ravel(),
+        })
+
+    def stockouts(self):
+        """
+        SKUs projected to run out of stock.
+
+        Returns:
+            DataFrame with SKU, FIRST_STOCKOUT_DATE and MIN_PROJECTED_INV,
+            ordered by the stockout date
+        """
+        window = self.projected[:, self.as_of_col:]
+        stockout = window < 0
+        rows = np.flatnonzero(stockout.any(axis=1))
+        first = stockout[rows].argmax(axis=1) + self.as_of_col
+        table = pd.DataFrame({
+            'SKU': self.skus[rows],
+            'FIRST_STOCKOUT_DATE': self.days[first],
+            'MIN_PROJECTED_INV': window[rows].min(axis=1),
+        })
+        return table.sort_values(['FIRST_STOCKOUT_DATE', 'MIN_PROJECTED_INV'], kind='stable').reset_index(drop=True)
+
+
+def daily_forecast(context, profile=None, as_of=None, on_hand=None, report=NULL_REPORT):
+    """
+    Split the current and next month's forecast into days and project daily inventory.
+
+    Args:
+        context: ModelContext
+        profile: DailyProfile (default: flat)
+        as_of: Day the inventory is projected from, within the current or
+            next month (default: context.current_date)
+        on_hand: Units on hand at the start of as_of per sku_master row
+            (default: AVAILABLE_ON_HAND_QTY)
+        report: RunReport receiving the 'daily' span
+
+    Returns:
+        DailyForecast
+
+    Raises:
+        ValueError: as_of is outside the current and next month
+    """
+    profile = profile or DailyProfile.flat()
+    sku_master = context.sku_master
+    first_month = pd.Timestamp(context.current_date).to_period('M').to_timestamp()
+    months = pd.date_range(first_month, periods=DAILY_MONTHS, freq='MS')
+    days = pd.date_range(first_month, months[-1] + pd.offsets.MonthEnd(0), freq='D')
+    as_of = pd.Timestamp(as_of if as_of is not None else context.current_date).normalize()
+    if not days[0] <= as_of <= days[-1]:
+        raise ValueError(f"as_of {as_of.date()} is outside the daily window {days[0].date()}..{days[-1].date()}")
+
+    with report.span('daily', skus=len(sku_master), days=len(days)) as span:
+        # Monthly ROS x curve forecast, as in compute_forecast()
+        curve_matrix = build_curve_matrix(sku_master['PLANNING_CATEGORY'], context.curve_data)
+        monthly_units = forecast_matrix(context.sku_ros, curve_matrix, months).astype(QUANTITY_DTYPE)
+        day_weights = profile.weights(days)
+        day_month = (days.year - first_month.year) * 12 + days.month - first_month.month
+        day_month = np.asarray(day_month, dtype=np.int8)
+
+        receipts = daily_receipts(context, days)
+        on_hand = sku_master['AVAILABLE_ON_HAND_QTY'].to_numpy(dtype=QUANTITY_DTYPE) if on_hand is None else on_hand
+
+        # Running total of receipts - units from as_of, built in place as in project_eom_inventory()
+        start = int(days.get_loc(as_of))
+        projected = np.full((len(sku_master), len(days)), np.nan, dtype=QUANTITY_DTYPE)
+        window = projected[:, start:]
+        np.multiply(monthly_units[:, day_month[start:]], -day_weights[start:].astype(QUANTITY_DTYPE), out=window)
+        row_index, cols, quantities = receipts.to_coo()
+        due = cols >= start
+        np.add.at(window, (row_index[due], cols[due] - start), quantities[due])
+        np.cumsum(window, axis=1, out=window)
+        window += np.asarray(on_hand, dtype=QUANTITY_DTYPE)[:, None]
+        span.count('receipts', receipts.nnz)
+
+    return DailyForecast(
+        skus=sku_master['SKU'].to_numpy(),
+        planning_categories=sku_master['PLANNING_CATEGORY'],
+        days=days,
+        day_weights=day_weights,
+        day_month=day_month,
+        monthly_units=monthly_units,
+        price=pd.to_numeric(sku_master['FULL_PRICE_RETAIL'], errors='coerce').fillna(0).to_numpy(dtype=QUANTITY_DTYPE),
+        receipts=receipts,
+        projected=projected,
+        as_of=as_of,
+    )
+
+
+def daily_receipts(context, days):
+    """
+    On-order quantities per sku_master row on their exact receipt date.
+
+    Uses the same SKU, quantity and date columns as the monthly receipts
+    (context.on_order_schema).
+
+    Args:
+        context: ModelContext
+        days: DatetimeIndex of consecutive days
+
+    Returns:
+        ReceiptsStore with one column per day; receipts outside days are dropped
+    """
+    target_keys = context.sku_master['SKU']
+    schema = (context.on_order_schema or OnOrderSchema()).resolve(context.on_order.columns)
+    if schema is None:
+        return ReceiptsStore.from_columns([], [], [], target_keys, len(days))
+    on_order = context.on_order
+    dates = pd.to_datetime(on_order[schema.date], errors='coerce').dt.normalize()
+    cols = ((dates - days[0]) // pd.Timedelta(days=1)).fillna(-1).to_numpy(dtype=np.int64)
+    return ReceiptsStore.from_columns(on_order[schema.sku], cols, on_order[schema.quantity], target_keys, len(days))
+
+
+def load_daily_profile(context, cache=None):
+    """
+    Fit a DailyProfile to the order dates of the context's sales extract.
+
+    Args:
+        context: ModelContext
+        cache: InputCache for the daily sales totals (default: no caching)
+
+    Returns:
+        DailyProfile
+    """
+    if cache is None:
+        daily_sales = read_daily_sales(context.paths['sales'])
+    else:
+        daily_sales = cache.load('daily_sales', context.paths['sales'], read_daily_sales, CLEANING_VERSIONS['daily_sales'])
+    return DailyProfile.fit(daily_sales)
+
+
+def read_daily_revenue_plan(path):
+    """
+    Load a daily revenue plan.
+
+    Args:
+        path: CSV with Month Day (m/d/yy), Discounted Rev Forecast and Actual
+            Discounted Revenue columns, amounts formatted like "$400,000 "
+
+    Returns:
+        DataFrame with DATE, PLAN_REVENUE and ACTUAL_REVENUE (NaN when not
+        yet reported) columns
+    """
+    plan = pd.read_csv(path, encoding='utf-8-sig')
+    amounts = {
+        name: pd.to_numeric(plan[column].astype(str).str.replace(r'[$,\s]', '', regex=True), errors='coerce')
+        for name, column in (('PLAN_REVENUE', 'Discounted Rev Forecast'), ('ACTUAL_REVENUE', 'Actual Discounted Revenue'))
+    }
+    return pd.DataFrame({'DATE': pd.to_datetime(plan['Month Day'], format='%m/%d/%y'), **amounts})
+
+
+def revenue_vs_plan(forecast, plan):
+    """
+    Daily forecast revenue next to a revenue plan.
+
+    The plan is discounted revenue while the forecast is priced at
+    FULL_PRICE_RETAIL, so the shares of the month are the comparable columns.
+
+    Args:
+        forecast: DailyForecast
+        plan: DataFrame from read_daily_revenue_plan()
+
+    Returns:
+        DataFrame with DATE, REVENUE, PLAN_REVENUE, ACTUAL_REVENUE,
+        REVENUE_SHARE and PLAN_SHARE for the plan's days
+    """
+    table = forecast.revenue_by_day()[['DATE', 'REVENUE']].merge(plan, on='DATE', how='inner')
+    months = table['DATE'].dt.to_period('M')
+    for share, column in (('REVENUE_SHARE', 'REVENUE'), ('PLAN_SHARE', 'PLAN_REVENUE')):
+        totals = table.groupby(months)[column].transform('sum')
+        table[share] = table[column] / totals.where(totals > 0)
+    return table
+
+
+def _relative_means(values, groups, n_groups):
+    """Mean of values per group over the mean of all values (1 for groups without days)"""
+    sums = np.bincount(groups, weights=values, minlength=n_groups)
+    counts = np.bincount(groups, minlength=n_groups)
+    means = np.divide(sums, counts, out=np.full(n_groups, np.nan), where=counts > 0)
+    overall = values.mean()
+    return np.nan_to_num(means / overall, nan=1.0) if overall > 0 else np.ones(n_groups)
+
+
+def main(argv=None):
+    from .cache import InputCache
+    from .context import REPO_ROOT, input_paths, load_context
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-path', default=REPO_ROOT, help='Directory holding the input files')
+    parser.add_argument('--as-of', help='Day to project inventory from (default: the current date)')
+    parser.add_argument('--flat', action='store_true', help='Spread months evenly instead of fitting a daily profile')
+    parser.add_argument('--plan', help='Compare with this daily revenue plan '
+                        f"(default: {DEFAULT_REVENUE_PLAN_FILE} when it exists)")
+    parser.add_argument('--output', help='Write <output>_<table>.csv for every table')
+    args = parser.parse_args(argv)
+
+    cache = InputCache(os.path.join(args.base_path, '.cache', 'inputs'))
+    context = load_context(input_paths(args.base_path), cache=cache)
+    profile = DailyProfile.flat() if args.flat else load_daily_profile(context, cache)
+
+    started = time.perf_counter()
+    forecast = daily_forecast(context, profile, args.as_of)
+    tables = {
+        'by_day': forecast.revenue_by_day(),
+        'by_category': forecast.revenue_by_category(),
+        'stockouts': forecast.stockouts(),
+    }
+    seconds = time.perf_counter() - started
+    print(f"Daily forecast for {len(forecast.skus)} SKUs x {len(forecast.days)} days from "
+          f"{forecast.as_of.date()}: {seconds:.2f}s, {forecast.nbytes / 1024 ** 2:.1f} MB")
+    print(f"SKUs projected to stock out: {len(tables['stockouts'])}\n")
+
+    plan_path = args.plan or os.path.join(args.base_path, DEFAULT_REVENUE_PLAN_FILE)
+    if args.plan or os.path.exists(plan_path):
+        tables['vs_plan'] = revenue_vs_plan(forecast, read_daily_revenue_plan(plan_path))
+        print(tables['vs_plan'].to_string(index=False))
+    else:
+        print(tables['by_day'].to_string(index=False))
+
+    if args.output:
+        for name, table in tables.items():
+            table.to_csv(f"{args.output}_{name}.csv", index=False)
+        print(f"\nTables written to {args.output}_*.csv")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
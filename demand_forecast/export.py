@@ -0,0 +1,440 @@
+import numpy as np
+import pandas as pd
+
+# Excel writer modes: 'fast' streams whole SKU blocks with constant_memory,
+# 'legacy' is the original cell-by-cell in-memory writer
+EXCEL_WRITER_MODES = ('fast', 'legacy')
+
+# Define column structure
+SKU_DETAIL_COLS = ['CATEGORY', 'SUB_CATEGORY', 'COLLECTION', 'SKU', 'SKU_DESCRIPTION', 'COLOR_NAME', 'SIZE']
+ROW_TYPES = ['Sales Demand', 'Committed Qty', 'Backorder Qty', 'EOM Inventory', 'Projected EOM Inv', 'Receipts (On-Order)']
+MONTH_START_COL = len(SKU_DETAIL_COLS)
+
+# Month cell format codes used by the fast writer (see _month_formats()); negatives add NEGATIVE_CODE
+BLANK_CODE = -1
+NEGATIVE_CODE = 2
+
+
+def sku_block_cells(n_skus, n_months):
+    """Number of cells written for n_skus SKU blocks (detail, row label and month columns)"""
+    return n_skus * len(ROW_TYPES) * (len(SKU_DETAIL_COLS) + 1 + n_months)
+
+
+def open_workbook(output_file, mode='fast'):
+    """
+    Create the output workbook for the given writer mode.
+
+    In 'fast' mode the workbook uses xlsxwriter's constant_memory option, so
+    each row is flushed to disk as soon as the next row is started.
+    """
+    if mode not in EXCEL_WRITER_MODES:
+        raise ValueError(f"Unknown Excel writer mode {mode!r}, expected one of {EXCEL_WRITER_MODES}")
+    # Imported here so the model can be used without loading xlsxwriter
+    import xlsxwriter
+
+    options = {'constant_memory': True} if mode == 'fast' else {}
+    return xlsxwriter.Workbook(output_file, options)
+
+
+def add_formats(workbook):
+    """Define the cell formats used by the forecast sheets"""
+    formats = {}
+
+    formats['header'] = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'border': 1,
+        'align': 'center',
+        'valign': 'vcenter'
+    })
+
+    formats['sku_header'] = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'border': 1,
+        'align': 'left',
+        'valign': 'vcenter'
+    })
+
+    formats['row_label'] = workbook.add_format({
+        'bold': True,
+        'bg_color': '#D9E2F3',
+        'border': 1,
+        'align': 'left'
+    })
+
+    formats['number'] = workbook.add_format({
+        'num_format': '#,##0',
+        'border': 1,
+        'align': 'center'
+    })
+
+    formats['negative'] = workbook.add_format({
+        'num_format': '#,##0',
+        'border': 1,
+        'align': 'center',
+        'font_color': 'red',
+        'bold': True
+    })
+
+    formats['forecast'] = workbook.add_format({
+        'num_format': '#,##0',
+        'border': 1,
+        'align': 'center',
+        'bg_color': '#FFF2CC'  # Light yellow for forecasted values
+    })
+
+    formats['forecast_negative'] = workbook.add_format({
+        'num_format': '#,##0',
+        'border': 1,
+        'align': 'center',
+        'bg_color': '#FFF2CC',
+        'font_color': 'red',
+        'bold': True
+    })
+
+    formats['text'] = workbook.add_format({
+        'border': 1,
+        'align': 'left'
+    })
+
+    return formats
+
+
+def sheet_name_for(category):
+    """Create worksheet name (truncate name if too long)"""
+    sheet_name = str(category)[:31] if len(str(category)) > 31 else str(category)
+    return sheet_name.replace('/', '-').replace('\\', '-').replace('*', '').replace('?', '').replace('[', '').replace(']', '')
+
+
+def write_sheet_header(worksheet, formats, all_months):
+    """Write the header row, column widths and the collapsed 2023/2024 column groups"""
+    # SKU detail headers
+    for col_idx, col_name in enumerate(SKU_DETAIL_COLS):
+        worksheet.write(0, col_idx, col_name, formats['sku_header'])
+
+    # Month headers
+    month_start_col = len(SKU_DETAIL_COLS)
+
+    # Track column ranges for 2023 and 2024 for grouping
+    col_2023_start = None
+    col_2023_end = None
+    col_2024_start = None
+    col_2024_end = None
+
+    for month_idx, month in enumerate(all_months):
+        month_str = month.strftime('%b %Y')
+        worksheet.write(0, month_start_col + month_idx, month_str, formats['header'])
+
+        # Track 2023 columns
+        if month.year == 2023:
+            if col_2023_start is None:
+                col_2023_start = month_start_col + month_idx
+            col_2023_end = month_start_col + month_idx
+
+        # Track 2024 columns
+        if month.year == 2024:
+            if col_2024_start is None:
+                col_2024_start = month_start_col + month_idx
+            col_2024_end = month_start_col + month_idx
+
+    # Set column widths
+    worksheet.set_column(0, 0, 15)  # Category
+    worksheet.set_column(1, 1, 15)  # Sub-category
+    worksheet.set_column(2, 2, 15)  # Collection
+    worksheet.set_column(3, 3, 25)  # SKU
+    worksheet.set_column(4, 4, 40)  # Description
+    worksheet.set_column(5, 5, 12)  # Color
+    worksheet.set_column(6, 6, 12)  # Size
+    worksheet.set_column(month_start_col, month_start_col + len(all_months), 10)  # Month columns
+
+    # Group and collapse 2023 and 2024 columns
+    if col_2023_start is not None and col_2023_end is not None:
+        worksheet.set_column(col_2023_start, col_2023_end, 10, None, {'level': 1, 'hidden': True})
+    if col_2024_start is not None and col_2024_end is not None:
+        worksheet.set_column(col_2024_start, col_2024_end, 10, None, {'level': 1, 'hidden': True})
+
+
+def write_category_sheet(workbook, formats, category, category_skus, sku_demand, sku_receipts,
+                         sku_projected_eom, all_months, current_date, current_month_col, mode='fast',
+                         subtotals=None):
+    """
+    Write one planning category's worksheet.
+
+    Args:
+        workbook: Workbook from open_workbook()
+        formats: Formats from add_formats()
+        category: Planning category (used for the sheet name)
+        category_skus: Sorted sku_master rows for this category; the index is
+            the SKU's row in the demand/receipts/projection matrices
+        sku_demand: Sales Demand matrix (n_skus x n_months)
+        sku_receipts: Receipts matrix (n_skus x n_months)
+        sku_projected_eom: Projected EOM inventory matrix (n_skus x n_months)
+        all_months: DatetimeIndex of historical + forecast months
+        current_date: Current planning month (datetime)
+        current_month_col: Index of the current month in all_months, or None
+        mode: 'fast' or 'legacy' (see EXCEL_WRITER_MODES)
+        subtotals: Optional dict of category -> subtotal blocks written below
+            the SKU blocks (see hierarchy.category_subtotals())
+
+    Returns:
+        The worksheet name
+    """
+    sheet_name = sheet_name_for(category)
+    worksheet = workbook.add_worksheet(sheet_name)
+    write_sheet_header(worksheet, formats, all_months)
+
+    write_rows = _write_sku_blocks_fast if mode == 'fast' else _write_sku_blocks_legacy
+    next_row = write_rows(worksheet, formats, category_skus, sku_demand, sku_receipts, sku_projected_eom,
+                          all_months, current_date, current_month_col)
+    if subtotals and subtotals.get(category):
+        _write_subtotal_blocks(worksheet, formats, next_row, subtotals[category], all_months, current_date)
+    return sheet_name
+
+
+def _write_sku_blocks_fast(worksheet, formats, category_skus, sku_demand, sku_receipts,
+                           sku_projected_eom, all_months, current_date, current_month_col):
+    """Write SKU blocks row by row, each row as write_row() runs of cells sharing a format"""
+    label_col = len(SKU_DETAIL_COLS) - 1
+    n_months = len(all_months)
+
+    # Format codes that only depend on the month are resolved once per sheet
+    month_fmts = _month_formats(formats)
+    forecast_codes = np.asarray(all_months > current_date, dtype=np.int8)
+    plain_codes = np.zeros(n_months, dtype=np.int8)
+    blank_codes = np.full(n_months, BLANK_CODE, dtype=np.int8)
+    text_fmt = formats['text']
+    label_fmt = formats['row_label']
+    blank_details = [None] * label_col
+
+    def write_label(row, label, details=blank_details):
+        worksheet.write_row(row, 0, details, text_fmt)
+        worksheet.write_string(row, label_col, label, label_fmt)
+
+    details = category_skus.reindex(columns=SKU_DETAIL_COLS[:label_col]).to_numpy(dtype=object)
+    details = np.where(pd.isna(details), '', details)
+    committed = category_skus['QTY_COMMITTED'].to_numpy(dtype=float)
+    backordered = category_skus['QTY_BACKORDERED'].to_numpy(dtype=float)
+    month_only = np.zeros(n_months)
+
+    current_row = 1
+    for pos, sku_idx in enumerate(category_skus.index):
+        # Sales Demand row carries the SKU details
+        write_label(current_row, ROW_TYPES[0], details[pos].tolist())
+        _write_month_row(worksheet, current_row, sku_demand[sku_idx], forecast_codes, month_fmts)
+        current_row += 1
+
+        # Committed and backorder only apply to the current month
+        for label, qty in ((ROW_TYPES[1], committed[pos]), (ROW_TYPES[2], backordered[pos])):
+            values = month_only.copy()
+            if current_month_col is not None:
+                values[current_month_col] = qty
+            write_label(current_row, label)
+            _write_month_row(worksheet, current_row, values, plain_codes, month_fmts)
+            current_row += 1
+
+        # EOM Inventory row (no actuals yet)
+        write_label(current_row, ROW_TYPES[3])
+        _write_month_row(worksheet, current_row, month_only, blank_codes, month_fmts)
+        current_row += 1
+
+        # Projected EOM Inventory row: blank before the current month, red when negative
+        projected = sku_projected_eom[sku_idx]
+        write_label(current_row, ROW_TYPES[4])
+        _write_month_row(worksheet, current_row, projected, _value_codes(projected, forecast_codes), month_fmts)
+        current_row += 1
+
+        # Receipts row
+        write_label(current_row, ROW_TYPES[5])
+        _write_month_row(worksheet, current_row, sku_receipts[sku_idx], forecast_codes, month_fmts)
+        current_row += 1
+
+        # Add empty row between SKUs for readability
+        current_row += 1
+
+    return current_row
+
+
+def _write_sku_blocks_legacy(worksheet, formats, category_skus, sku_demand, sku_receipts,
+                             sku_projected_eom, all_months, current_date, current_month_col):
+    """
+    Original cell-by-cell writer ('legacy' mode, DEMAND_FORECAST_EXCEL_WRITER=legacy).
+
+    Kept as the reference the fast writer is tested against (tests/test_export.py)
+    and as a fallback that does not depend on constant_memory row ordering.
+    """
+    sku_detail_cols = SKU_DETAIL_COLS
+    month_start_col = len(sku_detail_cols)
+    number_format = formats['number']
+    negative_format = formats['negative']
+    forecast_format = formats['forecast']
+    forecast_negative_format = formats['forecast_negative']
+    row_label_format = formats['row_label']
+    text_format = formats['text']
+
+    current_row = 1
+
+    # Process each SKU
+    for sku_idx, sku_row in category_skus.iterrows():
+        sku = sku_row['SKU']
+
+        # Get SKU details
+        sku_details = [
+            sku_row.get('CATEGORY', ''),
+            sku_row.get('SUB_CATEGORY', ''),
+            sku_row.get('COLLECTION', ''),
+            sku,
+            sku_row.get('SKU_DESCRIPTION', ''),
+            sku_row.get('COLOR_NAME', ''),
+            sku_row.get('SIZE', '')
+        ]
+
+        # Get current inventory data
+        committed_qty = sku_row.get('QTY_COMMITTED', 0)
+        backorder_qty = sku_row.get('QTY_BACKORDERED', 0)
+
+        # Pull this SKU's rows from the shared demand/receipts/projection matrices
+        sales_demand_data = sku_demand[sku_idx]
+        receipts_data = sku_receipts[sku_idx]
+        projected_eom_data = sku_projected_eom[sku_idx]
+
+        # Committed and backorder only apply to the current month
+        committed_data = np.zeros(len(all_months))
+        backorder_data = np.zeros(len(all_months))
+        if current_month_col is not None:
+            committed_data[current_month_col] = committed_qty
+            backorder_data[current_month_col] = backorder_qty
+
+        # No actual EOM inventory is available yet
+        eom_inventory_data = [None] * len(all_months)
+
+        # Write SKU details (first row of this SKU block)
+        for col_idx, detail in enumerate(sku_details):
+            worksheet.write(current_row, col_idx, detail if pd.notna(detail) else '', text_format)
+
+        # Write row label and data for Sales Demand
+        worksheet.write(current_row, len(sku_detail_cols) - 1, 'Sales Demand', row_label_format)
+        for month_idx, value in enumerate(sales_demand_data):
+            is_forecast_month = all_months[month_idx] > current_date
+            fmt = forecast_format if is_forecast_month else number_format
+            worksheet.write(current_row, month_start_col + month_idx, value, fmt)
+        current_row += 1
+
+        # Committed Qty row
+        for col_idx in range(len(sku_detail_cols) - 1):
+            worksheet.write(current_row, col_idx, '', text_format)
+        worksheet.write(current_row, len(sku_detail_cols) - 1, 'Committed Qty', row_label_format)
+        for month_idx, value in enumerate(committed_data):
+            worksheet.write(current_row, month_start_col + month_idx, value, number_format)
+        current_row += 1
+
+        # Backorder Qty row
+        for col_idx in range(len(sku_detail_cols) - 1):
+            worksheet.write(current_row, col_idx, '', text_format)
+        worksheet.write(current_row, len(sku_detail_cols) - 1, 'Backorder Qty', row_label_format)
+        for month_idx, value in enumerate(backorder_data):
+            worksheet.write(current_row, month_start_col + month_idx, value, number_format)
+        current_row += 1
+
+        # EOM Inventory row (actual - only for historical)
+        for col_idx in range(len(sku_detail_cols) - 1):
+            worksheet.write(current_row, col_idx, '', text_format)
+        worksheet.write(current_row, len(sku_detail_cols) - 1, 'EOM Inventory', row_label_format)
+        for month_idx, value in enumerate(eom_inventory_data):
+            if pd.notna(value):
+                fmt = negative_format if value < 0 else number_format
+                worksheet.write(current_row, month_start_col + month_idx, value, fmt)
+            else:
+                worksheet.write(current_row, month_start_col + month_idx, '', number_format)
+        current_row += 1
+
+        # Projected EOM Inventory row
+        for col_idx in range(len(sku_detail_cols) - 1):
+            worksheet.write(current_row, col_idx, '', text_format)
+        worksheet.write(current_row, len(sku_detail_cols) - 1, 'Projected EOM Inv', row_label_format)
+        for month_idx, value in enumerate(projected_eom_data):
+            if pd.notna(value):
+                is_forecast_month = all_months[month_idx] > current_date
+                if value < 0:
+                    fmt = forecast_negative_format if is_forecast_month else negative_format
+                else:
+                    fmt = forecast_format if is_forecast_month else number_format
+                worksheet.write(current_row, month_start_col + month_idx, value, fmt)
+            else:
+                worksheet.write(current_row, month_start_col + month_idx, '', number_format)
+        current_row += 1
+
+        # Receipts row
+        for col_idx in range(len(sku_detail_cols) - 1):
+            worksheet.write(current_row, col_idx, '', text_format)
+        worksheet.write(current_row, len(sku_detail_cols) - 1, 'Receipts (On-Order)', row_label_format)
+        for month_idx, value in enumerate(receipts_data):
+            is_forecast_month = all_months[month_idx] > current_date
+            fmt = forecast_format if is_forecast_month else number_format
+            worksheet.write(current_row, month_start_col + month_idx, value, fmt)
+        current_row += 1
+
+        # Add empty row between SKUs for readability
+        current_row += 1
+
+    return current_row
+
+
+def _write_subtotal_blocks(worksheet, formats, first_row, blocks, all_months, current_date):
+    """Write subtotal blocks laid out like SKU blocks, starting at first_row"""
+    label_col = len(SKU_DETAIL_COLS) - 1
+    n_months = len(all_months)
+    month_fmts = _month_formats(formats)
+    forecast_codes = np.asarray(all_months > current_date, dtype=np.int8)
+    plain_codes = np.zeros(n_months, dtype=np.int8)
+    blank_codes = np.full(n_months, BLANK_CODE, dtype=np.int8)
+    blank_details = [''] * label_col
+
+    current_row = first_row
+    for block in blocks:
+        for row_offset, row_type in enumerate(ROW_TYPES):
+            # The first row carries the group details, like a SKU's Sales Demand row
+            details = blank_details
+            if row_offset == 0:
+                details = [block['details'].get(column, '') for column in SKU_DETAIL_COLS[:label_col]]
+            worksheet.write_row(current_row, 0, details, formats['text'])
+            worksheet.write_string(current_row, label_col, row_type, formats['row_label'])
+
+            values = block['rows'].get(row_type)
+            if values is None:
+                _write_month_row(worksheet, current_row, np.zeros(n_months), blank_codes, month_fmts)
+            elif row_type in (ROW_TYPES[1], ROW_TYPES[2]):
+                # Committed and backorder are plain numbers; the rest are shaded and flagged like SKU rows
+                _write_month_row(worksheet, current_row, values, _value_codes(values, plain_codes, flag=False),
+                                 month_fmts)
+            else:
+                _write_month_row(worksheet, current_row, values, _value_codes(values, forecast_codes), month_fmts)
+            current_row += 1
+        current_row += 1
+    return current_row
+
+
+def _month_formats(formats):
+    """Month cell formats indexed by format code: plain, forecast, negative, forecast negative"""
+    return [formats['number'], formats['forecast'], formats['negative'], formats['forecast_negative']]
+
+
+def _value_codes(values, month_codes, flag=True):
+    """Format codes for a row of values: blank where NaN, negatives flagged when flag is set"""
+    codes = month_codes + NEGATIVE_CODE * (values < 0) if flag else month_codes.copy()
+    return np.where(np.isnan(values), BLANK_CODE, codes).astype(np.int8)
+
+
+def _write_month_row(worksheet, row, values, codes, month_fmts):
+    """Write a row of month values with one write_row() call per run of cells sharing a format code"""
+    bounds = (np.flatnonzero(np.diff(codes)) + 1).tolist()
+    values = values.tolist()
+    for start, end in zip([0] + bounds, bounds + [len(codes)]):
+        col = MONTH_START_COL + start
+        code = codes[start]
+        if code == BLANK_CODE:
+            worksheet.write_row(row, col, [None] * (end - start), month_fmts[0])
+        else:
+            worksheet.write_row(row, col, values[start:end], month_fmts[code])
@@ -0,0 +1,134 @@
+"""
+Long-format SKU x month fact table for dbt and other machine consumers.
+
+One row per SKU and month with the same numbers the workbook shows (Sales
+Demand, receipts, committed, backorder and projected EOM inventory) and
+flags telling actual months from forecast months. The table is written one
+planning category at a time, so only a single category's rows are ever held
+in memory:
+
+    <output_dir>/PLANNING_CATEGORY=<category>/part-0.parquet   (hive-partitioned)
+    <csv_path>                                                  (one CSV, e.g. a dbt seed)
+
+Read the Parquet dataset back with pd.read_parquet(output_dir).
+"""
+import os
+import shutil
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from .compact import QUANTITY_DTYPE, UNITS_DTYPE
+
+FACT_COLUMNS = [
+    'SKU', 'PLANNING_CATEGORY', 'CATEGORY', 'MONTH', 'SALES_DEMAND', 'RECEIPTS', 'COMMITTED_QTY',
+    'BACKORDER_QTY', 'PROJECTED_EOM_INV', 'IS_ACTUAL', 'IS_FORECAST',
+]
+
+# Parquet partition column; it lives in the directory names rather than the files
+PARTITION_COLUMN = 'PLANNING_CATEGORY'
+
+# Default dbt seed written next to the rest of the dbt project
+DEFAULT_SEED_FILE = os.path.join('dbt', 'seeds', 'demand_forecast_facts.csv')
+
+
+def category_fact_table(sku_master, positions, sku_demand, sku_receipts, sku_projected_eom, all_months,
+                        current_date, current_month_col):
+    """
+    Long-format rows for one group of SKUs.
+
+    Args:
+        sku_master: Catalog merged with inventory
+        positions: sku_master rows to include (also their matrix rows), in
+            output order
+        sku_demand: Sales Demand matrix (n_skus x n_months)
+        sku_receipts: Receipts matrix (n_skus x n_months)
+        sku_projected_eom: Projected EOM inventory matrix (n_skus x n_months)
+        all_months: DatetimeIndex of historical + forecast months
+        current_date: Current planning month (datetime)
+        current_month_col: Index of the current month in all_months, or None
+
+    Returns:
+        DataFrame with FACT_COLUMNS, one row per SKU and month
+    """
+    n_skus, n_months = len(positions), len(all_months)
+    skus = sku_master.iloc[positions]
+
+    # Committed and backorder only apply to the current month, as in the workbook
+    committed = np.zeros((n_skus, n_months), dtype=QUANTITY_DTYPE)
+    backordered = np.zeros((n_skus, n_months), dtype=QUANTITY_DTYPE)
+    if current_month_col is not None:
+        committed[:, current_month_col] = skus['QTY_COMMITTED'].to_numpy(dtype=QUANTITY_DTYPE)
+        backordered[:, current_month_col] = skus['QTY_BACKORDERED'].to_numpy(dtype=QUANTITY_DTYPE)
+
+    is_forecast = np.tile(np.asarray(all_months > current_date), n_skus)
+    return pd.DataFrame({
+        'SKU': np.repeat(skus['SKU'].to_numpy(dtype=object), n_months),
+        'PLANNING_CATEGORY': np.repeat(skus['PLANNING_CATEGORY'].to_numpy(dtype=object), n_months),
+        'CATEGORY': np.repeat(skus['CATEGORY'].to_numpy(dtype=object), n_months),
+        'MONTH': np.tile(all_months.to_numpy(dtype='datetime64[ns]'), n_skus),
+        'SALES_DEMAND': sku_demand[positions].astype(UNITS_DTYPE, copy=False).ravel(),
+        'RECEIPTS': sku_receipts[positions].astype(QUANTITY_DTYPE, copy=False).ravel(),
+        'COMMITTED_QTY': committed.ravel(),
+        'BACKORDER_QTY': backordered.ravel(),
+        'PROJECTED_EOM_INV': sku_projected_eom[positions].astype(QUANTITY_DTYPE, copy=False).ravel(),
+        'IS_ACTUAL': ~is_forecast,
+        'IS_FORECAST': is_forecast,
+    }, columns=FACT_COLUMNS)
+
+
+def partition_path(output_dir, category):
+    """Directory of one planning category in the hive-partitioned Parquet dataset"""
+    return os.path.join(output_dir, f"{PARTITION_COLUMN}={quote(str(category), safe='')}")
+
+
+def write_fact_tables(output_dir, partitions, sku_master, sheet_data, csv_path=None, parquet=True):
+    """
+    Stream the fact table out category by category.
+
+    Args:
+        output_dir: Directory of the Parquet dataset (replaced if it exists)
+        partitions: Dict of category -> sku_master row positions (see
+            partition_skus()), in output order
+        sku_master: Catalog merged with inventory
+        sheet_data: The matrices and month axis, as from ForecastResults.sheet_data()
+        csv_path: Also write every row to this CSV (default: no CSV)
+        parquet: Write the Parquet dataset (needs pyarrow)
+
+    Returns:
+        Dict with 'parquet' (dataset directory or None), 'csv' (path or None)
+        and 'rows' (rows written)
+    """
+    if parquet:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Writing the Parquet fact table needs pyarrow (pip install pyarrow)") from None
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+        os.makedirs(output_dir)
+    if csv_path:
+        csv_dir = os.path.dirname(csv_path)
+        if csv_dir:
+            os.makedirs(csv_dir, exist_ok=True)
+
+    rows = 0
+    csv_file = open(csv_path, 'w', newline='') if csv_path else None
+    try:
+        for category, positions in partitions.items():
+            if len(positions) == 0:
+                continue
+            facts = category_fact_table(sku_master, positions, **sheet_data)
+            if parquet:
+                path = partition_path(output_dir, category)
+                os.makedirs(path, exist_ok=True)
+                facts.drop(columns=PARTITION_COLUMN).to_parquet(os.path.join(path, 'part-0.parquet'), index=False)
+            if csv_file is not None:
+                facts.to_csv(csv_file, header=rows == 0, index=False, date_format='%Y-%m-%d', float_format='%.10g')
+            rows += len(facts)
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+
+    return {'parquet': output_dir if parquet else None, 'csv': csv_path, 'rows': rows}
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+# Mapping from detailed planning categories to curve categories
+PLANNING_CATEGORY_TO_CURVE = {
+    # ACCENTS
+    'ACCENTS - BOOKS': 'ACCENTS',
+    'ACCENTS - CANDLE & DEC-ACC': 'ACCENTS',
+    'ACCENTS - ART': 'ACCENTS',
+    'ACCENTS - MIRRORS': 'ACCENTS',
+    'ACCENTS - WALL HANGINGS': 'ACCENTS',
+    'ACCENTS - PLANTERS & VASES': 'ACCENTS',
+    'ACCENTS - MTO': 'ACCENTS',
+    # BASKETS
+    'BASKETS': 'BASKETS',
+    # BATH
+    'BATH - TOWELS': 'BATH',
+    'BATH - BATH ROBES': 'BATH',
+    'BATH - ACCESSORIES': 'BATH',
+    'BATH - MATS': 'BATH',
+    # BEDDING
+    'BEDDING - SHEETS ETC.': 'BEDDING',
+    'BEDDING - QUILTS ETC.': 'BEDDING',
+    'BEDDING - BED BLANKETS': 'BEDDING',
+    'BEDDING - DUVETS': 'BEDDING',
+    'BEDDING - SWATCH': 'BEDDING',
+    'BEDDING - INSERTS': 'BEDDING',
+    # BLANKETS
+    'BLANKETS - THROWS': 'BLANKETS',
+    # FURNITURE
+    'FURNITURE - STOCKED': 'FURNITURE',
+    'FURNITURE - MTO': 'FURNITURE - MTO',
+    'FURNITURE - SWATCH': 'FURNITURE',
+    # PILLOWS
+    'PILLOWS - ACCENT': 'PILLOWS',
+    'PILLOWS - OVERSIZED LUMBARS': 'PILLOWS',
+    # RUGS
+    'RUGS - AREA + ROUND': 'RUGS',
+    'RUGS - ACCENT': 'RUGS',
+    'RUGS - RUNNERS': 'RUGS',
+    'RUGS - MISC': 'RUGS',
+    # TABLEWARE
+    'TABLEWARE': 'TABLEWARE',
+    # OTHER
+    'HOLIDAY': 'ACCENTS',  # Map to ACCENTS as closest match
+    'Z. MISC': 'ACCENTS',  # Map to ACCENTS as default
+}
+
+# Days per month used to convert daily ROS to monthly units
+DAYS_PER_MONTH = 30
+
+
+def get_curve_category(planning_category):
+    """Map detailed planning category to curve category"""
+    if planning_category in PLANNING_CATEGORY_TO_CURVE:
+        return PLANNING_CATEGORY_TO_CURVE[planning_category]
+    # Try to match by prefix (e.g., "BEDDING - XXX" -> "BEDDING")
+    for curve_cat in ['ACCENTS', 'BASKETS', 'BATH', 'BEDDING', 'BLANKETS', 'FURNITURE', 'PILLOWS', 'RUGS', 'TABLEWARE']:
+        if planning_category and planning_category.startswith(curve_cat):
+            return curve_cat
+    return None
+
+
+def calculate_forecast(sku, planning_category, forecast_month, ros_lookup, curve_data):
+    """
+    Calculate forecast for a SKU using:
+    1. ROS (Rate of Sale) data - daily ROS converted to monthly (daily × 30)
+    2. Monthly sales curve applied to adjust for seasonality
+
+    Args:
+        sku: The SKU identifier
+        planning_category: The planning category for curve lookup
+        forecast_month: The month to forecast (datetime)
+        ros_lookup: Dictionary of SKU -> daily ROS
+        curve_data: DataFrame with monthly curve percentages by planning category
+
+    Returns:
+        Monthly forecasted units
+    """
+    # Get daily ROS for this SKU
+    daily_ros = ros_lookup.get(sku, 0)
+
+    # Convert daily ROS to base monthly units (daily × 30 days)
+    base_monthly_units = daily_ros * DAYS_PER_MONTH
+
+    # Apply the monthly sales curve for seasonality adjustment
+    # The curve represents the proportion of annual sales for each month
+    # We need to adjust the base monthly forecast by comparing the month's curve to average (1/12)
+    curve_adjustment = 1.0  # Default to no adjustment if no curve found
+
+    # Map detailed planning category to curve category
+    curve_category = get_curve_category(planning_category)
+
+    if curve_category and curve_category in curve_data.index:
+        # Find the matching month in the curve data (match by month number)
+        forecast_month_num = forecast_month.month
+        for curve_col in curve_data.columns:
+            if curve_col.month == forecast_month_num:
+                # Get the curve percentage for this month
+                month_curve_pct = curve_data.loc[curve_category, curve_col]
+                # Calculate adjustment: curve_pct / (1/12) = curve_pct * 12
+                # This scales the base monthly forecast up/down based on seasonality
+                curve_adjustment = month_curve_pct * 12
+                break
+
+    # Calculate monthly forecast: base monthly units × curve adjustment
+    monthly_forecast = base_monthly_units * curve_adjustment
+
+    return monthly_forecast
+
+
+def curve_adjustments(curve_data):
+    """
+    Convert curve percentages into seasonality adjustments by calendar month.
+
+    Mirrors the lookup in calculate_forecast: the first curve column for each
+    month number wins, and months with no curve column keep an adjustment of 1.0.
+
+    Args:
+        curve_data: DataFrame with monthly curve percentages by planning category
+
+    Returns:
+        DataFrame indexed by curve category with columns 1-12 (calendar month)
+    """
+    adjustments = pd.DataFrame(1.0, index=curve_data.index, columns=range(1, 13))
+    seen_months = set()
+    for curve_col in curve_data.columns:
+        if curve_col.month in seen_months:
+            continue
+        seen_months.add(curve_col.month)
+        adjustments[curve_col.month] = curve_data[curve_col].to_numpy(dtype=float) * 12
+    return adjustments
+
+
+def build_curve_matrix(planning_categories, curve_data):
+    """
+    Build the category-resolved curve matrix for a list of SKUs.
+
+    get_curve_category() is evaluated once per distinct planning category
+    rather than once per SKU-month.
+
+    Args:
+        planning_categories: Sequence of planning categories, one per SKU
+        curve_data: DataFrame with monthly curve percentages by planning category
+
+    Returns:
+        ndarray of shape (n_skus, 12) holding the curve adjustment for each
+        SKU and calendar month (column 0 = January)
+    """
+    adjustments = curve_adjustments(curve_data)
+    planning_categories = pd.Series(planning_categories)
+    if isinstance(planning_categories.dtype, pd.CategoricalDtype):
+        # Already interned (see compact.intern_columns); unused categories just add spare rows
+        codes, uniques = planning_categories.cat.codes.to_numpy(), planning_categories.cat.categories
+    else:
+        codes, uniques = pd.factorize(planning_categories.astype(object))
+
+    # Row 0 is the "no curve" fallback used by unmapped categories
+    category_rows = np.ones((len(uniques) + 1, 12))
+    for idx, planning_category in enumerate(uniques):
+        curve_category = get_curve_category(planning_category) if isinstance(planning_category, str) else None
+        if curve_category and curve_category in adjustments.index:
+            category_rows[idx + 1] = adjustments.loc[curve_category].to_numpy()
+
+    # Missing categories are factorized to -1, which lands on the fallback row
+    return category_rows[codes + 1]
+
+
+def forecast_matrix(ros, curve_matrix, forecast_months):
+    """
+    Calculate the unrounded forecast for every SKU and forecast month at once.
+
+    Produces the same numbers as calling calculate_forecast() per SKU and month.
+
+    Args:
+        ros: Array of daily ROS, one per SKU
+        curve_matrix: Curve adjustments from build_curve_matrix()
+        forecast_months: Sequence of months to forecast (datetime)
+
+    Returns:
+        ndarray of shape (n_skus, n_forecast_months)
+    """
+    base_monthly_units = np.asarray(ros, dtype=float) * DAYS_PER_MONTH
+    month_cols = [month.month - 1 for month in forecast_months]
+    return base_monthly_units[:, None] * curve_matrix[:, month_cols]
+
@@ -0,0 +1,386 @@
+"""
+Hierarchy index for category, collection and vendor rollups.
+
+Every sku_master row belongs to one group at each level of the product
+hierarchy:
+
+    PLANNING_CATEGORY  -> CURVE_CATEGORY -> CATEGORY
+    COLLECTION
+    VENDOR_NAME
+
+The index is built once from sku_master. Each level keeps an integer group
+code per SKU and a sparse (group x SKU) aggregation matrix, so rolling a
+SKU x month matrix up to a level is one sparse matrix product, and dollar
+rollups use the same matrix with each SKU's column scaled by its price:
+
+    hierarchy = HierarchyIndex.from_sku_master(context.sku_master)
+    hierarchy['COLLECTION'].rollup(results.demand)
+    hierarchy['CATEGORY'].rollup(results.demand, weights=price)
+    hierarchy_summary(context, results)      # every level and measure at once
+
+SKUs with a blank value are grouped under UNKNOWN_GROUP, as in the summary
+notebooks. category_subtotals() turns the rollups into the per-collection
+and per-sheet subtotal blocks written at the bottom of each workbook sheet.
+
+    python -m demand_forecast.hierarchy --output hierarchy_summary.csv
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .forecast import get_curve_category
+
+# Levels built by default, in hierarchy order
+HIERARCHY_LEVELS = ('PLANNING_CATEGORY', 'CURVE_CATEGORY', 'CATEGORY', 'COLLECTION', 'VENDOR_NAME')
+
+# Group of SKUs without a value at a level
+UNKNOWN_GROUP = 'UNKNOWN'
+
+# Summary measure -> (ForecastResults matrix, sku_master column the units are priced at)
+SUMMARY_MEASURES = {
+    'Sales Demand': ('demand', None),
+    'Receipts (On-Order)': ('receipts', None),
+    'Projected EOM Inv': ('projected_eom', None),
+    'Retail Demand $': ('demand', 'FULL_PRICE_RETAIL'),
+    'Demand Cost $': ('demand', 'VENDOR_COST_USD'),
+    'Receipts Cost $': ('receipts', 'VENDOR_COST_USD'),
+}
+
+# Label written in the SKU column of a subtotal block
+SUBTOTAL_LABEL = 'SUBTOTAL'
+TOTAL_LABEL = 'TOTAL'
+
+
+@dataclass(frozen=True)
+class HierarchyLevel:
+    """
+    Grouping of the sku_master rows at one level.
+
+    codes holds the group of every SKU (a position in labels); matrix is the
+    (n_groups x n_skus) 0/1 aggregation matrix as a scipy.sparse CSR matrix.
+    """
+
+    name: str
+    codes: np.ndarray
+    labels: pd.Index
+    matrix: object
+
+    @classmethod
+    def from_codes(cls, name, codes, labels):
+        # scipy is only loaded once a hierarchy is built
+        from scipy import sparse
+
+        codes = np.asarray(codes, dtype=np.int32)
+        n_skus = len(codes)
+        matrix = sparse.csr_matrix(
+            (np.ones(n_skus), (codes, np.arange(n_skus))), shape=(len(labels), n_skus)
+        )
+        return cls(name, codes, labels if isinstance(labels, pd.Index) else pd.Index(labels), matrix)
+
+    @property
+    def n_groups(self):
+        return len(self.labels)
+
+    def sizes(self):
+        """SKUs per group"""
+        return np.bincount(self.codes, minlength=self.n_groups)
+
+    def rollup(self, values, weights=None):
+        """
+        Sum SKU rows into groups.
+
+        Columns that are NaN for every SKU (e.g. projected EOM before the
+        current month) stay NaN; other NaNs count as 0.
+
+        Args:
+            values: Array with one row per sku_master row (1-D or n_skus x k)
+            weights: Optional per-SKU multiplier (e.g. price) applied before summing
+
+        Returns:
+            float64 ndarray with one row per group
+        """
+        values = np.asarray(values)
+        matrix = self.matrix
+        if weights is not None:
+            matrix = matrix.multiply(np.asarray(weights, dtype=float)[None, :]).tocsr()
+        missing = None
+        if values.dtype.kind == 'f' and values.ndim == 2:
+            nan = np.isnan(values)
+            if nan.any():
+                missing = nan.all(axis=0)
+                values = np.where(nan, 0, values)
+        totals = np.asarray(matrix @ values.astype(float, copy=False))
+        if missing is not None:
+            totals[..., missing] = np.nan
+        return totals
+
+    def frame(self, values, columns=None, weights=None):
+        """rollup() as a DataFrame indexed by group label"""
+        return pd.DataFrame(self.rollup(values, weights), index=self.labels, columns=columns)
+
+
+@dataclass
+class HierarchyIndex:
+    """The HierarchyLevels of one sku_master, keyed by level name"""
+
+    levels: dict
+    n_skus: int
+
+    @classmethod
+    def from_sku_master(cls, sku_master, levels=HIERARCHY_LEVELS):
+        """
+        Build every level from sku_master.
+
+        CURVE_CATEGORY is derived from PLANNING_CATEGORY (see
+        get_curve_category()); the other levels are sku_master columns.
+
+        Args:
+            sku_master: Catalog merged with inventory
+            levels: Level names to build
+
+        Returns:
+            HierarchyIndex
+        """
+        built = {}
+        for name in levels:
+            if name == 'CURVE_CATEGORY':
+                labels = sku_master['PLANNING_CATEGORY'].map(
+                    lambda category: get_curve_category(category) if isinstance(category, str) else None
+                )
+            else:
+                labels = sku_master[name]
+            built[name] = HierarchyLevel.from_codes(name, *_group_codes(labels))
+        return cls(built, len(sku_master))
+
+    def __getitem__(self, name):
+        return self.levels[name]
+
+    def __contains__(self, name):
+        return name in self.levels
+
+    def combine(self, *names):
+        """
+        Level grouping SKUs by several levels at once.
+
+        Returns:
+            HierarchyLevel named 'A/B' whose labels are a MultiIndex of the
+            (level A, level B, ...) groups that have SKUs
+        """
+        parts = [self.levels[name] for name in names]
+        codes, uniques = np.unique(np.stack([part.codes for part in parts], axis=1), axis=0, return_inverse=True)
+        labels = pd.MultiIndex.from_arrays(
+            [part.labels[codes[:, i]] for i, part in enumerate(parts)], names=list(names)
+        )
+        return HierarchyLevel.from_codes('/'.join(names), uniques.ravel(), labels)
+
+    def parents(self, child, parent):
+        """
+        Parent group of every child group.
+
+        Args:
+            child: Finer level name (e.g. 'PLANNING_CATEGORY')
+            parent: Coarser level name (e.g. 'CATEGORY')
+
+        Returns:
+            Series indexed by child label holding the parent label most of the
+            child's SKUs belong to
+        """
+        from scipy import sparse
+
+        child_level, parent_level = self.levels[child], self.levels[parent]
+        counts = child_level.matrix @ sparse.csr_matrix(
+            (np.ones(self.n_skus), (np.arange(self.n_skus), parent_level.codes)),
+            shape=(self.n_skus, parent_level.n_groups),
+        )
+        parent_codes = np.asarray(counts.argmax(axis=1)).ravel()
+        return pd.Series(parent_level.labels[parent_codes], index=child_level.labels, name=parent)
+
+    def rollup(self, values, weights=None, levels=None):
+        """Dict of level name -> HierarchyLevel.rollup() for every level (or the given ones)"""
+        return {name: self.levels[name].rollup(values, weights) for name in (levels or self.levels)}
+
+
+def hierarchy_summary(context, results, hierarchy=None, levels=None, measures=None):
+    """
+    Roll every summary measure up to every hierarchy level.
+
+    Args:
+        context: ModelContext
+        results: ForecastResults from run_forecast()
+        hierarchy: HierarchyIndex of context.sku_master (default: built here)
+        levels: Level names (default: every level of the index)
+        measures: Names from SUMMARY_MEASURES (default: all)
+
+    Returns:
+        DataFrame with LEVEL, GROUP and MEASURE columns plus one column per
+        month of context.all_months, one row per level, group and measure
+    """
+    hierarchy = hierarchy or HierarchyIndex.from_sku_master(context.sku_master)
+    levels = list(levels or hierarchy.levels)
+    measures = list(measures or SUMMARY_MEASURES)
+    matrices = results.matrices()
+    prices = {}
+
+    tables = []
+    for level_name in levels:
+        level = hierarchy[level_name]
+        for measure in measures:
+            matrix_name, price_column = SUMMARY_MEASURES[measure]
+            if price_column and price_column not in prices:
+                prices[price_column] = _price(context.sku_master, price_column)
+            totals = level.rollup(matrices[matrix_name], prices.get(price_column))
+            table = pd.DataFrame(totals, columns=context.all_months)
+            table.insert(0, 'MEASURE', measure)
+            table.insert(0, 'GROUP', np.asarray(level.labels, dtype=object))
+            table.insert(0, 'LEVEL', level_name)
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+def category_subtotals(context, results, hierarchy=None, by='COLLECTION'):
+    """
+    Subtotal blocks for the bottom of every planning category sheet.
+
+    Each sheet gets one block per group of `by` within the category (sorted
+    by label) followed by a total block for the whole category. A block
+    holds the same rows as a SKU block; EOM Inventory stays blank.
+
+    Args:
+        context: ModelContext
+        results: ForecastResults from run_forecast()
+        hierarchy: HierarchyIndex of context.sku_master (default: built here)
+        by: Level subtotalled within each sheet, or None for the category
+            total only
+
+    Returns:
+        Dict of planning category -> list of blocks, each a dict with
+        'details' (SKU detail column -> text) and 'rows' (row type -> values
+        per month)
+    """
+    from .export import ROW_TYPES, SKU_DETAIL_COLS
+
+    hierarchy = hierarchy or HierarchyIndex.from_sku_master(context.sku_master)
+    sku_master = context.sku_master
+    n_months = len(context.all_months)
+
+    def month_only(column):
+        values = np.zeros((len(sku_master), n_months))
+        if context.current_month_col is not None:
+            values[:, context.current_month_col] = sku_master[column].to_numpy(dtype=float)
+        return values
+
+    # Groups that are not a SKU detail column are named in the description column
+    group_column = by if by in SKU_DETAIL_COLS else 'SKU_DESCRIPTION'
+    per_sku = {
+        ROW_TYPES[0]: results.demand,
+        ROW_TYPES[1]: month_only('QTY_COMMITTED'),
+        ROW_TYPES[2]: month_only('QTY_BACKORDERED'),
+        ROW_TYPES[4]: results.projected_eom,
+        ROW_TYPES[5]: results.receipts,
+    }
+
+    def rollups(level):
+        return {row_type: level.rollup(values) for row_type, values in per_sku.items()}
+
+    category_level = hierarchy['PLANNING_CATEGORY']
+    category_totals = rollups(category_level)
+    category_positions = {label: position for position, label in enumerate(category_level.labels)}
+    groups = {}
+    if by is not None:
+        level = hierarchy.combine('PLANNING_CATEGORY', by)
+        group_totals = rollups(level)
+        for position in np.argsort(level.labels.get_level_values(1).astype(str), kind='stable'):
+            category, group = level.labels[position]
+            groups.setdefault(category, []).append((group, position))
+
+    subtotals = {}
+    for category in context.category_partitions:
+        label = _label(category)
+        blocks = [
+            {
+                'details': {group_column: group, 'SKU': SUBTOTAL_LABEL},
+                'rows': {row_type: totals[position] for row_type, totals in group_totals.items()},
+            }
+            for group, position in groups.get(label, [])
+        ]
+        position = category_positions.get(label)
+        if position is not None:
+            blocks.append({
+                'details': {'SKU': TOTAL_LABEL, 'SKU_DESCRIPTION': label},
+                'rows': {row_type: totals[position] for row_type, totals in category_totals.items()},
+            })
+        subtotals[category] = blocks
+    return subtotals
+
+
+def _label(value):
+    """Group label of a sku_master value; blanks (NaN, 0 from fillna, '') become UNKNOWN_GROUP"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return UNKNOWN_GROUP
+    text = str(value).strip()
+    return UNKNOWN_GROUP if text in ('', '0', 'nan') else text
+
+
+def _group_codes(labels):
+    """Tuple (codes, labels) grouping a sku_master column, blanks under UNKNOWN_GROUP"""
+    labels = pd.Series(labels)
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        # Map each category once instead of every SKU
+        category_labels = np.array([_label(value) for value in labels.cat.categories] + [UNKNOWN_GROUP], dtype=object)
+        values = category_labels[labels.cat.codes.to_numpy()]
+    else:
+        values = np.array([_label(value) for value in labels.to_numpy(dtype=object)], dtype=object)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, uniques
+
+
+def _price(sku_master, column):
+    if column not in sku_master.columns:
+        return np.zeros(len(sku_master))
+    return pd.to_numeric(sku_master[column], errors='coerce').fillna(0).to_numpy(dtype=float)
+
+
+def main(argv=None):
+    from .cache import InputCache
+    from .context import REPO_ROOT, input_paths, load_context
+    from .pipeline import run_forecast
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-path', default=REPO_ROOT, help='Directory holding the input files')
+    parser.add_argument('--levels', nargs='+', default=list(HIERARCHY_LEVELS), choices=list(HIERARCHY_LEVELS))
+    parser.add_argument('--output', help='Write the summary to this CSV (or .parquet)')
+    args = parser.parse_args(argv)
+
+    context = load_context(input_paths(args.base_path), cache=InputCache(os.path.join(args.base_path, '.cache', 'inputs')))
+    results = run_forecast(context)
+    started = time.perf_counter()
+    hierarchy = HierarchyIndex.from_sku_master(context.sku_master, args.levels)
+    summary = hierarchy_summary(context, results, hierarchy)
+    seconds = time.perf_counter() - started
+    print(f"Rolled {len(context.sku_master)} SKUs up to "
+          + ', '.join(f"{hierarchy[name].n_groups} {name}" for name in args.levels)
+          + f" in {seconds:.2f}s ({len(summary)} rows)")
+
+    year_columns = [month for month in context.all_months if month.year == context.current_date.year + 1]
+    retail = summary[(summary['LEVEL'] == 'CATEGORY') & (summary['MEASURE'] == 'Retail Demand $')]
+    totals = retail.set_index('GROUP')[year_columns].sum(axis=1).sort_values(ascending=False)
+    print(f"\nRetail demand $ by category, {context.current_date.year + 1}:")
+    print(totals.map('${:,.0f}'.format).to_string())
+
+    if args.output:
+        table = summary.rename(columns={month: month.strftime('%Y-%m') for month in context.all_months})
+        if args.output.endswith('.parquet'):
+            table.to_parquet(args.output, index=False)
+        else:
+            table.to_csv(args.output, index=False)
+        print(f"\nSummary written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
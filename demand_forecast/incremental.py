@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bump when the saved state layout or the model calculation changes, so the
+# next incremental run starts with a full rebuild
+STATE_VERSION = 2
+
+# Per-SKU inputs that are fingerprinted, in fingerprint column order
+FINGERPRINT_SOURCES = ('catalog_inventory', 'ros', 'sales', 'on_order')
+
+# Per-SKU result matrices kept between runs
+STATE_MATRICES = ('forecast', 'demand', 'receipts', 'projected_eom')
+
+_STATE_ARRAYS = 'state.npz'
+_STATE_META = 'state.json'
+
+
+def sku_input_fingerprints(sku_master, sku_ros, sales_agg, on_order_agg):
+    """
+    Fingerprint each SKU's inputs so changes can be detected between runs.
+
+    Args:
+        sku_master: Catalog merged with inventory (one row per SKU)
+        sku_ros: Daily ROS, one per sku_master row
+        sales_agg: Sales aggregated by SKU and month
+        on_order_agg: On-order quantities aggregated by SKU and receipt month
+
+    Returns:
+        uint64 ndarray of shape (n_skus, len(FINGERPRINT_SOURCES))
+    """
+    skus = sku_master['SKU']
+    fingerprints = np.zeros((len(sku_master), len(FINGERPRINT_SOURCES)), dtype=np.uint64)
+    fingerprints[:, 0] = pd.util.hash_pandas_object(sku_master, index=False).to_numpy()
+    fingerprints[:, 1] = pd.util.hash_pandas_object(pd.Series(sku_ros), index=False).to_numpy()
+    fingerprints[:, 2] = _grouped_row_hashes(sales_agg, skus)
+    fingerprints[:, 3] = _grouped_row_hashes(on_order_agg, skus)
+    return fingerprints
+
+
+def model_fingerprint(curve_data, all_months, current_date, forecaster_fingerprint=None, subtotals=False):
+    """
+    Fingerprint of the inputs shared by every SKU; any change forces a full rebuild.
+
+    forecaster_fingerprint identifies a statistical forecaster's settings
+    (None for the ROS forecast). subtotals is set when the workbooks get
+    subtotal blocks, which changes every category sheet.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{STATE_VERSION}|{current_date:%Y-%m-%d}|".encode())
+    if forecaster_fingerprint is not None:
+        digest.update(f"forecaster:{forecaster_fingerprint}|".encode())
+    if subtotals:
+        digest.update(b"subtotals|")
+    digest.update('|'.join(f"{month:%Y-%m}" for month in all_months).encode())
+    digest.update(pd.util.hash_pandas_object(curve_data.reset_index(), index=False).to_numpy().tobytes())
+    digest.update('|'.join(str(col) for col in curve_data.columns).encode())
+    return digest.hexdigest()
+
+
+def load_run_state(state_dir):
+    """
+    Load the state saved by the previous run.
+
+    Returns:
+        Dict with 'skus', 'categories', 'fingerprints', the STATE_MATRICES and
+        the saved metadata, or None when there is no usable state
+    """
+    arrays_path = os.path.join(state_dir, _STATE_ARRAYS)
+    meta_path = os.path.join(state_dir, _STATE_META)
+    if not (os.path.exists(arrays_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('state_version') != STATE_VERSION:
+        return None
+    with np.load(arrays_path) as arrays:
+        state = {name: arrays[name] for name in arrays.files}
+    state['meta'] = meta
+    return state
+
+
+def save_run_state(state_dir, skus, categories, fingerprints, model_fp, matrices, full_rebuild_seconds):
+    """
+    Save this run's per-SKU inputs and results for the next incremental run.
+
+    Args:
+        state_dir: Directory for the state files (created if needed)
+        skus: SKU identifiers, one per matrix row
+        categories: Planning category of each SKU
+        fingerprints: Matrix from sku_input_fingerprints()
+        model_fp: Fingerprint from model_fingerprint()
+        matrices: Dict with the STATE_MATRICES
+        full_rebuild_seconds: Duration of the most recent full rebuild
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    arrays = {name: matrices[name] for name in STATE_MATRICES}
+    arrays['skus'] = np.asarray(skus, dtype=str)
+    arrays['categories'] = np.asarray(pd.Series(categories).astype(str), dtype=str)
+    arrays['fingerprints'] = fingerprints
+
+    # Write to temporary files first so an interrupted save never leaves half a state
+    tmp_arrays = os.path.join(state_dir, 'state.tmp.npz')
+    np.savez(tmp_arrays, **arrays)
+    tmp_meta = os.path.join(state_dir, _STATE_META + '.tmp')
+    with open(tmp_meta, 'w') as f:
+        json.dump({
+            'state_version': STATE_VERSION,
+            'model_fingerprint': model_fp,
+            'full_rebuild_seconds': full_rebuild_seconds,
+            'saved_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+        }, f, indent=2)
+    os.replace(tmp_arrays, os.path.join(state_dir, _STATE_ARRAYS))
+    os.replace(tmp_meta, os.path.join(state_dir, _STATE_META))
+
+
+def plan_incremental_run(previous, skus, categories, fingerprints, model_fp):
+    """
+    Work out which SKUs need recomputing and which category outputs to rebuild.
+
+    Args:
+        previous: State from load_run_state(), or None
+        skus: SKU identifiers for this run
+        categories: Planning category of each SKU for this run
+        fingerprints: Matrix from sku_input_fingerprints() for this run
+        model_fp: Fingerprint from model_fingerprint() for this run
+
+    Returns:
+        Dict with:
+            full: True when everything must be rebuilt
+            reason: Why a full rebuild is needed (None otherwise)
+            recompute_rows: Rows to recompute in this run's SKU order
+            reuse_rows / reuse_from: Rows whose results are copied, and their
+                rows in the previous state
+            changed_skus: New SKUs and SKUs with changed inputs
+            removed_skus: SKUs in the previous run but not in this one
+            changed_by_source: Number of changed SKUs per FINGERPRINT_SOURCES entry
+            affected_categories: Categories whose outputs must be rebuilt
+    """
+    skus = pd.Index(np.asarray(skus, dtype=str))
+    categories = np.asarray(pd.Series(categories).astype(str), dtype=str)
+
+    reason = None
+    if previous is None:
+        reason = 'no previous run state'
+    elif previous['meta'].get('model_fingerprint') != model_fp:
+        reason = 'curve data, forecast horizon, forecast method or sheet subtotals changed'
+    elif not skus.is_unique or not pd.Index(previous['skus']).is_unique:
+        reason = 'duplicate SKUs in sku_master'
+
+    if reason is not None:
+        return {
+            'full': True,
+            'reason': reason,
+            'recompute_rows': np.arange(len(skus)),
+            'reuse_rows': np.array([], dtype=int),
+            'reuse_from': np.array([], dtype=int),
+            'changed_skus': list(skus),
+            'removed_skus': [],
+            'changed_by_source': {source: len(skus) for source in FINGERPRINT_SOURCES},
+            'affected_categories': set(categories),
+        }
+
+    previous_skus = pd.Index(previous['skus'])
+    previous_rows = previous_skus.get_indexer(skus)
+    is_new = previous_rows < 0
+
+    # Compare fingerprints source by source for SKUs seen last run
+    source_changed = np.ones(fingerprints.shape, dtype=bool)
+    known = ~is_new
+    source_changed[known] = fingerprints[known] != previous['fingerprints'][previous_rows[known]]
+    changed = is_new | source_changed.any(axis=1)
+
+    removed = ~previous_skus.isin(skus)
+
+    # Rebuild categories that gained, lost or changed a SKU (both old and new category when one moved)
+    affected_categories = set(categories[changed])
+    affected_categories.update(previous['categories'][previous_rows[changed & known]])
+    affected_categories.update(previous['categories'][removed])
+
+    return {
+        'full': False,
+        'reason': None,
+        'recompute_rows': np.flatnonzero(changed),
+        'reuse_rows': np.flatnonzero(~changed),
+        'reuse_from': previous_rows[~changed],
+        'changed_skus': list(skus[changed]),
+        'removed_skus': list(previous_skus[removed]),
+        'changed_by_source': {
+            source: int(source_changed[known, idx].sum()) for idx, source in enumerate(FINGERPRINT_SOURCES)
+        },
+        'affected_categories': affected_categories,
+    }
+
+
+def merge_rows(plan, recomputed, previous_values):
+    """
+    Combine recomputed rows with rows carried over from the previous run.
+
+    Args:
+        plan: Plan from plan_incremental_run()
+        recomputed: Matrix of results for plan['recompute_rows'], in that order
+        previous_values: The matching matrix from the previous run state
+
+    Returns:
+        Matrix covering every SKU in this run's order
+    """
+    n_rows = len(plan['recompute_rows']) + len(plan['reuse_rows'])
+    merged = np.empty((n_rows,) + recomputed.shape[1:], dtype=recomputed.dtype)
+    merged[plan['recompute_rows']] = recomputed
+    if len(plan['reuse_rows']):
+        merged[plan['reuse_rows']] = previous_values[plan['reuse_from']]
+    return merged
+
+
+def _grouped_row_hashes(frame, skus):
+    """Order-independent hash of each SKU's rows in a long table (0 for SKUs with no rows)"""
+    if len(frame) == 0:
+        return np.zeros(len(skus), dtype=np.uint64)
+    row_hashes = pd.Series(pd.util.hash_pandas_object(frame, index=False).to_numpy(), index=frame['SKU'].to_numpy())
+    # Summing (with uint64 wraparound) makes the result independent of row order
+    by_sku = row_hashes.groupby(level=0).sum()
+    return by_sku.reindex(pd.Index(skus), fill_value=0).to_numpy(dtype=np.uint64)
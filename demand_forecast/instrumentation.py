@@ -0,0 +1,263 @@
+"""
+Run instrumentation: named stage spans and a JSON run report.
+
+    report = RunReport(profile_stages=['export'], profile_dir='.cache/profiles')
+    with report.span('forecast', skus=len(sku_master)) as span:
+        ...
+        span.count('cells', n)
+    report.write('run_report.json')
+
+Each span records wall time, CPU time, resident memory and the process peak
+RSS when it ends, plus any row counts attached to it. Spans can nest; every
+span stores the name of its parent and is listed once it ends. Stages named in profile_stages are run
+under cProfile and their stats saved next to the report.
+
+Code that is not being measured passes NULL_REPORT (the default everywhere),
+whose span() hands back one shared do-nothing span, so instrumented code
+costs a method call per stage when reporting is off.
+"""
+import cProfile
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Version of the JSON report layout
+REPORT_VERSION = 1
+# Functions listed per profiled stage in the report
+PROFILE_TOP_FUNCTIONS = 15
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB, or None where resource is unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size in MB, or None where /proc is unavailable"""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 ** 2
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class Span:
+    """One timed stage of a run; use as a context manager via RunReport.span()"""
+
+    __slots__ = ('report', 'name', 'label', 'parent', 'counts', 'record', '_started', '_cpu_started',
+                 '_profiler', '_tracing')
+
+    def __init__(self, report, name, label=None, counts=None):
+        self.report = report
+        self.name = name
+        self.label = label
+        self.parent = None
+        self.counts = dict(counts) if counts else {}
+        self.record = None
+        self._profiler = None
+        self._tracing = False
+
+    def count(self, key, n=1):
+        """Add n to one of the span's row counts"""
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def __enter__(self):
+        report = self.report
+        self.parent = report._stack[-1].name if report._stack else None
+        report._stack.append(self)
+        if report.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        if self.name in report.profile_stages:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._cpu_started = time.process_time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_seconds = time.perf_counter() - self._started
+        cpu_seconds = time.process_time() - self._cpu_started
+        report = self.report
+        if self._profiler is not None:
+            self._profiler.disable()
+        report._stack.pop()
+
+        record = {
+            'name': self.name,
+            'parent': self.parent,
+            'start_seconds': round(self._started - report._started, 4),
+            'wall_seconds': round(wall_seconds, 4),
+            'cpu_seconds': round(cpu_seconds, 4),
+            'rss_mb': _round(current_rss_mb()),
+            'peak_rss_mb': _round(peak_rss_mb()),
+            'counts': self.counts,
+        }
+        if self.label is not None:
+            record['label'] = str(self.label)
+        if self._tracing:
+            record['traced_peak_mb'] = _round(tracemalloc.get_traced_memory()[1] / 1024 ** 2)
+            tracemalloc.stop()
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        if self._profiler is not None:
+            record['profile'] = report._save_profile(self, self._profiler)
+        self.record = record
+        report.spans.append(record)
+        return False
+
+
+class _NullSpan:
+    """Span stand-in used when reporting is off"""
+
+    __slots__ = ()
+
+    def count(self, key, n=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullReport:
+    """A RunReport that records nothing"""
+
+    enabled = False
+
+    def span(self, name, label=None, **counts):
+        return _NULL_SPAN
+
+
+NULL_REPORT = NullReport()
+
+
+class RunReport:
+    """
+    Collects spans for one run and writes them as a JSON report.
+
+    Args:
+        profile_stages: Span names to run under cProfile
+        profile_dir: Directory for the .prof files of profiled stages
+            (default: only the top functions are kept in the report)
+        trace_memory: Record tracemalloc peaks for top-level spans (slows
+            the run down)
+        metadata: Extra values stored at the top of the report
+    """
+
+    enabled = True
+
+    def __init__(self, profile_stages=(), profile_dir=None, trace_memory=False, metadata=None):
+        self.profile_stages = frozenset(profile_stages)
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.metadata = dict(metadata or {})
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self.spans = []
+        self._stack = []
+        self._started = time.perf_counter()
+
+    def span(self, name, label=None, **counts):
+        """
+        Time a stage.
+
+        Args:
+            name: Stage name
+            label: Optional qualifier, e.g. the category a sheet belongs to
+            **counts: Initial row counts (more can be added with span.count())
+
+        Returns:
+            Span context manager
+        """
+        return Span(self, name, label, counts)
+
+    def stages(self):
+        """Dict of span name -> record for top-level spans"""
+        return {record['name']: record for record in self.spans if record['parent'] is None}
+
+    def to_dict(self):
+        return {
+            'version': REPORT_VERSION,
+            'created': self.created,
+            'machine': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'metadata': self.metadata,
+            'peak_rss_mb': _round(peak_rss_mb()),
+            'spans': self.spans,
+        }
+
+    def write(self, path):
+        """Write the report as JSON and return path"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+    def summary_lines(self):
+        """One line per top-level span, for printing at the end of a run"""
+        return [
+            f"{record['name']:<16} {record['wall_seconds']:>9.2f}s wall {record['cpu_seconds']:>9.2f}s CPU"
+            + ('' if record['peak_rss_mb'] is None else f" {record['peak_rss_mb']:>8.0f} MB peak")
+            for record in self.spans if record['parent'] is None
+        ]
+
+    def _save_profile(self, span, profiler):
+        stats = pstats.Stats(profiler)
+        top = [
+            {
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'total_seconds': round(total_time, 4),
+                'cumulative_seconds': round(cumulative_time, 4),
+            }
+            for (filename, line, function), (_, calls, total_time, cumulative_time, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True
+            )[:PROFILE_TOP_FUNCTIONS]
+        ]
+        profile = {'top': top}
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            file_name = span.name if span.label is None else f"{span.name}-{span.label}"
+            path = os.path.join(self.profile_dir, f"{_safe_file_name(file_name)}.prof")
+            stats.dump_stats(path)
+            profile['path'] = path
+        return profile
+
+
+def _round(value, digits=1):
+    return None if value is None else round(value, digits)
+
+
+def _safe_file_name(name):
+    return ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in name)
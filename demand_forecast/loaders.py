@@ -0,0 +1,235 @@
+import pandas as pd
+
+from .compact import UNITS_DTYPE
+from .receipts import OnOrderSchema
+
+# Version of each input's cleaning code. Bump an entry whenever its reader
+# changes so cached copies of that input are rebuilt.
+CLEANING_VERSIONS = {
+    'catalog': 1,
+    'inventory': 1,
+    'sales': 1,
+    'sales_agg': 2,
+    'daily_sales': 1,
+    'on_order': 1,
+    'ros': 1,
+    'curve': 1,
+    'lead_times': 1,
+}
+
+# Replenishment columns of the extended catalog (lead times in days)
+LEAD_TIME_COLUMNS = [
+    'SKU', 'TOTAL_LEAD_TIME', 'PRODUCTION_TIME', 'TRANSIT_TIME', 'ITEM_MOQS', 'VENDOR_COST_USD', 'IS_MTO',
+    'IS_DROPSHIP',
+]
+
+# Order lines per chunk when streaming the sales extract
+DEFAULT_SALES_CHUNK_ROWS = 1_000_000
+
+# Number of chunk aggregates collected before they are folded together
+_SALES_PARTIALS_PER_FOLD = 8
+
+
+def read_catalog(path):
+    """Load catalog"""
+    catalog = pd.read_csv(path)
+    return catalog.rename(columns={'SKU': 'SKU'})
+
+
+def read_inventory(path):
+    """Load on-hand inventory"""
+    return pd.read_csv(path)
+
+
+def read_sales(path):
+    """Load sales order lines, with SKU renamed and order dates parsed"""
+    sales = pd.read_csv(path)
+    sales = sales.rename(columns={'COMPONENT_SKU': 'SKU'})
+    sales['ORDER_DATE'] = pd.to_datetime(sales['ORDER_DATE'])
+    sales['ORDER_MONTH'] = pd.to_datetime(sales['ORDER_MONTH'])
+    return sales
+
+
+def aggregate_sales(sales):
+    """Aggregate sales order lines by SKU and month, with SKUs as categoricals and int32 units"""
+    sales_agg = sales.groupby(['SKU', 'ORDER_MONTH'])['UNITS_SOLD'].sum().reset_index()
+    sales_agg = sales_agg.rename(columns={'ORDER_MONTH': 'MONTH', 'UNITS_SOLD': 'SALES_DEMAND'})
+    return _compact_sales_agg(sales_agg)
+
+
+def read_sales_aggregate(path, chunksize=DEFAULT_SALES_CHUNK_ROWS):
+    """
+    Stream the sales extract in chunks and build the SKU x month aggregate.
+
+    Only the SKU, month and units columns are read, with SKU and month as
+    categoricals and units as integers. Each chunk is reduced to its SKU-month
+    totals before the next is read, so peak memory follows the size of the
+    aggregate rather than the raw extract.
+
+    Args:
+        path: Path of the sales CSV
+        chunksize: Order lines per chunk
+
+    Returns:
+        DataFrame with SKU (categorical), MONTH and SALES_DEMAND (int32)
+        columns, matching aggregate_sales(read_sales(path))
+    """
+    reader = pd.read_csv(
+        path,
+        usecols=['COMPONENT_SKU', 'ORDER_MONTH', 'UNITS_SOLD'],
+        dtype={'COMPONENT_SKU': 'category', 'ORDER_MONTH': 'category', 'UNITS_SOLD': 'Int64'},
+        chunksize=chunksize,
+    )
+
+    partials = []
+    for chunk in reader:
+        chunk_agg = chunk.groupby(['COMPONENT_SKU', 'ORDER_MONTH'], observed=True)['UNITS_SOLD'].sum().reset_index()
+        # Categories differ between chunks, so store plain labels and parse the (few) months here
+        chunk_agg['COMPONENT_SKU'] = chunk_agg['COMPONENT_SKU'].astype(str)
+        chunk_agg['ORDER_MONTH'] = pd.to_datetime(chunk_agg['ORDER_MONTH'].astype(str))
+        partials.append(chunk_agg)
+
+        # Fold partial aggregates together so they never pile up
+        if len(partials) >= _SALES_PARTIALS_PER_FOLD:
+            partials = [_fold_sales_partials(partials)]
+
+    if not partials:
+        return _compact_sales_agg(pd.DataFrame({
+            'SKU': pd.Series(dtype=str),
+            'MONTH': pd.Series(dtype='datetime64[ns]'),
+            'SALES_DEMAND': pd.Series(dtype='int64'),
+        }))
+
+    sales_agg = _fold_sales_partials(partials)
+    sales_agg = sales_agg.rename(columns={'COMPONENT_SKU': 'SKU', 'ORDER_MONTH': 'MONTH', 'UNITS_SOLD': 'SALES_DEMAND'})
+    return _compact_sales_agg(sales_agg)
+
+
+def read_daily_sales(path, chunksize=DEFAULT_SALES_CHUNK_ROWS):
+    """
+    Stream the sales extract in chunks and total the units sold per order date.
+
+    Args:
+        path: Path of the sales CSV
+        chunksize: Order lines per chunk
+
+    Returns:
+        DataFrame with DATE and UNITS_SOLD (int64) columns, one row per date
+        with sales, sorted by date
+    """
+    reader = pd.read_csv(
+        path,
+        usecols=['ORDER_DATE', 'UNITS_SOLD'],
+        dtype={'ORDER_DATE': 'category', 'UNITS_SOLD': 'Int64'},
+        chunksize=chunksize,
+    )
+    partials = [
+        chunk.groupby('ORDER_DATE', observed=True)['UNITS_SOLD'].sum().rename(index=str)
+        for chunk in reader
+    ]
+    if not partials:
+        return pd.DataFrame({'DATE': pd.Series(dtype='datetime64[ns]'), 'UNITS_SOLD': pd.Series(dtype='int64')})
+
+    daily = pd.concat(partials).groupby(level=0).sum()
+    daily.index = pd.to_datetime(daily.index).normalize()
+    daily = daily.groupby(level=0).sum().sort_index()
+    return pd.DataFrame({'DATE': daily.index, 'UNITS_SOLD': daily.to_numpy(dtype='int64')})
+
+
+def _compact_sales_agg(sales_agg):
+    """Intern SKUs as categoricals and store units as int32"""
+    return sales_agg.assign(
+        SKU=sales_agg['SKU'].astype('category'),
+        SALES_DEMAND=sales_agg['SALES_DEMAND'].astype(UNITS_DTYPE),
+    )
+
+
+def _fold_sales_partials(partials):
+    """Combine per-chunk SKU-month totals into one aggregate"""
+    combined = pd.concat(partials, ignore_index=True)
+    return combined.groupby(['COMPONENT_SKU', 'ORDER_MONTH'])['UNITS_SOLD'].sum().reset_index()
+
+
+def read_on_order(path):
+    """Load on-order data"""
+    return pd.read_excel(path)
+
+
+def aggregate_on_order(on_order, schema=None, verbose=False):
+    """
+    Aggregate on-order quantities by SKU and receipt month.
+
+    Args:
+        on_order: On-order data from read_on_order()
+        schema: OnOrderSchema naming the SKU, quantity and date columns and
+            the receipt timing (default: detect the columns and use land dates)
+        verbose: Print the resolved columns
+
+    Returns:
+        DataFrame with SKU, RECEIPT_MONTH and ON_ORDER_QTY columns (empty when
+        the columns can't be identified)
+    """
+    if verbose:
+        print("\nOn-order data sample:")
+        print(on_order.head())
+        print(f"\nOn-order dtypes:\n{on_order.dtypes}")
+
+    resolved = (schema or OnOrderSchema()).resolve(on_order.columns)
+    if resolved is None:
+        if verbose:
+            print("\nOn-order SKU, quantity or date column not found; no receipts")
+        return pd.DataFrame(columns=['SKU', 'RECEIPT_MONTH', 'ON_ORDER_QTY'])
+    if verbose:
+        print(f"\nOn-order columns - SKU: {resolved.sku!r}, Date: {resolved.date!r}, Qty: {resolved.quantity!r}")
+
+    receipt_month = pd.to_datetime(on_order[resolved.date], errors='coerce').dt.to_period('M').dt.to_timestamp()
+    on_order_agg = on_order.assign(RECEIPT_MONTH=receipt_month).groupby(
+        [resolved.sku, 'RECEIPT_MONTH']
+    )[resolved.quantity].sum().reset_index()
+    on_order_agg = on_order_agg.rename(columns={resolved.sku: 'SKU', resolved.quantity: 'ON_ORDER_QTY'})
+
+    if verbose:
+        print(f"Processed {len(on_order_agg)} on-order records by SKU/month")
+
+    return on_order_agg
+
+
+def read_lead_times(path):
+    """Load lead times, MOQs, vendor cost and MTO/dropship flags per SKU from the extended catalog"""
+    catalog = pd.read_csv(path)
+    return catalog[[column for column in LEAD_TIME_COLUMNS if column in catalog.columns]]
+
+
+def read_ros(path):
+    """Load ROS data (daily rate of sale)"""
+    ros_data = pd.read_csv(path)
+    ros_data.columns = ros_data.columns.str.strip()
+    ros_data['VARIANT_SKU'] = ros_data['VARIANT_SKU'].str.strip()
+    # Convert ROS to numeric, treating '-' and blanks as 0
+    ros_data['NORMALIZED_ROS'] = pd.to_numeric(ros_data['NORMALIZED_ROS'], errors='coerce').fillna(0)
+    return ros_data
+
+
+def read_curve(path):
+    """
+    Load Curve data (monthly sales curve by planning category).
+
+    Month columns are named with ISO date strings so the table can be stored
+    in a columnar cache; use index_curve_data() to get the lookup form.
+    """
+    curve_data = pd.read_excel(path)
+    # Column B is the planning category
+    curve_data = curve_data.rename(columns={'Gross Item Finance Forecast CURVE': 'PLANNING_CATEGORY'})
+    # Drop any unnamed columns (check if column name contains 'Unnamed' as string)
+    curve_data = curve_data.loc[:, [col for col in curve_data.columns if 'Unnamed' not in str(col)]]
+    month_cols = {
+        col: pd.Timestamp(col).strftime('%Y-%m-%d') for col in curve_data.columns if col != 'PLANNING_CATEGORY'
+    }
+    return curve_data.rename(columns=month_cols)
+
+
+def index_curve_data(curve_table):
+    """Set planning category as index and convert column names to datetime for easier matching"""
+    curve_data = curve_table.set_index('PLANNING_CATEGORY')
+    curve_data.columns = pd.to_datetime(curve_data.columns)
+    return curve_data
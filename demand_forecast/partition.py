@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from .compact import label_codes
+
+
+def average_sales(sales_agg, skus):
+    """
+    Average monthly sales of each SKU, counting only months with positive sales.
+
+    Like the original per-SKU ranking, every month in the sales extract
+    counts, including months outside the model's history window. Computed
+    for all SKUs in one pass over the aggregate; SKUs with no sales history
+    (or no positive months) average 0.
+
+    Args:
+        sales_agg: Sales aggregated by SKU and month (SKU, MONTH and
+            SALES_DEMAND columns), e.g. ModelContext.sales_agg
+        skus: SKU of each output row, e.g. sku_master['SKU']
+
+    Returns:
+        float ndarray with one value per SKU in skus
+    """
+    positive = sales_agg[sales_agg['SALES_DEMAND'] > 0]
+    codes, uniques = label_codes(positive['SKU'])
+    known = codes >= 0
+    totals = np.bincount(
+        codes[known], weights=positive['SALES_DEMAND'].to_numpy(dtype=float)[known], minlength=len(uniques)
+    )
+    counts = np.bincount(codes[known], minlength=len(uniques))
+    # Row 0 stays zero for SKUs without positive sales
+    by_sku = np.zeros(len(uniques) + 1)
+    np.divide(totals, counts, out=by_sku[1:], where=counts > 0)
+    return by_sku[uniques.get_indexer(pd.Index(skus)) + 1]
+
+
+def partition_skus(sku_master, sku_avg_sales, categories=None):
+    """
+    Group sku_master by planning category in a single pass and rank each
+    category's SKUs by average sales (highest first).
+
+    Args:
+        sku_master: Catalog merged with inventory
+        sku_avg_sales: Output of average_sales(), one value per sku_master row
+        categories: Categories to return, in order (default: every category
+            in order of first appearance)
+
+    Returns:
+        Dict of category -> int ndarray of sku_master row positions, which
+        are also the rows of the forecast and projection matrices
+    """
+    groups = sku_master.groupby('PLANNING_CATEGORY', sort=False, observed=True).indices
+    if categories is None:
+        categories = list(groups)
+
+    partitions = {}
+    for category in categories:
+        positions = groups.get(category, np.array([], dtype=np.intp))
+        # Same sort as the original per-category sort_values('AVG_SALES', ascending=False),
+        # so SKUs with equal averages keep the same order
+        order = pd.Series(sku_avg_sales[positions]).sort_values(ascending=False).index.to_numpy()
+        partitions[category] = positions[order]
+    return partitions
+
+
+def category_rows(sku_master, positions, sku_avg_sales):
+    """
+    sku_master rows for one category in ranked order, with an AVG_SALES column.
+
+    The index holds each SKU's row in the shared matrices, as expected by
+    write_category_sheet().
+    """
+    category_skus = sku_master.iloc[positions].copy()
+    category_skus.index = positions
+    category_skus['AVG_SALES'] = sku_avg_sales[positions]
+    return category_skus
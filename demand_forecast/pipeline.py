@@ -0,0 +1,458 @@
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .forecast import build_curve_matrix, forecast_matrix
+from .incremental import (
+    load_run_state,
+    merge_rows,
+    model_fingerprint,
+    plan_incremental_run,
+    save_run_state,
+    sku_input_fingerprints,
+)
+from .instrumentation import NULL_REPORT
+from .partition import category_rows
+from .projection import build_demand_matrix, project_eom_inventory, stockout_summary
+
+# run_model() outputs: the formatted workbook, the long-format fact table, or both
+OUTPUT_FORMATS = ('xlsx', 'facts', 'both')
+
+
+@dataclass
+class ForecastResults:
+    """
+    Forecast and projection matrices for every SKU in a ModelContext.
+
+    Rows follow context.sku_master; columns follow context.all_months except
+    for forecast, which covers context.forecast_months (unrounded, float64).
+    demand is int32; receipts and projected_eom are float32 (see compact).
+    """
+
+    forecast: np.ndarray
+    demand: np.ndarray
+    receipts: np.ndarray
+    projected_eom: np.ndarray
+    stockouts: pd.DataFrame
+
+    def sheet_data(self, context, subtotals=None):
+        """Keyword arguments for write_category_sheet(), with optional subtotal blocks by category"""
+        sheet_data = {
+            'sku_demand': self.demand,
+            'sku_receipts': self.receipts,
+            'sku_projected_eom': self.projected_eom,
+            'all_months': context.all_months,
+            'current_date': context.current_date,
+            'current_month_col': context.current_month_col,
+        }
+        if subtotals is not None:
+            sheet_data['subtotals'] = subtotals
+        return sheet_data
+
+    def matrices(self):
+        """The per-SKU matrices keyed like incremental.STATE_MATRICES"""
+        return {
+            'forecast': self.forecast,
+            'demand': self.demand,
+            'receipts': self.receipts,
+            'projected_eom': self.projected_eom,
+        }
+
+    @property
+    def nbytes(self):
+        """Memory held by the per-SKU matrices"""
+        return sum(matrix.nbytes for matrix in self.matrices().values())
+
+
+def compute_forecast(context, rows=None, forecaster=None, report=NULL_REPORT):
+    """
+    Build the unrounded SKU x forecast month matrix.
+
+    Args:
+        context: ModelContext
+        rows: sku_master row positions to forecast (default: all SKUs)
+        forecaster: Optional StatisticalForecaster; SKUs it can fit are
+            forecast from their fitted models and the rest keep the ROS forecast
+        report: RunReport receiving the forecaster's 'fit' span
+
+    Returns:
+        ndarray of shape (n_rows, len(context.forecast_months))
+    """
+    sku_rows = context.sku_master if rows is None else context.sku_master.iloc[rows]
+    sku_ros = context.sku_ros if rows is None else context.sku_ros[rows]
+
+    sku_curve_matrix = build_curve_matrix(sku_rows['PLANNING_CATEGORY'], context.curve_data)
+    forecast = forecast_matrix(sku_ros, sku_curve_matrix, context.forecast_months)
+
+    if forecaster is not None:
+        forecast = forecaster.forecast(context, rows, fallback=forecast, report=report).forecast
+    return forecast
+
+
+def compute_projection(context, forecast, rows=None):
+    """
+    Build Sales Demand, receipts and projected EOM inventory matrices.
+
+    Args:
+        context: ModelContext
+        forecast: Unrounded forecast from compute_forecast() for the same rows
+        rows: sku_master row positions (default: all SKUs)
+
+    Returns:
+        Tuple (demand, receipts, projected_eom), each (n_rows x n_months)
+    """
+    sku_rows = context.sku_master if rows is None else context.sku_master.iloc[rows]
+    actuals = context.sales_units if rows is None else context.sales_units[rows]
+
+    # Rounded forecast by SKU row and month, as written to the workbook
+    demand = build_demand_matrix(actuals, np.rint(forecast))
+    receipts = context.receipts.to_dense(rows)
+    projected_eom = project_eom_inventory(
+        sku_rows['AVAILABLE_ON_HAND_QTY'].to_numpy(dtype=float), receipts, demand, context.projection_start
+    )
+    return demand, receipts, projected_eom
+
+
+def run_forecast(context, plan=None, previous_state=None, report=NULL_REPORT, forecaster=None):
+    """
+    Forecast and project every SKU in the context.
+
+    Args:
+        context: ModelContext
+        plan: Optional plan from plan_incremental_run(); only its
+            recompute_rows are calculated and the rest are copied from
+            previous_state
+        previous_state: Run state from load_run_state() matching plan
+        report: RunReport receiving the 'forecast' and 'projection' spans
+        forecaster: Optional StatisticalForecaster (see compute_forecast())
+
+    Returns:
+        ForecastResults
+    """
+    rows = None if plan is None or plan['full'] else plan['recompute_rows']
+    n_rows = len(context.sku_master) if rows is None else len(rows)
+    with report.span('forecast', skus=n_rows):
+        forecast = compute_forecast(context, rows, forecaster=forecaster, report=report)
+
+    with report.span('projection', skus=n_rows) as span:
+        demand, receipts, projected_eom = compute_projection(context, forecast, rows)
+
+        # Carry over results for SKUs whose inputs did not change
+        if rows is not None:
+            forecast = merge_rows(plan, forecast, previous_state['forecast'])
+            demand = merge_rows(plan, demand, previous_state['demand'])
+            receipts = merge_rows(plan, receipts, previous_state['receipts'])
+            projected_eom = merge_rows(plan, projected_eom, previous_state['projected_eom'])
+
+        stockouts = stockout_summary(context.sku_master['SKU'], projected_eom, context.all_months, context.projection_start)
+        results = ForecastResults(forecast, demand, receipts, projected_eom, stockouts)
+        span.count('stockout_skus', int(stockouts['FIRST_STOCKOUT_MONTH'].notna().sum()))
+        span.count('matrix_bytes', results.nbytes)
+    return results
+
+
+def export_workbook(context, results, output_file, mode='fast', verbose=False, report=NULL_REPORT, subtotals=None):
+    """
+    Write every planning category to one workbook.
+
+    Args:
+        context: ModelContext
+        results: ForecastResults from run_forecast()
+        output_file: Path of the xlsx to write
+        mode: Excel writer mode (see EXCEL_WRITER_MODES)
+        verbose: Print progress per category
+        report: RunReport receiving the 'export' span and a 'sheet' span per
+            category
+        subtotals: Optional subtotal blocks per category from
+            hierarchy.category_subtotals(), written below each sheet's SKUs
+
+    Returns:
+        output_file
+    """
+    from .export import add_formats, open_workbook, sku_block_cells, write_category_sheet
+
+    with report.span('export') as export_span:
+        workbook = open_workbook(output_file, mode)
+        formats = add_formats(workbook)
+        sheet_data = results.sheet_data(context, subtotals)
+
+        # Process each planning category
+        for category, positions in context.category_partitions.items():
+            if verbose:
+                print(f"\nProcessing category: {category}")
+
+            category_skus = category_rows(context.sku_master, positions, context.sku_avg_sales)
+
+            if len(category_skus) == 0:
+                continue
+
+            cells = sku_block_cells(len(category_skus), len(context.all_months))
+            with report.span('sheet', label=category, skus=len(category_skus), cells=cells):
+                sheet_name = write_category_sheet(workbook, formats, category, category_skus, mode=mode, **sheet_data)
+            export_span.count('sheets')
+            export_span.count('skus', len(category_skus))
+            export_span.count('cells', cells)
+
+            if verbose:
+                print(f"  - Written {len(category_skus)} SKUs to sheet '{sheet_name}'")
+
+        # Close the workbook
+        with report.span('close_workbook'):
+            workbook.close()
+    return output_file
+
+
+def export_category_workbooks(context, results, output_dir, categories=None, workers=None, mode='fast',
+                              verbose=False, report=NULL_REPORT, subtotals=None):
+    """
+    Write one workbook per planning category (see write_category_workbooks()).
+
+    Args:
+        context: ModelContext
+        results: ForecastResults from run_forecast()
+        output_dir: Directory for the per-category workbooks
+        categories: Categories to write (default: all)
+        workers: Number of worker processes
+        mode: Excel writer mode (see EXCEL_WRITER_MODES)
+        verbose: Print progress per category
+        report: RunReport receiving the 'export' span (worker processes are
+            not instrumented individually)
+        subtotals: Optional subtotal blocks per category (see export_workbook())
+
+    Returns:
+        List of (category, workbook path, SKU count)
+    """
+    from .export import sku_block_cells
+    from .sheets import write_category_workbooks
+
+    partitions = context.category_partitions
+    if categories is not None:
+        partitions = {category: partitions[category] for category in categories}
+    with report.span('export', workers=workers or os.cpu_count()) as span:
+        written = write_category_workbooks(
+            output_dir, partitions, context.sku_master, context.sku_avg_sales, results.sheet_data(context, subtotals),
+            workers=workers, mode=mode,
+        )
+        for category, path, sku_count in written:
+            span.count('sheets')
+            span.count('skus', sku_count)
+            span.count('cells', sku_block_cells(sku_count, len(context.all_months)))
+    if verbose:
+        for category, path, sku_count in written:
+            print(f"  - Written {sku_count} SKUs to '{os.path.basename(path)}'")
+    return written
+
+
+def export_fact_tables(context, results, output_dir, csv_path=None, parquet=True, verbose=False,
+                       report=NULL_REPORT):
+    """
+    Write the long-format SKU x month fact table (see write_fact_tables()).
+
+    Args:
+        context: ModelContext
+        results: ForecastResults from run_forecast()
+        output_dir: Directory of the hive-partitioned Parquet dataset
+        csv_path: Also write the table to this CSV, e.g. facts.DEFAULT_SEED_FILE
+        parquet: Write the Parquet dataset
+        verbose: Print where the table went
+        report: RunReport receiving the 'export_facts' span
+
+    Returns:
+        Dict from write_fact_tables()
+    """
+    from .facts import write_fact_tables
+
+    with report.span('export_facts') as span:
+        written = write_fact_tables(
+            output_dir, context.category_partitions, context.sku_master, results.sheet_data(context),
+            csv_path=csv_path, parquet=parquet,
+        )
+        span.count('rows', written['rows'])
+    if verbose:
+        targets = [path for path in (written['parquet'], written['csv']) if path]
+        print(f"  - Written {written['rows']} fact rows to {', '.join(targets)}")
+    return written
+
+
+def run_model(context, output_file, mode='fast', workers=1, incremental=False, state_dir=None,
+              run_started=None, verbose=False, report=NULL_REPORT, output_format='xlsx', facts_csv=None,
+              forecaster=None, subtotals=False, replenishment=False, lead_times=None, cube=False):
+    """
+    Run the full model: forecast, project and write the Excel output.
+
+    Args:
+        context: ModelContext
+        output_file: Path of the workbook; per-category workbooks go to a
+            directory of the same name without the extension
+        mode: Excel writer mode (see EXCEL_WRITER_MODES)
+        workers: Above 1, write per-category workbooks with that many processes
+        incremental: Only recompute SKUs and category workbooks whose inputs
+            changed since the run saved in state_dir
+        state_dir: Directory for the incremental run state
+        run_started: time.perf_counter() value the run time is measured from
+            (default: now)
+        verbose: Print progress
+        report: RunReport receiving a span per stage
+        output_format: 'xlsx', 'facts' or 'both' (see OUTPUT_FORMATS); the
+            fact table goes to a Parquet dataset named like output_file
+            with a '_facts' suffix
+        facts_csv: Also write the fact table to this CSV (e.g. a dbt seed)
+        forecaster: Optional StatisticalForecaster replacing the ROS forecast
+            for SKUs with enough history
+        subtotals: Write per-collection and category subtotal blocks below
+            the SKUs of every sheet (see hierarchy.category_subtotals())
+        replenishment: Also recommend orders (see recommend_orders()) and
+            write them next to output_file as <name>_po.csv and
+            <name>_po_by_vendor.csv
+        lead_times: Lead time table for the replenishment stage (see
+            replenishment.load_lead_times())
+        cube: Also save the SKU x month arrays as a memory-mapped cube in a
+            directory named like output_file with a '_cube' suffix (see
+            cube.ForecastCube)
+
+    Returns:
+        Dict with output (workbook path, or the fact table directory when
+        only facts are written), facts (see write_fact_tables(), or None),
+        replenishment (ReplenishmentPlan, or None), cube (cube directory, or
+        None), results, plan and run_seconds
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+    run_started = time.perf_counter() if run_started is None else run_started
+    log = print if verbose else (lambda *args, **kwargs: None)
+    sku_master = context.sku_master
+
+    # Incremental mode only recomputes SKUs whose inputs changed since the last run
+    sku_fingerprints = None
+    current_model_fingerprint = None
+    previous_state = None
+    # The plan is only worth a span when incremental mode fingerprints the inputs
+    plan_report = report if incremental else NULL_REPORT
+    with plan_report.span('incremental_plan') as span:
+        if incremental:
+            sku_fingerprints = sku_input_fingerprints(sku_master, context.sku_ros, context.sales_agg, context.on_order_agg)
+            current_model_fingerprint = model_fingerprint(
+                context.curve_data, context.all_months, context.current_date,
+                forecaster.fingerprint if forecaster is not None else None,
+                subtotals=bool(subtotals) and output_format != 'facts',
+            )
+            previous_state = load_run_state(state_dir)
+        plan = plan_incremental_run(
+            previous_state, sku_master['SKU'], sku_master['PLANNING_CATEGORY'], sku_fingerprints,
+            current_model_fingerprint,
+        )
+        span.count('changed_skus', len(plan['changed_skus']))
+    if incremental:
+        if plan['full']:
+            log(f"\nIncremental mode: full rebuild ({plan['reason']})")
+        else:
+            log(f"\nIncremental mode: recomputing {len(plan['recompute_rows'])} of {len(sku_master)} SKUs")
+
+    log("\nBuilding forecast and projecting EOM inventory...")
+    results = run_forecast(context, plan, previous_state, report=report, forecaster=forecaster)
+    log(f"Forecast matrix: {results.forecast.shape[0]} SKUs x {results.forecast.shape[1]} months")
+    if forecaster is not None:
+        stats = forecaster.last_stats
+        throughput = f", {stats['skus_per_second']:.0f} SKUs/s" if stats['skus_per_second'] else ''
+        log(f"Statistical models: {stats['fitted']} fitted in {stats['fit_seconds']:.2f}s{throughput}, "
+            f"{stats['cached']} from cache, {stats['fallback']} on ROS (too little history)")
+    log(f"SKUs projected to stock out: {results.stockouts['FIRST_STOCKOUT_MONTH'].notna().sum()}")
+
+    planning_categories = context.planning_categories
+    log(f"\nFound {len(planning_categories)} planning categories")
+    log(f"Excel writer mode: {mode}")
+
+    facts = None
+    if output_format in ('facts', 'both'):
+        log("\nWriting fact table...")
+        facts = export_fact_tables(
+            context, results, os.path.splitext(output_file)[0] + '_facts', facts_csv, verbose=verbose, report=report
+        )
+
+    replenishment_plan = None
+    if replenishment:
+        from .replenishment import recommend_orders
+
+        replenishment_plan = recommend_orders(context, results, lead_times, report=report)
+        po_base = os.path.splitext(output_file)[0]
+        replenishment_plan.orders.to_csv(f"{po_base}_po.csv", index=False)
+        replenishment_plan.by_vendor.to_csv(f"{po_base}_po_by_vendor.csv", index=False)
+        log(f"\nReplenishment: {len(replenishment_plan.orders)} SKUs to order from "
+            f"{len(replenishment_plan.by_vendor)} vendors ({int(replenishment_plan.orders['EXPEDITE'].sum())} "
+            f"to expedite), written to {os.path.basename(po_base)}_po.csv")
+
+    cube_dir = None
+    if cube:
+        from .cube import write_cube
+
+        cube_dir = write_cube(
+            os.path.splitext(output_file)[0] + '_cube', context, results,
+            params={'forecaster': forecaster.fingerprint if forecaster is not None else 'ros'}, report=report,
+        )
+        log(f"\nForecast cube: {len(sku_master)} SKUs x {len(context.all_months)} months written to "
+            f"{os.path.basename(cube_dir)}/")
+
+    sheet_subtotals = None
+    if subtotals and output_format != 'facts':
+        from .hierarchy import category_subtotals
+
+        with report.span('subtotals'):
+            sheet_subtotals = category_subtotals(context, results)
+
+    if output_format == 'facts':
+        output = facts['parquet']
+    elif incremental or workers > 1:
+        # One workbook per planning category, written by worker processes when workers > 1
+        from .sheets import category_workbook_path
+
+        output = os.path.splitext(output_file)[0]
+        categories_to_write = planning_categories
+        if incremental and not plan['full']:
+            # Only rebuild categories containing changed SKUs (or whose workbook is missing)
+            categories_to_write = [
+                category for category in planning_categories
+                if str(category) in plan['affected_categories']
+                or not os.path.exists(category_workbook_path(output, category))
+            ]
+            # Drop workbooks for categories that no longer have any SKUs
+            for category in set(previous_state['categories']) - {str(category) for category in planning_categories}:
+                stale_path = category_workbook_path(output, category)
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+
+        log(f"\nWriting {len(categories_to_write)} of {len(planning_categories)} category workbooks "
+            f"with {workers} worker(s)...")
+        export_category_workbooks(
+            context, results, output, categories_to_write, workers, mode, verbose, report, sheet_subtotals
+        )
+    else:
+        output = export_workbook(context, results, output_file, mode, verbose, report, sheet_subtotals)
+
+    run_seconds = time.perf_counter() - run_started
+
+    if incremental:
+        # Remember results for the next run, and how long a full rebuild takes
+        full_rebuild_seconds = run_seconds if plan['full'] else previous_state['meta']['full_rebuild_seconds']
+        with report.span('save_state'):
+            save_run_state(
+                state_dir, sku_master['SKU'], sku_master['PLANNING_CATEGORY'], sku_fingerprints,
+                current_model_fingerprint, results.matrices(), full_rebuild_seconds,
+            )
+
+        log(f"\nIncremental run report:")
+        log(f"  - Changed SKUs: {len(plan['changed_skus'])}, removed SKUs: {len(plan['removed_skus'])}")
+        if not plan['full']:
+            for source, count in plan['changed_by_source'].items():
+                log(f"    {source}: {count}")
+        if not plan['full'] and plan['changed_skus']:
+            log(f"  - Changed: {', '.join(map(str, plan['changed_skus'][:20]))}"
+                f"{' ...' if len(plan['changed_skus']) > 20 else ''}")
+        log(f"  - Run time: {run_seconds:.1f}s (last full rebuild: {full_rebuild_seconds:.1f}s)")
+
+    return {
+        'output': output, 'facts': facts, 'replenishment': replenishment_plan, 'cube': cube_dir, 'results': results,
+        'plan': plan, 'run_seconds': run_seconds,
+    }
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from .compact import QUANTITY_DTYPE, UNITS_DTYPE
+from .receipts import ReceiptsStore
+
+
+def month_positions(all_months, current_date):
+    """
+    Locate the current-month boundaries on the month axis.
+
+    Args:
+        all_months: DatetimeIndex of historical + forecast months
+        current_date: Current planning month (datetime)
+
+    Returns:
+        Tuple (projection_start, forecast_start): index of the first month
+        on or after current_date (start of projected EOM) and of the first
+        month strictly after it (start of forecast demand)
+    """
+    projection_start = int(all_months.searchsorted(current_date, side='left'))
+    forecast_start = int(all_months.searchsorted(current_date, side='right'))
+    return projection_start, forecast_start
+
+
+def build_demand_matrix(actuals, forecast_units):
+    """
+    Assemble Sales Demand for every SKU: actual sales up to the current month,
+    rounded forecast afterwards.
+
+    Args:
+        actuals: Units sold per SKU for the months before the first forecast
+            month (n_skus x forecast_start), e.g. rows of ModelContext.sales_units
+        forecast_units: Rounded forecast matrix (n_skus x n_forecast_months)
+
+    Returns:
+        int32 ndarray of shape (n_skus, forecast_start + n_forecast_months)
+    """
+    forecast_start = actuals.shape[1]
+    demand = np.empty((len(actuals), forecast_start + forecast_units.shape[1]), dtype=UNITS_DTYPE)
+    demand[:, :forecast_start] = actuals
+    demand[:, forecast_start:] = forecast_units
+    return demand
+
+
+def build_receipts_matrix(skus, on_order_agg, all_months):
+    """
+    Spread aggregated on-order quantities onto the SKU x month grid.
+
+    Args:
+        skus: SKU identifiers, one per row
+        on_order_agg: DataFrame with SKU, RECEIPT_MONTH and ON_ORDER_QTY columns
+        all_months: DatetimeIndex of historical + forecast months
+
+    Returns:
+        float32 ndarray of shape (n_skus, n_months), zero where nothing is on order
+    """
+    return ReceiptsStore.from_on_order_agg(on_order_agg, skus, all_months).to_dense()
+
+
+def project_eom_inventory(on_hand, receipts, demand, projection_start):
+    """
+    Project EOM inventory for every SKU as a running total of receipts - demand.
+
+    Args:
+        on_hand: Array of current on-hand units, one per SKU
+        receipts: Receipts matrix (n_skus x n_months)
+        demand: Sales Demand matrix (n_skus x n_months)
+        projection_start: Index of the current month in the month axis
+
+    Returns:
+        float32 ndarray of shape (n_skus, n_months); months before the
+        current month are NaN
+    """
+    projected = np.full(demand.shape, np.nan, dtype=QUANTITY_DTYPE)
+    window = projected[:, projection_start:]
+    # Built in place in the float32 window so no float64 temporaries are needed
+    np.subtract(receipts[:, projection_start:], demand[:, projection_start:], out=window, dtype=QUANTITY_DTYPE)
+    np.cumsum(window, axis=1, out=window)
+    window += np.asarray(on_hand, dtype=QUANTITY_DTYPE)[:, None]
+    return projected
+
+
+def stockout_summary(skus, projected, all_months, projection_start):
+    """
+    Summarise projected EOM inventory so at-risk SKUs can be ranked.
+
+    Args:
+        skus: SKU identifiers, one per row
+        projected: Matrix from project_eom_inventory()
+        all_months: DatetimeIndex of historical + forecast months
+        projection_start: Index of the current month in the month axis
+
+    Returns:
+        DataFrame with one row per SKU: MIN_PROJECTED_EOM, FIRST_STOCKOUT_MONTH
+        (NaT when the SKU never goes negative) and STOCKOUT_MONTHS
+    """
+    window = projected[:, projection_start:]
+    stockout = window < 0
+    has_stockout = stockout.any(axis=1)
+    first_col = stockout.argmax(axis=1)
+
+    first_stockout = np.full(len(skus), np.datetime64('NaT'), dtype='datetime64[ns]')
+    first_stockout[has_stockout] = all_months[projection_start:].to_numpy(dtype='datetime64[ns]')[first_col[has_stockout]]
+
+    if window.shape[1] > 0:
+        min_projected = window.min(axis=1)
+    else:
+        min_projected = np.full(len(skus), np.nan)
+
+    return pd.DataFrame({
+        'SKU': np.asarray(skus),
+        'MIN_PROJECTED_EOM': min_projected,
+        'FIRST_STOCKOUT_MONTH': first_stockout,
+        'STOCKOUT_MONTHS': stockout.sum(axis=1),
+    })
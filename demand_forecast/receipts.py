@@ -0,0 +1,250 @@
+"""
+On-order receipts: schema resolution and a sparse SKU x month receipts store.
+
+The on-order extract names its columns freely, so the SKU, quantity and
+receipt date columns are resolved once into an OnOrderSchema. Any of them can
+be named explicitly; the rest are detected from the column names. Receipt
+timing picks which date drives the receipt month:
+
+    'land'  Estimate Land Date Date (default)
+    'ecsd'  Estimate ECSD Date
+
+Aggregated receipts are then held as a ReceiptsStore, a CSR matrix aligned to
+the sku_master rows and the month axis: one row pointer per SKU and a month
+column and quantity per receipt. A SKU's receipts are a slice of the arrays,
+and dense matrices are only built for the rows that are asked for.
+"""
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from .compact import MONTH_OFFSET_DTYPE, QUANTITY_DTYPE, label_codes, month_offsets
+
+# Receipt timing -> keyword identifying its date column
+RECEIPT_TIMINGS = {
+    'land': 'LAND',
+    'ecsd': 'ECSD',
+}
+DEFAULT_RECEIPT_TIMING = 'land'
+
+
+@dataclass(frozen=True)
+class OnOrderSchema:
+    """
+    Columns of the on-order extract used for receipts.
+
+    Columns left as None are detected from the column names by resolve().
+
+    Args:
+        sku: SKU column
+        quantity: Quantity on order
+        date: Receipt date column; overrides timing when given
+        timing: Which date to use when date is detected (see RECEIPT_TIMINGS)
+    """
+
+    sku: str = None
+    quantity: str = None
+    date: str = None
+    timing: str = DEFAULT_RECEIPT_TIMING
+
+    def resolve(self, columns):
+        """
+        Fill in the columns that were not given explicitly.
+
+        Args:
+            columns: Column names of the on-order extract
+
+        Returns:
+            OnOrderSchema with every column set, or None when no SKU, quantity
+            or date column can be found
+
+        Raises:
+            ValueError: The timing is unknown or an explicitly named column is
+                missing
+        """
+        if self.timing not in RECEIPT_TIMINGS:
+            raise ValueError(f"Unknown receipt timing {self.timing!r}, expected one of {tuple(RECEIPT_TIMINGS)}")
+        columns = [str(column) for column in columns]
+        for name in ('sku', 'quantity', 'date'):
+            column = getattr(self, name)
+            if column is not None and column not in columns:
+                raise ValueError(f"On-order {name} column {column!r} not found in {columns}")
+
+        sku = self.sku or _first_matching(columns, ('SKU', 'ITEM', 'PRODUCT'))
+        quantity = self.quantity or _first_matching(columns, ('QTY',)) or _first_matching(
+            columns, ('QUANTITY', 'UNITS', 'ORDER')
+        )
+        dates = [column for column in columns if _matches(column, ('DATE', 'ETA', 'RECEIPT', 'ARRIVAL'))]
+        date = self.date or _first_matching(dates, (RECEIPT_TIMINGS[self.timing],)) or (dates[0] if dates else None)
+        if sku is None or quantity is None or date is None:
+            return None
+        return replace(self, sku=sku, quantity=quantity, date=date)
+
+
+@dataclass(frozen=True)
+class ReceiptsStore:
+    """
+    Receipts per sku_master row and month in compressed sparse row form.
+
+    Row i's receipts are month_cols[indptr[i]:indptr[i + 1]] and the matching
+    quantities, with months sorted and each (row, month) stored once.
+    """
+
+    indptr: np.ndarray
+    month_cols: np.ndarray
+    quantities: np.ndarray
+    n_months: int
+
+    @classmethod
+    def from_records(cls, keys, months, quantities, target_keys, month_axis):
+        """
+        Build the store from a long (key, month, quantity) table.
+
+        Quantities of the same key and month are summed. Duplicate target
+        keys each get the key's receipts; records for keys that are not
+        targets, or months outside month_axis, are dropped.
+
+        Args:
+            keys: SKU of each record
+            months: Receipt month of each record
+            quantities: Quantity of each record (missing counts as 0)
+            target_keys: SKU of each output row (sku_master order)
+            month_axis: DatetimeIndex of consecutive month starts
+
+        Returns:
+            ReceiptsStore with len(target_keys) rows
+        """
+        n_months = len(month_axis)
+        if n_months and len(keys):
+            cols = month_offsets(months, month_axis[0])
+        else:
+            cols = np.zeros(len(keys), dtype=MONTH_OFFSET_DTYPE)
+        return cls.from_columns(keys, cols, quantities, target_keys, n_months)
+
+    @classmethod
+    def from_columns(cls, keys, cols, quantities, target_keys, n_cols):
+        """
+        Build the store from records already placed on a time axis.
+
+        Like from_records(), but with each record's column given directly, so
+        the axis can be anything (e.g. days); month_cols then holds those
+        columns and n_months the axis length.
+
+        Args:
+            keys: SKU of each record
+            cols: Axis column of each record; records outside [0, n_cols) are dropped
+            quantities: Quantity of each record (missing counts as 0)
+            target_keys: SKU of each output row (sku_master order)
+            n_cols: Length of the axis
+
+        Returns:
+            ReceiptsStore with len(target_keys) rows
+        """
+        n_rows = len(target_keys)
+        codes, uniques = label_codes(keys)
+        cols = np.asarray(cols, dtype=np.int64)
+        quantities = np.nan_to_num(np.asarray(quantities, dtype=float))
+        valid = (codes >= 0) & (cols >= 0) & (cols < n_cols)
+
+        # One entry per (key, column), ordered by key then column
+        cells, cell_index = np.unique(codes[valid].astype(np.int64) * n_cols + cols[valid], return_inverse=True)
+        cell_quantities = np.bincount(cell_index, weights=quantities[valid], minlength=len(cells))
+        cell_keys = cells // max(n_cols, 1)
+        # At least one key slot, so rows without a key can index it when there are no records
+        key_indptr = np.searchsorted(cell_keys, np.arange(max(len(uniques), 1) + 1))
+
+        # Each target row takes its key's slice of the entries
+        row_keys = uniques.get_indexer(pd.Index(target_keys))
+        has_key = row_keys >= 0
+        starts = np.where(has_key, key_indptr[np.maximum(row_keys, 0)], 0)
+        lengths = np.where(has_key, key_indptr[np.maximum(row_keys, 0) + 1] - starts, 0)
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        entries = _slice_positions(starts, lengths, indptr)
+
+        return cls(
+            indptr=indptr,
+            month_cols=(cells[entries] % max(n_cols, 1)).astype(MONTH_OFFSET_DTYPE),
+            quantities=cell_quantities[entries].astype(QUANTITY_DTYPE),
+            n_months=n_cols,
+        )
+
+    @classmethod
+    def from_on_order_agg(cls, on_order_agg, target_keys, month_axis):
+        """Build the store from aggregate_on_order() output"""
+        return cls.from_records(
+            on_order_agg['SKU'], on_order_agg['RECEIPT_MONTH'], on_order_agg['ON_ORDER_QTY'], target_keys,
+            month_axis,
+        )
+
+    @property
+    def n_rows(self):
+        return len(self.indptr) - 1
+
+    @property
+    def nnz(self):
+        """Number of stored (row, month) receipts"""
+        return len(self.quantities)
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.month_cols.nbytes + self.quantities.nbytes
+
+    def row(self, position):
+        """Tuple (month_cols, quantities) of one row's receipts, as views into the store"""
+        start, end = self.indptr[position], self.indptr[position + 1]
+        return self.month_cols[start:end], self.quantities[start:end]
+
+    def to_coo(self, rows=None):
+        """
+        Coordinate form of the receipts of some rows.
+
+        Args:
+            rows: Row positions (default: all rows); output rows are numbered
+                in this order
+
+        Returns:
+            Tuple (row_index, month_cols, quantities)
+        """
+        if rows is None:
+            lengths = np.diff(self.indptr)
+            return np.repeat(np.arange(self.n_rows), lengths), self.month_cols, self.quantities
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        entries = _slice_positions(starts, lengths, indptr)
+        return np.repeat(np.arange(len(rows)), lengths), self.month_cols[entries], self.quantities[entries]
+
+    def to_dense(self, rows=None):
+        """
+        Dense receipts matrix.
+
+        Args:
+            rows: Row positions (default: all rows)
+
+        Returns:
+            float32 ndarray of shape (n_rows, n_months), zero where nothing
+            is received
+        """
+        n_rows = self.n_rows if rows is None else len(rows)
+        dense = np.zeros((n_rows, self.n_months), dtype=QUANTITY_DTYPE)
+        row_index, month_cols, quantities = self.to_coo(rows)
+        dense[row_index, month_cols] = quantities
+        return dense
+
+
+def _matches(column, keywords):
+    return any(keyword in column.upper() for keyword in keywords)
+
+
+def _first_matching(columns, keywords):
+    return next((column for column in columns if _matches(column, keywords)), None)
+
+
+def _slice_positions(starts, lengths, indptr):
+    """Concatenated positions of the slices [start, start + length) laid out at indptr"""
+    total = int(indptr[-1])
+    return np.arange(total, dtype=np.int64) - np.repeat(indptr[:-1] - starts, lengths)
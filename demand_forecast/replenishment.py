@@ -0,0 +1,320 @@
+"""
+Replenishment recommendations from the projected EOM inventory.
+
+For every SKU at once, the projection from run_forecast() is scanned for
+the first month its projected EOM inventory falls below a safety stock
+target. A new order placed now lands lead_time months out (the
+TOTAL_LEAD_TIME days of data/cz_catalog_data.csv, rounded up to months),
+so it arrives in the later of that month and the first short month, and
+must lift the projected EOM back to safety stock for review_months
+months from there:
+
+    safety stock  z(service_level) x sigma x sqrt(lead months + review months)
+                  with sigma the standard deviation of monthly sales over
+                  the last history_months complete months
+    order qty     safety stock - lowest projected EOM over the review
+                  window, rounded up to whole units and to the MOQ
+    order by      arrival month - lead months (the current date when
+                  that is already past; such orders are flagged EXPEDITE)
+
+MTO and dropship SKUs are not replenished. The result is a PO suggestion
+table with one row per SKU to order, and the same totalled by vendor:
+
+    plan = recommend_orders(context, results, load_lead_times())
+    plan.orders
+    plan.by_vendor
+
+    python -m demand_forecast.replenishment --service-level 0.95 --output po
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .forecast import DAYS_PER_MONTH
+from .hierarchy import HierarchyIndex
+from .instrumentation import NULL_REPORT
+from .loaders import CLEANING_VERSIONS, read_lead_times
+
+# Extended catalog with TOTAL_LEAD_TIME, PRODUCTION_TIME, TRANSIT_TIME (days) and ITEM_MOQS per SKU
+DEFAULT_LEAD_TIME_FILE = os.path.join('data', 'cz_catalog_data.csv')
+
+DEFAULT_SERVICE_LEVEL = 0.95
+DEFAULT_REVIEW_MONTHS = 1
+DEFAULT_HISTORY_MONTHS = 12
+# Lead time of SKUs without one in the lead time table (days)
+DEFAULT_LEAD_TIME_DAYS = 120
+
+ORDER_COLUMNS = [
+    'VENDOR_NAME', 'SKU', 'PLANNING_CATEGORY', 'ORDER_BY_DATE', 'ARRIVAL_MONTH', 'LEAD_TIME_DAYS',
+    'SAFETY_STOCK', 'ORDER_QTY', 'MOQ', 'UNIT_COST_USD', 'ORDER_COST_USD', 'EXPEDITE',
+]
+VENDOR_COLUMNS = ['VENDOR_NAME', 'FIRST_ORDER_BY_DATE', 'SKUS', 'ORDER_QTY', 'ORDER_COST_USD', 'EXPEDITE_SKUS']
+
+
+@dataclass
+class ReplenishmentPlan:
+    """
+    Outcome of recommend_orders().
+
+    order_qty, safety_stock and order_by_col have one entry per sku_master
+    row; order_by_col is the all_months column the order must be placed in
+    (-1 when nothing is ordered). orders and by_vendor are the PO suggestion
+    tables.
+    """
+
+    order_qty: np.ndarray
+    safety_stock: np.ndarray
+    order_by_col: np.ndarray
+    orders: pd.DataFrame
+    by_vendor: pd.DataFrame
+    seconds: float
+
+
+def recommend_orders(context, results, lead_times=None, service_level=DEFAULT_SERVICE_LEVEL,
+                     review_months=DEFAULT_REVIEW_MONTHS, history_months=DEFAULT_HISTORY_MONTHS,
+                     default_lead_time_days=DEFAULT_LEAD_TIME_DAYS, moq_multiple=False, report=NULL_REPORT):
+    """
+    Recommend an order quantity and order-by date for every SKU.
+
+    Args:
+        context: ModelContext
+        results: ForecastResults from run_forecast()
+        lead_times: Table from read_lead_times() (default: lead time, MOQ and
+            cost columns of sku_master where present)
+        service_level: Probability of not stocking out during lead time and
+            review, between 0.5 and 1
+        review_months: Months each order has to cover after it arrives
+        history_months: Complete months of sales the demand deviation is
+            taken from
+        default_lead_time_days: Lead time of SKUs without one
+        moq_multiple: Round order quantities up to a multiple of the MOQ
+            rather than just up to the MOQ
+        report: RunReport receiving the 'replenishment' span
+
+    Returns:
+        ReplenishmentPlan
+
+    Raises:
+        ValueError: Invalid service level or review months, or the context
+            has no months to project
+    """
+    if not 0.5 <= service_level < 1:
+        raise ValueError(f"service_level must be in [0.5, 1), got {service_level}")
+    if review_months < 1:
+        raise ValueError(f"review_months must be at least 1, got {review_months}")
+    sku_master = context.sku_master
+    start = context.projection_start
+    horizon = len(context.all_months) - start
+    if horizon <= 0:
+        raise ValueError("No months to project: the current month is after the forecast end")
+
+    started = time.perf_counter()
+    with report.span('replenishment', skus=len(sku_master)) as span:
+        params = sku_parameters(sku_master, lead_times, default_lead_time_days)
+        lead_days = params['LEAD_TIME_DAYS'].to_numpy()
+        lead_months = np.ceil(lead_days / DAYS_PER_MONTH).astype(np.int64)
+
+        # Safety stock from the spread of recent monthly sales over lead time + review
+        history = context.sales_units[:, max(0, start - history_months):start]
+        sigma = history.std(axis=1) if history.shape[1] else np.zeros(len(sku_master))
+        z = NormalDist().inv_cdf(service_level)
+        safety_stock = np.ceil(z * sigma * np.sqrt(lead_months + review_months))
+
+        # First month below safety stock, and when an order placed now can land
+        window = results.projected_eom[:, start:]
+        below = window < safety_stock[:, None]
+        has_shortfall = below.any(axis=1)
+        first_short = below.argmax(axis=1)
+        arrival = np.maximum(first_short, lead_months)
+        ordering = has_shortfall & params['REPLENISHED'].to_numpy() & (arrival < horizon)
+
+        # Lift the lowest projected EOM of the review window back to safety stock
+        review = np.minimum(arrival[:, None] + np.arange(review_months)[None, :], horizon - 1)
+        lowest = np.take_along_axis(window, review, axis=1).min(axis=1)
+        order_qty = np.where(ordering, np.ceil(np.maximum(safety_stock - lowest, 0)), 0)
+        moq = params['MOQ'].to_numpy()
+        if moq_multiple:
+            order_qty = np.where(moq > 0, np.ceil(order_qty / np.where(moq > 0, moq, 1)) * moq, order_qty)
+        order_qty = np.where(order_qty > 0, np.maximum(order_qty, moq), 0)
+
+        ordered = order_qty > 0
+        order_by_col = np.where(ordered, start + arrival - lead_months, -1)
+        expedite = ordered & (first_short < lead_months)
+        span.count('ordered_skus', int(ordered.sum()))
+        span.count('expedite_skus', int(expedite.sum()))
+
+        orders, by_vendor = _po_tables(
+            context, params, ordered, order_qty, safety_stock, order_by_col, start + arrival, expedite,
+        )
+    return ReplenishmentPlan(
+        order_qty=order_qty,
+        safety_stock=safety_stock,
+        order_by_col=order_by_col.astype(np.int16),
+        orders=orders,
+        by_vendor=by_vendor,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def sku_parameters(sku_master, lead_times=None, default_lead_time_days=DEFAULT_LEAD_TIME_DAYS):
+    """
+    Lead time, MOQ, unit cost and replenishment flag per sku_master row.
+
+    Values come from lead_times where it has the SKU and the column, and
+    from sku_master otherwise. A missing TOTAL_LEAD_TIME is PRODUCTION_TIME +
+    TRANSIT_TIME when both are known, else default_lead_time_days.
+
+    Returns:
+        DataFrame aligned to sku_master with LEAD_TIME_DAYS, MOQ,
+        UNIT_COST_USD and REPLENISHED (False for MTO and dropship SKUs)
+    """
+    n_skus = len(sku_master)
+    if lead_times is not None and len(lead_times):
+        # First row per SKU, so duplicated SKUs in either table are safe
+        first_rows = pd.Series(np.arange(len(lead_times)), index=lead_times['SKU'].astype(str))
+        first_rows = first_rows[~first_rows.index.duplicated()]
+        positions = sku_master['SKU'].astype(str).map(first_rows).to_numpy()
+    else:
+        lead_times, positions = None, np.full(n_skus, np.nan)
+    matched = ~np.isnan(positions)
+    positions = np.where(matched, positions, 0).astype(np.int64)
+
+    def column(name, parse=None):
+        values = pd.Series(np.nan, index=range(n_skus), dtype=object)
+        if name in sku_master.columns:
+            values = pd.Series(sku_master[name].to_numpy(dtype=object))
+        if lead_times is not None and name in lead_times.columns:
+            from_table = pd.Series(lead_times[name].to_numpy(dtype=object)[positions])
+            values = from_table.where(matched & from_table.notna().to_numpy(), values)
+        return values.map(parse) if parse else values
+
+    def number(value):
+        return pd.to_numeric(value, errors='coerce')
+
+    lead_days = column('TOTAL_LEAD_TIME', number).astype(float)
+    components = column('PRODUCTION_TIME', number).astype(float) + column('TRANSIT_TIME', number).astype(float)
+    lead_days = lead_days.where(lead_days > 0, components).where(lambda days: days > 0, default_lead_time_days)
+    not_replenished = column('IS_MTO').map(_is_true) | column('IS_DROPSHIP').map(_is_true)
+    return pd.DataFrame({
+        'LEAD_TIME_DAYS': lead_days.to_numpy(),
+        'MOQ': column('ITEM_MOQS', parse_moq).astype(float).to_numpy(),
+        'UNIT_COST_USD': column('VENDOR_COST_USD', number).astype(float).fillna(0).to_numpy(),
+        'REPLENISHED': ~not_replenished.to_numpy(dtype=bool),
+    })
+
+
+def parse_moq(value):
+    """MOQ in units: numbers as they are, text like '100 UNITS, 50 UNITS' by its first quantity, else 0"""
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value) if value == value and value > 0 else 0.0
+    match = re.search(r'\d+(?:\.\d+)?', str(value)) if value is not None else None
+    return float(match.group()) if match else 0.0
+
+
+def load_lead_times(path=DEFAULT_LEAD_TIME_FILE, cache=None):
+    """
+    Read the lead time table, or None when the file does not exist.
+
+    Args:
+        path: Extended catalog CSV
+        cache: InputCache for the cleaned table (default: no caching)
+    """
+    if not os.path.exists(path):
+        return None
+    if cache is None:
+        return read_lead_times(path)
+    return cache.load('lead_times', path, read_lead_times, CLEANING_VERSIONS['lead_times'])
+
+
+def _po_tables(context, params, ordered, order_qty, safety_stock, order_by_col, arrival_col, expedite):
+    """The per-SKU order table and its vendor totals"""
+    sku_master = context.sku_master
+    all_months = context.all_months
+    order_cost = order_qty * params['UNIT_COST_USD'].to_numpy()
+    vendors = HierarchyIndex.from_sku_master(sku_master, ('VENDOR_NAME',))['VENDOR_NAME']
+
+    # Orders due this month are due now rather than on the 1st
+    month_dates = pd.DatetimeIndex(all_months).to_numpy().copy()
+    month_dates[context.projection_start] = np.datetime64(pd.Timestamp(context.current_date))
+    rows = np.flatnonzero(ordered)
+    orders = pd.DataFrame({
+        'VENDOR_NAME': np.asarray(vendors.labels, dtype=object)[vendors.codes[rows]],
+        'SKU': sku_master['SKU'].to_numpy(dtype=object)[rows],
+        'PLANNING_CATEGORY': sku_master['PLANNING_CATEGORY'].to_numpy(dtype=object)[rows],
+        'ORDER_BY_DATE': month_dates[order_by_col[rows]],
+        'ARRIVAL_MONTH': all_months[arrival_col[rows]],
+        'LEAD_TIME_DAYS': params['LEAD_TIME_DAYS'].to_numpy()[rows],
+        'SAFETY_STOCK': safety_stock[rows],
+        'ORDER_QTY': order_qty[rows],
+        'MOQ': params['MOQ'].to_numpy()[rows],
+        'UNIT_COST_USD': params['UNIT_COST_USD'].to_numpy()[rows],
+        'ORDER_COST_USD': order_cost[rows],
+        'EXPEDITE': expedite[rows],
+    }, columns=ORDER_COLUMNS)
+    orders = orders.sort_values(['VENDOR_NAME', 'ORDER_BY_DATE', 'SKU'], kind='stable').reset_index(drop=True)
+
+    # Vendor totals are sparse rollups of the per-SKU vectors
+    first_order_by = np.full(vendors.n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(first_order_by, vendors.codes[rows], order_by_col[rows])
+    totals = vendors.rollup(np.column_stack([ordered, order_qty, order_cost, expedite]).astype(float))
+    has_orders = totals[:, 0] > 0
+    by_vendor = pd.DataFrame({
+        'VENDOR_NAME': np.asarray(vendors.labels, dtype=object)[has_orders],
+        'FIRST_ORDER_BY_DATE': month_dates[first_order_by[has_orders]],
+        'SKUS': totals[has_orders, 0].astype(int),
+        'ORDER_QTY': totals[has_orders, 1],
+        'ORDER_COST_USD': totals[has_orders, 2],
+        'EXPEDITE_SKUS': totals[has_orders, 3].astype(int),
+    }, columns=VENDOR_COLUMNS)
+    by_vendor = by_vendor.sort_values(['FIRST_ORDER_BY_DATE', 'ORDER_COST_USD'], ascending=[True, False], kind='stable')
+    return orders, by_vendor.reset_index(drop=True)
+
+
+def _is_true(value):
+    if isinstance(value, str):
+        return value.strip().upper() in ('TRUE', 'T', 'Y', 'YES', '1')
+    return bool(value) if value == value else False
+
+
+def main(argv=None):
+    from .cache import InputCache
+    from .context import REPO_ROOT, input_paths, load_context
+    from .pipeline import run_forecast
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-path', default=REPO_ROOT, help='Directory holding the input files')
+    parser.add_argument('--lead-times', help=f"Lead time table (default: {DEFAULT_LEAD_TIME_FILE})")
+    parser.add_argument('--service-level', type=float, default=DEFAULT_SERVICE_LEVEL)
+    parser.add_argument('--review-months', type=int, default=DEFAULT_REVIEW_MONTHS)
+    parser.add_argument('--moq-multiple', action='store_true', help='Round orders up to a multiple of the MOQ')
+    parser.add_argument('--output', help='Write <output>_orders.csv and <output>_by_vendor.csv')
+    args = parser.parse_args(argv)
+
+    cache = InputCache(os.path.join(args.base_path, '.cache', 'inputs'))
+    context = load_context(input_paths(args.base_path), cache=cache)
+    results = run_forecast(context)
+    lead_times = load_lead_times(args.lead_times or os.path.join(args.base_path, DEFAULT_LEAD_TIME_FILE), cache)
+    plan = recommend_orders(
+        context, results, lead_times, args.service_level, args.review_months, moq_multiple=args.moq_multiple,
+    )
+    print(f"Replenishment for {len(context.sku_master)} SKUs: {len(plan.orders)} orders, "
+          f"{int(plan.orders['EXPEDITE'].sum())} to expedite, "
+          f"${plan.orders['ORDER_COST_USD'].sum():,.0f} at cost ({plan.seconds:.2f}s)\n")
+    print(plan.by_vendor.head(20).to_string(index=False))
+
+    if args.output:
+        plan.orders.to_csv(f"{args.output}_orders.csv", index=False)
+        plan.by_vendor.to_csv(f"{args.output}_by_vendor.csv", index=False)
+        print(f"\nTables written to {args.output}_*.csv")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Batched what-if scenarios.
+
+A scenario changes the forecast inputs by category: ROS multipliers, an
+alternate sales curve, or receipts arriving some months late. Every scenario
+is evaluated in one pass over a (scenario x SKU x month) array covering the
+current month through the forecast end, processed in blocks of SKUs so
+memory stays bounded:
+
+    scenarios = [
+        Scenario('base'),
+        Scenario('bedding +10%', ros_multipliers={'BEDDING': 1.1}),
+        Scenario('rugs on bedding curve', curves={'RUGS': 'BEDDING'}),
+        Scenario('receipts 2 months late', receipt_delays={'*': 2}),
+    ]
+    outcome = run_scenarios(context, scenarios)
+    outcome.summary          # stockouts and ending inventory per scenario
+    outcome.categories       # the same per scenario and planning category
+
+Category keys are a planning category ('BEDDING - DUVETS'), a curve category
+('BEDDING', matching every planning category on that curve) or '*' for every
+SKU; the most specific key wins. A scenario with no changes reproduces the
+projection of run_forecast() exactly.
+
+Scenarios can also be run from a JSON list of scenario dicts:
+
+    python -m demand_forecast.scenarios scenarios.json --output scenario_results
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .compact import QUANTITY_DTYPE, label_codes
+from .forecast import DAYS_PER_MONTH, build_curve_matrix, curve_adjustments, get_curve_category
+from .instrumentation import NULL_REPORT
+
+# Category key matching every SKU
+ALL_SKUS = '*'
+
+# SKUs per block; each block holds a few (n_scenarios x block x months) arrays
+DEFAULT_BLOCK_SKUS = 10_000
+
+SUMMARY_COLUMNS = ['SCENARIO', 'SKUS', 'STOCKOUT_SKUS', 'ENDING_INVENTORY', 'FORECAST_UNITS', 'RECEIPT_UNITS']
+CATEGORY_COLUMNS = ['SCENARIO', 'PLANNING_CATEGORY'] + SUMMARY_COLUMNS[1:]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    One what-if scenario.
+
+    Args:
+        name: Scenario name used in the results
+        ros_multipliers: Category key -> factor applied to the daily ROS
+        curves: Category key -> alternate curve, either the name of a curve
+            category in the curve data or 12 monthly shares of annual sales
+            (January first, as in the curve file)
+        receipt_delays: Category key -> whole months every receipt arrives late
+            (negative brings receipts forward)
+    """
+
+    name: str
+    ros_multipliers: dict = field(default_factory=dict)
+    curves: dict = field(default_factory=dict)
+    receipt_delays: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Scenario from a dict with the same keys (e.g. parsed JSON)"""
+        unknown = set(data) - {'name', 'ros_multipliers', 'curves', 'receipt_delays'}
+        if unknown:
+            raise ValueError(f"Unknown scenario keys: {sorted(unknown)}")
+        return cls(
+            name=data['name'],
+            ros_multipliers=dict(data.get('ros_multipliers', {})),
+            curves=dict(data.get('curves', {})),
+            receipt_delays=dict(data.get('receipt_delays', {})),
+        )
+
+
+@dataclass
+class ScenarioResults:
+    """
+    Outcome of run_scenarios().
+
+    summary and categories hold one row per scenario (and planning
+    category) with the SKU count, SKUs projected to stock out, ending
+    inventory in the last forecast month, forecast units and receipt units
+    over the projection window. first_stockout_col has one row per scenario
+    and one column per sku_master row: the all_months column of the first
+    negative projected EOM, or -1 when the SKU never stocks out.
+    """
+
+    scenarios: list
+    summary: pd.DataFrame
+    categories: pd.DataFrame
+    first_stockout_col: np.ndarray
+
+
+def run_scenarios(context, scenarios, block_skus=DEFAULT_BLOCK_SKUS, report=NULL_REPORT):
+    """
+    Evaluate scenarios side by side.
+
+    Args:
+        context: ModelContext
+        scenarios: Sequence of Scenario
+        block_skus: SKUs evaluated per block
+        report: RunReport receiving the 'scenarios' span
+
+    Returns:
+        ScenarioResults
+
+    Raises:
+        ValueError: A scenario names an unknown curve or a malformed value,
+            or the context has no months to project
+    """
+    scenarios = list(scenarios)
+    sku_master = context.sku_master
+    n_scenarios, n_skus = len(scenarios), len(sku_master)
+    projection_start, forecast_start = context.projection_start, context.forecast_start
+    n_months = len(context.all_months)
+    window = n_months - projection_start
+    if window <= 0:
+        raise ValueError("No months to project: the current month is after the forecast end")
+
+    # Scenario parameters per planning category; group 0 holds SKUs without a category
+    codes, categories = label_codes(sku_master['PLANNING_CATEGORY'])
+    groups = codes + 1
+    ros_multipliers, curves, delays = _scenario_tables(scenarios, categories, context.curve_data)
+    curves = curves[:, :, [month.month - 1 for month in context.forecast_months]]
+    n_actual = forecast_start - projection_start
+
+    on_hand = sku_master['AVAILABLE_ON_HAND_QTY'].to_numpy(dtype=QUANTITY_DTYPE)
+    n_groups = len(categories) + 1
+    totals = {
+        name: np.zeros(n_scenarios * n_groups)
+        for name in ('STOCKOUT_SKUS', 'ENDING_INVENTORY', 'FORECAST_UNITS', 'RECEIPT_UNITS')
+    }
+    first_stockout_col = np.full((n_scenarios, n_skus), -1, dtype=np.int16)
+    scenario_offsets = (np.arange(n_scenarios) * n_groups)[:, None]
+
+    with report.span('scenarios', scenarios=n_scenarios, skus=n_skus) as span:
+        for start in range(0, n_skus, block_skus):
+            rows = np.arange(start, min(start + block_skus, n_skus))
+            block_groups = groups[rows]
+
+            # Forecast units as in forecast_matrix(), with each scenario's ROS and curve
+            base_units = context.sku_ros[rows][None, :] * ros_multipliers[:, block_groups] * DAYS_PER_MONTH
+            forecast_units = curves[:, block_groups]
+            forecast_units *= base_units[:, :, None]
+            np.rint(forecast_units, out=forecast_units)
+
+            # Running total of receipts - demand, built in place as in project_eom_inventory()
+            projected = np.empty((n_scenarios, len(rows), window), dtype=QUANTITY_DTYPE)
+            projected[:, :, :n_actual] = -context.sales_units[rows, projection_start:forecast_start]
+            np.negative(forecast_units, out=projected[:, :, n_actual:], casting='same_kind')
+            receipt_units = _add_receipts(projected, context.receipts, rows, delays[:, block_groups], projection_start)
+            np.cumsum(projected, axis=2, out=projected)
+            projected += on_hand[rows][None, :, None]
+
+            stockout = projected < 0
+            has_stockout = stockout.any(axis=2)
+            first_stockout_col[:, rows] = np.where(has_stockout, stockout.argmax(axis=2) + projection_start, -1)
+
+            # Roll the block up by scenario and planning category
+            bins = (scenario_offsets + block_groups[None, :]).ravel()
+            for name, values in (
+                ('STOCKOUT_SKUS', has_stockout),
+                ('ENDING_INVENTORY', projected[:, :, -1]),
+                ('FORECAST_UNITS', forecast_units.sum(axis=2)),
+                ('RECEIPT_UNITS', receipt_units),
+            ):
+                totals[name] += np.bincount(bins, weights=values.ravel(), minlength=len(totals[name]))
+        span.count('cells', n_scenarios * n_skus * window)
+
+    group_skus = np.bincount(groups, minlength=n_groups)
+    names = np.array([scenario.name for scenario in scenarios], dtype=object)
+    per_group = pd.DataFrame({
+        'SCENARIO': np.repeat(names, n_groups),
+        'PLANNING_CATEGORY': np.tile(np.array([None] + list(categories), dtype=object), n_scenarios),
+        'SKUS': np.tile(group_skus, n_scenarios),
+        **totals,
+    }, columns=CATEGORY_COLUMNS)
+    summary = pd.DataFrame({
+        'SCENARIO': names,
+        'SKUS': n_skus,
+        **{name: values.reshape(n_scenarios, n_groups).sum(axis=1) for name, values in totals.items()},
+    }, columns=SUMMARY_COLUMNS)
+    for table in (per_group, summary):
+        table['STOCKOUT_SKUS'] = table['STOCKOUT_SKUS'].astype(int)
+
+    categories_table = per_group[per_group['SKUS'] > 0].reset_index(drop=True)
+    return ScenarioResults(scenarios, summary, categories_table, first_stockout_col)
+
+
+def _scenario_tables(scenarios, categories, curve_data):
+    """
+    Per-scenario parameters for each category group.
+
+    Returns:
+        Tuple (ros_multipliers, curves, delays) of shapes (n_scenarios x
+        n_groups), (n_scenarios x n_groups x 12) and (n_scenarios x n_groups),
+        where group 0 is SKUs without a planning category
+    """
+    adjustments = curve_adjustments(curve_data)
+    labels = [None] + list(categories)
+    # Keys each group answers to, most specific first
+    group_keys = [
+        [label, get_curve_category(label) if isinstance(label, str) else None, ALL_SKUS] for label in labels
+    ]
+    base_curves = np.vstack([np.ones((1, 12)), build_curve_matrix(pd.Series(list(categories), dtype=object), curve_data)])
+
+    n_scenarios, n_groups = len(scenarios), len(labels)
+    ros_multipliers = np.ones((n_scenarios, n_groups))
+    curves = np.broadcast_to(base_curves, (n_scenarios, n_groups, 12)).copy()
+    delays = np.zeros((n_scenarios, n_groups), dtype=np.int64)
+    for s, scenario in enumerate(scenarios):
+        for group, keys in enumerate(group_keys):
+            key = _matching_key(scenario.ros_multipliers, keys)
+            if key is not None:
+                ros_multipliers[s, group] = float(scenario.ros_multipliers[key])
+            key = _matching_key(scenario.curves, keys)
+            if key is not None:
+                curves[s, group] = _curve_values(scenario.curves[key], adjustments, scenario.name)
+            key = _matching_key(scenario.receipt_delays, keys)
+            if key is not None:
+                delays[s, group] = int(scenario.receipt_delays[key])
+    return ros_multipliers, curves, delays
+
+
+def _matching_key(rules, keys):
+    return next((key for key in keys if key is not None and key in rules), None)
+
+
+def _curve_values(curve, adjustments, scenario_name):
+    """Curve adjustments (12 values, January first) for a curve name or 12 monthly shares"""
+    if isinstance(curve, str):
+        if curve not in adjustments.index:
+            raise ValueError(f"Scenario {scenario_name!r}: unknown curve {curve!r}, expected one of "
+                             f"{list(adjustments.index)}")
+        return adjustments.loc[curve].to_numpy(dtype=float)
+    values = np.asarray(curve, dtype=float)
+    if values.shape != (12,):
+        raise ValueError(f"Scenario {scenario_name!r}: a curve needs 12 monthly values, got {values.shape}")
+    return values * 12
+
+
+def _add_receipts(projected, receipts, rows, delays, projection_start):
+    """
+    Add each scenario's receipts for a block of SKUs into projected.
+
+    Args:
+        projected: (n_scenarios x n_rows x window) array starting at projection_start
+        receipts: ReceiptsStore of the context
+        rows: sku_master rows of the block
+        delays: Months late per scenario and block row (n_scenarios x n_rows);
+            receipts pushed past the last month drop out
+        projection_start: all_months column of projected's first month
+
+    Returns:
+        Receipt units per scenario and block row that land in the window
+    """
+    n_scenarios, n_rows, window = projected.shape
+    row_index, month_cols, quantities = receipts.to_coo(rows)
+    # Receipts due before the window are not projected, so delays cannot pull them into it
+    due = month_cols >= projection_start
+    row_index, month_cols, quantities = row_index[due], month_cols[due], quantities[due]
+    # Negative delays bring receipts forward, no earlier than the current month
+    cols = np.maximum(month_cols[None, :].astype(np.int64) + delays[:, row_index] - projection_start, 0)
+    landed = cols < window
+    scenario_index = np.broadcast_to(np.arange(n_scenarios)[:, None], cols.shape)
+    row_index = np.broadcast_to(row_index, cols.shape)
+    quantities = np.broadcast_to(quantities, cols.shape)
+    np.add.at(projected, (scenario_index[landed], row_index[landed], cols[landed]), quantities[landed])
+
+    received = np.zeros(n_scenarios * n_rows)
+    np.add.at(received, scenario_index[landed] * n_rows + row_index[landed], quantities[landed])
+    return received.reshape(n_scenarios, n_rows)
+
+
+def main(argv=None):
+    from .cache import InputCache
+    from .context import REPO_ROOT, input_paths, load_context
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', help='JSON file with a list of scenario objects')
+    parser.add_argument('--base-path', default=REPO_ROOT, help='Directory holding the input files')
+    parser.add_argument('--output', help='Write <output>_summary.csv and <output>_categories.csv')
+    parser.add_argument('--block-skus', type=int, default=DEFAULT_BLOCK_SKUS, help='SKUs per block')
+    args = parser.parse_args(argv)
+
+    with open(args.scenarios) as f:
+        scenarios = [Scenario.from_dict(data) for data in json.load(f)]
+
+    context = load_context(input_paths(args.base_path), cache=InputCache(os.path.join(args.base_path, '.cache', 'inputs')))
+    started = time.perf_counter()
+    outcome = run_scenarios(context, scenarios, block_skus=args.block_skus)
+    print(f"{len(scenarios)} scenarios x {len(context.sku_master)} SKUs in {time.perf_counter() - started:.2f}s\n")
+    print(outcome.summary.to_string(index=False))
+
+    if args.output:
+        outcome.summary.to_csv(f"{args.output}_summary.csv", index=False)
+        outcome.categories.to_csv(f"{args.output}_categories.csv", index=False)
+        print(f"\nResults written to {args.output}_summary.csv and {args.output}_categories.csv")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""
+Local forecast query service.
+
+Loads the model inputs once, precomputes the forecast and projection matrices
+and answers per-SKU queries from memory over HTTP (standard library asyncio,
+no extra dependencies):
+
+    GET  /health                       Snapshot status
+    GET  /skus/index                   Every SKU the snapshot can answer for
+    GET  /sku/<SKU>?from=YYYY-MM&through=YYYY-MM
+    POST /skus    {"skus": [...], "from": "YYYY-MM", "through": "YYYY-MM"}
+    POST /reload                       Reload inputs and swap in a new snapshot
+
+Run with ``python -m demand_forecast.service`` and load-test with
+``python -m demand_forecast.service_client``.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from .cache import InputCache
+from .context import REPO_ROOT, input_paths, load_context
+from .pipeline import run_forecast
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Largest request body accepted (batch queries)
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error'}
+
+
+class ForecastSnapshot:
+    """Immutable view of one model run, shared by every request that started while it was current"""
+
+    def __init__(self, context, results, loaded_seconds, generation):
+        self.context = context
+        self.results = results
+        self.generation = generation
+        self.loaded_at = pd.Timestamp.now().isoformat(timespec='seconds')
+        self.loaded_seconds = loaded_seconds
+        self.month_labels = [month.strftime('%Y-%m') for month in context.all_months]
+        self.is_forecast = [bool(month > context.current_date) for month in context.all_months]
+        self.month_cols = {label: idx for idx, label in enumerate(self.month_labels)}
+
+        # SKU -> sku_master row (first row wins if a SKU is duplicated)
+        skus = context.sku_master['SKU'].astype(str).tolist()
+        self.rows = {}
+        for row, sku in enumerate(skus):
+            self.rows.setdefault(sku, row)
+        self.planning_categories = context.sku_master['PLANNING_CATEGORY'].astype(str).tolist()
+
+        stockouts = results.stockouts
+        self.min_projected = stockouts['MIN_PROJECTED_EOM'].tolist()
+        self.first_stockout = [
+            None if pd.isna(month) else month.strftime('%Y-%m') for month in stockouts['FIRST_STOCKOUT_MONTH']
+        ]
+
+    def month_range(self, start=None, through=None):
+        """Column slice for a YYYY-MM range (default: current month through the forecast end)"""
+        first = self.context.projection_start if start is None else self._month_col(start)
+        last = len(self.month_labels) - 1 if through is None else self._month_col(through)
+        if last < first:
+            raise ValueError(f"'through' ({through}) is before 'from' ({start})")
+        return slice(first, last + 1)
+
+    def sku_record(self, sku, months):
+        """Forecast, receipts and projected EOM for one SKU, or None if unknown"""
+        row = self.rows.get(sku)
+        if row is None:
+            return None
+        results = self.results
+        return {
+            'sku': sku,
+            'planning_category': self.planning_categories[row],
+            'months': self.month_labels[months],
+            'is_forecast': self.is_forecast[months],
+            'demand': _json_numbers(results.demand[row, months]),
+            'receipts': _json_numbers(results.receipts[row, months]),
+            'projected_eom': _json_numbers(results.projected_eom[row, months]),
+            'min_projected_eom': _json_number(self.min_projected[row]),
+            'first_stockout_month': self.first_stockout[row],
+        }
+
+    def _month_col(self, label):
+        label = str(label)[:7]
+        if label not in self.month_cols:
+            raise ValueError(f"Month {label!r} is outside {self.month_labels[0]}..{self.month_labels[-1]}")
+        return self.month_cols[label]
+
+
+class ForecastService:
+    """
+    Holds the current ForecastSnapshot and answers queries against it.
+
+    Reloads build a new snapshot in a worker thread and replace the reference
+    in one assignment, so in-flight requests finish against the snapshot they
+    started with and no request ever sees a half-loaded model.
+    """
+
+    def __init__(self, load_snapshot_context):
+        """
+        Args:
+            load_snapshot_context: Function returning a fresh ModelContext
+        """
+        self._load_context = load_snapshot_context
+        self._reload_lock = None
+        self.snapshot = None
+        self.requests_served = 0
+
+    @property
+    def generation(self):
+        """Number of snapshots loaded so far (the current snapshot's generation)"""
+        return 0 if self.snapshot is None else self.snapshot.generation
+
+    def build_snapshot(self, generation):
+        """Load inputs and precompute forecasts (blocking)"""
+        started = time.perf_counter()
+        context = self._load_context()
+        results = run_forecast(context)
+        return ForecastSnapshot(context, results, time.perf_counter() - started, generation)
+
+    async def reload(self):
+        """Load a new snapshot off the event loop and swap it in atomically"""
+        # Created on first use so it belongs to the running event loop
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            snapshot = await asyncio.get_running_loop().run_in_executor(
+                None, self.build_snapshot, self.generation + 1
+            )
+            self.snapshot = snapshot
+            return snapshot
+
+    def handle(self, method, path, query, body):
+        """
+        Route one request.
+
+        Returns:
+            Tuple (status, payload dict)
+        """
+        snapshot = self.snapshot
+        self.requests_served += 1
+
+        if path == '/health':
+            return 200, self._status(snapshot)
+
+        if path == '/skus/index':
+            return 200, {'generation': snapshot.generation, 'skus': list(snapshot.rows)}
+
+        if path.startswith('/sku/'):
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            sku = unquote(path[len('/sku/'):])
+            months = snapshot.month_range(_first(query, 'from'), _first(query, 'through'))
+            record = snapshot.sku_record(sku, months)
+            if record is None:
+                return 404, {'error': f"Unknown SKU {sku!r}"}
+            return 200, record
+
+        if path == '/skus':
+            if method != 'POST':
+                return 405, {'error': 'use POST'}
+            request = json.loads(body or b'{}')
+            skus = request.get('skus') if isinstance(request, dict) else None
+            if not isinstance(skus, list) or not all(isinstance(sku, str) for sku in skus):
+                return 400, {'error': "Body must be a JSON object with a 'skus' list of strings"}
+            months = snapshot.month_range(request.get('from'), request.get('through'))
+            records, missing = [], []
+            for sku in skus:
+                record = snapshot.sku_record(sku, months)
+                if record is None:
+                    missing.append(sku)
+                else:
+                    records.append(record)
+            return 200, {'generation': snapshot.generation, 'results': records, 'missing': missing}
+
+        return 404, {'error': f"No route for {path}"}
+
+    def _status(self, snapshot):
+        return {
+            'status': 'ok',
+            'generation': snapshot.generation,
+            'loaded_at': snapshot.loaded_at,
+            'load_seconds': round(snapshot.loaded_seconds, 3),
+            'skus': len(snapshot.rows),
+            'months': [snapshot.month_labels[0], snapshot.month_labels[-1]],
+            'current_month': snapshot.month_labels[snapshot.context.projection_start]
+            if snapshot.context.projection_start < len(snapshot.month_labels) else None,
+            'requests_served': self.requests_served,
+        }
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection (keep-alive supported)"""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+                query = parse_qs(url.query)
+
+                if url.path == '/reload' and method == 'POST':
+                    try:
+                        snapshot = await self.reload()
+                    except Exception as exc:
+                        # The previous snapshot stays current
+                        print(f"Reload failed, still serving generation {self.generation}: {exc}")
+                        status, payload = 500, {
+                            'error': f"Reload failed: {type(exc).__name__}: {exc}", 'generation': self.generation,
+                        }
+                    else:
+                        status, payload = 200, self._status(snapshot)
+                else:
+                    try:
+                        status, payload = self.handle(method, url.path, query, body)
+                    except ValueError as exc:
+                        status, payload = 400, {'error': str(exc)}
+                    except Exception as exc:
+                        status, payload = 500, {'error': f"{type(exc).__name__}: {exc}"}
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        except _RequestTooLarge:
+            writer.write(_response(413, {'error': 'Request body too large'}, keep_alive=False))
+        except _BadRequest as exc:
+            writer.write(_response(400, {'error': str(exc)}, keep_alive=False))
+        finally:
+            writer.close()
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Load the first snapshot and serve until cancelled"""
+    snapshot = await service.reload()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Loaded {len(snapshot.rows)} SKUs in {snapshot.loaded_seconds:.2f}s")
+    print(f"Serving forecasts on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+class _RequestTooLarge(Exception):
+    pass
+
+
+class _BadRequest(Exception):
+    """Request that cannot be parsed; answered with 400 and the connection is closed"""
+
+
+async def _read_request(reader):
+    """Read one HTTP request; None when the client closed the connection"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode('latin-1').rstrip('\r\n').split(' ')
+    if len(parts) != 3 or not all(parts) or not parts[2].startswith('HTTP/'):
+        raise _BadRequest(f"Malformed request line {request_line[:100]!r}")
+    method, target, _version = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise _BadRequest(f"Invalid Content-Length {headers['content-length']!r}") from None
+    if length < 0:
+        raise _BadRequest(f"Invalid Content-Length {length}")
+    if length > MAX_BODY_BYTES:
+        raise _RequestTooLarge()
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, headers, body
+
+
+def _response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+def _first(query, name):
+    values = query.get(name)
+    return values[0] if values else None
+
+
+def _json_number(value):
+    """Float for JSON, None for NaN; whole numbers become ints"""
+    value = float(value)
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def _json_numbers(values):
+    return [_json_number(value) for value in values.tolist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve per-SKU forecasts from a warm model context.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--base-path', default=REPO_ROOT, help='Directory holding the input files')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the Parquet input cache')
+    args = parser.parse_args()
+
+    cache_dir = os.path.join(args.base_path, '.cache', 'inputs')
+
+    def load():
+        cache = InputCache(cache_dir, enabled=not args.no_cache)
+        return load_context(input_paths(args.base_path), cache=cache)
+
+    try:
+        asyncio.run(serve(ForecastService(load), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
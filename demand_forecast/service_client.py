@@ -0,0 +1,170 @@
+"""
+Client and load tester for the local forecast query service.
+
+    python -m demand_forecast.service_client --requests 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import quote
+
+from .service import DEFAULT_HOST, DEFAULT_PORT
+
+
+class ForecastClient:
+    """Minimal asyncio HTTP/1.1 client holding one keep-alive connection to the service"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+    async def request(self, method, path, payload=None):
+        """
+        Send one request.
+
+        Returns:
+            Tuple (status, decoded JSON body)
+        """
+        if self._writer is None:
+            await self.connect()
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+        )
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length))
+
+    async def health(self):
+        return await self.request('GET', '/health')
+
+    async def sku(self, sku, start=None, through=None):
+        """Forecast, receipts and projected EOM for one SKU"""
+        params = '&'.join(f"{name}={value}" for name, value in (('from', start), ('through', through)) if value)
+        return await self.request('GET', f"/sku/{quote(str(sku), safe='')}" + (f"?{params}" if params else ''))
+
+    async def skus(self, skus, start=None, through=None):
+        """Batch query for several SKUs"""
+        return await self.request('POST', '/skus', {'skus': list(skus), 'from': start, 'through': through})
+
+    async def reload(self):
+        return await self.request('POST', '/reload')
+
+
+async def load_test(host=DEFAULT_HOST, port=DEFAULT_PORT, requests=2000, concurrency=16, batch_size=0,
+                    through=None, seed=0):
+    """
+    Fire random single-SKU (or batch) queries at the service and measure latency.
+
+    Args:
+        host, port: Service address
+        requests: Total number of requests
+        concurrency: Number of concurrent connections
+        batch_size: SKUs per request; 0 uses GET /sku/<SKU>
+        through: Optional YYYY-MM end month for every query
+        seed: Random seed for SKU selection
+
+    Returns:
+        Dict with request count, errors, wall seconds, requests/sec and
+        latency percentiles in milliseconds
+    """
+    skus = await _service_skus(host, port)
+    rng = random.Random(seed)
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        async with ForecastClient(host, port) as client:
+            for _ in remaining:
+                started = time.perf_counter()
+                if batch_size:
+                    status, _body = await client.skus(rng.sample(skus, min(batch_size, len(skus))), through=through)
+                else:
+                    status, _body = await client.sku(rng.choice(skus), through=through)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if status != 200:
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'wall_seconds': round(wall_seconds, 3),
+        'requests_per_second': round(len(latencies) / wall_seconds, 1) if wall_seconds else None,
+        'p50_ms': round(_percentile(latencies, 50), 3),
+        'p95_ms': round(_percentile(latencies, 95), 3),
+        'p99_ms': round(_percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else None,
+    }
+
+
+async def _service_skus(host, port):
+    """SKU list to draw queries from (read from the service's own SKU index)"""
+    async with ForecastClient(host, port) as client:
+        status, body = await client.request('GET', '/skus/index')
+    if status != 200:
+        raise RuntimeError(f"Could not list SKUs: {body}")
+    return body['skus']
+
+
+def _percentile(values, pct):
+    if not values:
+        return float('nan')
+    idx = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the local forecast query service.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=0, help='SKUs per request (0 = single-SKU GETs)')
+    parser.add_argument('--through', help='End month (YYYY-MM) for every query')
+    args = parser.parse_args()
+
+    stats = asyncio.run(load_test(args.host, args.port, args.requests, args.concurrency, args.batch_size, args.through))
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .export import add_formats, open_workbook, sheet_name_for, write_category_sheet
+from .partition import category_rows
+
+# Loaded model data shared with worker processes (set by _init_worker)
+_worker_state = {}
+
+
+def category_workbook_path(output_dir, category):
+    """Path of the per-category workbook written in parallel mode"""
+    return os.path.join(output_dir, f"{sheet_name_for(category)}.xlsx")
+
+
+def write_category_workbooks(output_dir, partitions, sku_master, sku_avg_sales, sheet_data,
+                             workers=None, mode='fast'):
+    """
+    Write one workbook per planning category using a pool of worker processes.
+
+    Each category's sheet only depends on its own SKUs, so workers build and
+    write their sheets independently. Every workbook holds a single sheet
+    identical to that category's sheet in the serial workbook.
+
+    Args:
+        output_dir: Directory for the per-category workbooks (created if needed)
+        partitions: Dict of category -> ranked sku_master row positions (see
+            partition_skus()), in output order
+        sku_master: Catalog merged with inventory
+        sku_avg_sales: Average sales per sku_master row (see average_sales())
+        sheet_data: Keyword arguments for write_category_sheet() (the demand,
+            receipts and projection matrices plus the month axis)
+        workers: Number of worker processes (default: os.cpu_count()); 1 writes
+            the workbooks in this process
+        mode: Excel writer mode (see EXCEL_WRITER_MODES)
+
+    Returns:
+        List of (category, workbook path, SKU count), in category order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state = {
+        'output_dir': output_dir,
+        'sku_master': sku_master,
+        'sku_avg_sales': sku_avg_sales,
+        'partitions': partitions,
+        'sheet_data': sheet_data,
+        'mode': mode,
+    }
+
+    if workers == 1:
+        _init_worker(state)
+        return [_write_category_workbook(category) for category in partitions]
+
+    # Forked workers inherit the loaded matrices without pickling them
+    mp_context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork')
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                             initializer=_init_worker, initargs=(state,)) as executor:
+        return list(executor.map(_write_category_workbook, list(partitions)))
+
+
+def _init_worker(state):
+    """Store the shared model data in the worker process"""
+    _worker_state.update(state)
+
+
+def _write_category_workbook(category):
+    """Build and write a single category's workbook inside a worker process"""
+    state = _worker_state
+    category_skus = category_rows(state['sku_master'], state['partitions'][category], state['sku_avg_sales'])
+    path = category_workbook_path(state['output_dir'], category)
+
+    workbook = open_workbook(path, state['mode'])
+    formats = add_formats(workbook)
+    write_category_sheet(workbook, formats, category, category_skus, mode=state['mode'], **state['sheet_data'])
+    workbook.close()
+
+    return category, path, len(category_skus)
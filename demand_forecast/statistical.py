@@ -0,0 +1,403 @@
+"""
+Statistical forecasting backend.
+
+Fits a per-SKU model to monthly sales history instead of the ROS x curve
+heuristic:
+
+    ses      simple exponential smoothing, for steady sellers
+    croston  Croston's method, for intermittent sellers
+    tsb      Teunter-Syntetos-Babai, for intermittent sellers (default)
+
+Sales are divided by the SKU's curve adjustment before fitting and the flat
+fitted level is multiplied by it again over the forecast months, so the
+planning curve still supplies the seasonality. A SKU counts as intermittent
+when its average interval between selling months is at least
+INTERMITTENT_ADI. SKUs with less than min_history_months of history since
+their first sale keep the ROS forecast.
+
+The smoothing parameters are chosen per SKU by grid search on one-step-ahead
+squared error, vectorised across a chunk of SKUs and every grid point. Chunks
+are fitted in a process pool, and fitted models are cached on disk keyed by
+a hash of each SKU's history and curve, so SKUs whose history did not change
+are not refitted. The current (incomplete) month is never part of the
+history.
+
+    forecaster = StatisticalForecaster(workers=4, cache_dir='.cache/fits')
+    results = run_forecast(context, forecaster=forecaster)
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .forecast import build_curve_matrix, forecast_matrix
+from .instrumentation import NULL_REPORT
+
+# Bump when a fitting method changes so cached fits are discarded
+FIT_VERSION = 1
+
+# Forecast method of each SKU; 'ros' marks the ROS x curve fallback
+FORECAST_METHODS = ('ros', 'ses', 'croston', 'tsb')
+
+# Average demand interval (months) from which a SKU counts as intermittent
+INTERMITTENT_ADI = 1.32
+DEFAULT_MIN_HISTORY_MONTHS = 12
+DEFAULT_CHUNK_SKUS = 2_000
+
+# Smoothing parameter grids searched per SKU
+ALPHA_GRID = (0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8)
+BETA_GRID = (0.02, 0.05, 0.1, 0.2, 0.3)
+
+
+@dataclass
+class StatisticalForecast:
+    """
+    Output of StatisticalForecaster.forecast() for a set of sku_master rows.
+
+    forecast is the unrounded SKU x forecast month matrix (ROS forecast for
+    fallback rows); method holds an index into FORECAST_METHODS per row and
+    level the fitted deseasonalised monthly rate (NaN for fallback rows).
+    stats has fitted, cached and fallback SKU counts, fit_seconds and
+    skus_per_second (SKUs fitted per second of fitting).
+    """
+
+    forecast: np.ndarray
+    method: np.ndarray
+    level: np.ndarray
+    stats: dict
+
+    def method_names(self):
+        """Forecast method name of each row"""
+        return np.asarray(FORECAST_METHODS, dtype=object)[self.method]
+
+
+class StatisticalForecaster:
+    """
+    Fits per-SKU statistical models and forecasts from them.
+
+    Args:
+        workers: Processes fitting chunks in parallel (1 fits in this process)
+        cache_dir: Directory for cached fits (default: no caching)
+        chunk_skus: SKUs per fitting chunk
+        min_history_months: Months since the first sale a SKU needs before
+            it is fitted; SKUs with less keep the ROS forecast
+        intermittent_method: 'tsb' or 'croston'
+    """
+
+    def __init__(self, workers=1, cache_dir=None, chunk_skus=DEFAULT_CHUNK_SKUS,
+                 min_history_months=DEFAULT_MIN_HISTORY_MONTHS, intermittent_method='tsb'):
+        if intermittent_method not in ('tsb', 'croston'):
+            raise ValueError(f"Unknown intermittent method {intermittent_method!r}, expected 'tsb' or 'croston'")
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.chunk_skus = chunk_skus
+        self.min_history_months = min_history_months
+        self.intermittent_method = intermittent_method
+        # stats of the most recent forecast() call
+        self.last_stats = None
+
+    @property
+    def fingerprint(self):
+        """Digest of everything that changes fitted results"""
+        config = {
+            'version': FIT_VERSION,
+            'min_history_months': self.min_history_months,
+            'intermittent_method': self.intermittent_method,
+            'intermittent_adi': INTERMITTENT_ADI,
+            'alpha_grid': ALPHA_GRID,
+            'beta_grid': BETA_GRID,
+        }
+        return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+    def forecast(self, context, rows=None, fallback=None, report=NULL_REPORT):
+        """
+        Forecast sku_master rows from their fitted models.
+
+        Args:
+            context: ModelContext
+            rows: sku_master row positions (default: all SKUs)
+            fallback: ROS forecast for the same rows (default: computed with
+                forecast_matrix())
+            report: RunReport receiving the 'fit' span
+
+        Returns:
+            StatisticalForecast
+        """
+        sku_rows = context.sku_master if rows is None else context.sku_master.iloc[rows]
+        curve_matrix = build_curve_matrix(sku_rows['PLANNING_CATEGORY'], context.curve_data)
+        if fallback is None:
+            sku_ros = context.sku_ros if rows is None else context.sku_ros[rows]
+            fallback = forecast_matrix(sku_ros, curve_matrix, context.forecast_months)
+
+        # Complete months only: everything before the current month
+        history_months = context.all_months[:context.projection_start]
+        history = context.sales_units[:, :context.projection_start]
+        history = history if rows is None else history[rows]
+        history_curve = curve_matrix[:, [month.month - 1 for month in history_months]]
+
+        n_rows = len(history)
+        method = np.zeros(n_rows, dtype=np.int8)
+        level = np.full(n_rows, np.nan)
+        eligible = history_length(history) >= max(self.min_history_months, 1)
+
+        with report.span('fit', skus=n_rows) as span:
+            started = time.perf_counter()
+            positions = np.flatnonzero(eligible)
+            keys = fit_keys(history[positions], history_curve[positions])
+            cache = FitCache(self.cache_dir, self.fingerprint)
+            cached_method, cached_level, hit = cache.lookup(keys)
+            method[positions[hit]] = cached_method[hit]
+            level[positions[hit]] = cached_level[hit]
+
+            # Fit the rest chunk by chunk, in worker processes when workers > 1
+            to_fit = positions[~hit]
+            fit_started = time.perf_counter()
+            fitted_method, fitted_level = self._fit(history[to_fit], history_curve[to_fit])
+            fit_seconds = time.perf_counter() - fit_started
+            method[to_fit] = fitted_method
+            level[to_fit] = fitted_level
+            # A forecast of only some rows keeps the other cached fits
+            cache.save(keys, method[positions], level[positions], merge=rows is not None)
+
+            stats = {
+                'fitted': len(to_fit),
+                'cached': int(hit.sum()),
+                'fallback': int(n_rows - len(positions)),
+                'fit_seconds': round(fit_seconds, 4),
+                'skus_per_second': round(len(to_fit) / fit_seconds, 1) if len(to_fit) and fit_seconds > 0 else None,
+                'seconds': round(time.perf_counter() - started, 4),
+            }
+            for name in ('fitted', 'cached', 'fallback'):
+                span.count(f"{name}_skus", stats[name])
+            if stats['skus_per_second'] is not None:
+                span.count('skus_per_second', stats['skus_per_second'])
+        self.last_stats = stats
+
+        forecast = fallback.copy()
+        forecast_curve = curve_matrix[:, [month.month - 1 for month in context.forecast_months]]
+        forecast[positions] = level[positions, None] * forecast_curve[positions]
+        return StatisticalForecast(forecast, method, level, stats)
+
+    def _fit(self, history, history_curve):
+        chunks = [
+            (history[start:start + self.chunk_skus], history_curve[start:start + self.chunk_skus],
+             self.intermittent_method)
+            for start in range(0, len(history), self.chunk_skus)
+        ]
+        if not chunks:
+            return np.zeros(0, dtype=np.int8), np.zeros(0)
+        if self.workers == 1 or len(chunks) == 1:
+            fitted = [fit_chunk(*chunk) for chunk in chunks]
+        else:
+            mp_context = None
+            if 'fork' in multiprocessing.get_all_start_methods():
+                mp_context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context) as executor:
+                fitted = list(executor.map(fit_chunk, *zip(*chunks)))
+        return np.concatenate([m for m, _ in fitted]), np.concatenate([lv for _, lv in fitted])
+
+
+def history_length(history):
+    """Months from each SKU's first sale to the end of the history (0 without sales)"""
+    sold = history > 0
+    first = sold.argmax(axis=1)
+    return np.where(sold.any(axis=1), history.shape[1] - first, 0)
+
+
+def fit_keys(history, history_curve):
+    """uint64 hash of each SKU's history and the curve adjustments applied to it"""
+    if len(history) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    frame = pd.DataFrame(np.hstack([history.astype(float), history_curve]))
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def fit_chunk(history, history_curve, intermittent_method='tsb'):
+    """
+    Pick a method for each SKU in a chunk and fit it.
+
+    Args:
+        history: Units sold (n_skus x n_months), complete months only
+        history_curve: Curve adjustment of each SKU and history month
+        intermittent_method: 'tsb' or 'croston'
+
+    Returns:
+        Tuple (method, level): index into FORECAST_METHODS and fitted
+        deseasonalised monthly level per SKU
+    """
+    history = np.asarray(history, dtype=float)
+    # Deseasonalise with the planning curve (months with no curve weight are left as they are)
+    history = np.divide(history, history_curve, out=history.copy(), where=history_curve > 0)
+
+    sold = history > 0
+    start = np.where(sold.any(axis=1), sold.argmax(axis=1), history.shape[1])
+    active_months = history.shape[1] - start
+    adi = np.divide(active_months, sold.sum(axis=1), out=np.full(len(history), np.inf), where=sold.any(axis=1))
+    intermittent = adi >= INTERMITTENT_ADI
+
+    method = np.full(len(history), FORECAST_METHODS.index('ses'), dtype=np.int8)
+    level = np.zeros(len(history))
+    for is_intermittent, name in ((False, 'ses'), (True, intermittent_method)):
+        subset = np.flatnonzero(intermittent == is_intermittent)
+        if len(subset):
+            method[subset] = FORECAST_METHODS.index(name)
+            level[subset] = FIT_METHODS[name](history[subset], start[subset])
+    return method, level
+
+
+def fit_ses(history, start):
+    """
+    Simple exponential smoothing with alpha chosen from ALPHA_GRID per SKU.
+
+    Args:
+        history: Deseasonalised demand (n_skus x n_months)
+        start: Column of each SKU's first sale
+
+    Returns:
+        Final level per SKU (the flat forecast)
+    """
+    alphas = np.asarray(ALPHA_GRID)[None, :]
+    level = np.zeros((len(history), alphas.shape[1]))
+    sse = np.zeros_like(level)
+    for t in range(history.shape[1]):
+        x = history[:, t, None]
+        started = (t > start)[:, None]
+        error = np.where(started, x - level, 0.0)
+        sse += error ** 2
+        level = np.where((t == start)[:, None], x, level + alphas * error)
+    return _best(level, sse)
+
+
+def fit_croston(history, start):
+    """
+    Croston's method: smoothed demand size over smoothed interval between
+    sales, with one alpha from ALPHA_GRID per SKU.
+
+    Returns:
+        Final demand rate per SKU (the flat forecast)
+    """
+    alphas = np.asarray(ALPHA_GRID)[None, :]
+    n_skus = len(history)
+    size = np.zeros((n_skus, alphas.shape[1]))
+    interval = np.ones_like(size)
+    since_sale = np.ones((n_skus, 1))
+    sse = np.zeros_like(size)
+    for t in range(history.shape[1]):
+        x = history[:, t, None]
+        started = (t > start)[:, None]
+        sse += np.where(started, x - size / interval, 0.0) ** 2
+        sale = started & (x > 0)
+        size = np.where((t == start)[:, None], x, np.where(sale, size + alphas * (x - size), size))
+        interval = np.where(sale, interval + alphas * (since_sale - interval), interval)
+        since_sale = np.where(x > 0, 1.0, since_sale + 1)
+    return _best(size / interval, sse)
+
+
+def fit_tsb(history, start):
+    """
+    Teunter-Syntetos-Babai: smoothed demand size (alpha) times smoothed
+    probability of a sale (beta), updated every month so demand decays for
+    SKUs that stop selling. alpha and beta are chosen from ALPHA_GRID x
+    BETA_GRID per SKU.
+
+    Returns:
+        Final demand rate per SKU (the flat forecast)
+    """
+    alpha, beta = (grid.ravel()[None, :] for grid in np.meshgrid(ALPHA_GRID, BETA_GRID))
+    n_skus, n_months = history.shape
+    # Start from the SKU's average sale size and share of selling months
+    active = np.arange(n_months)[None, :] >= start[:, None]
+    sold = (history > 0) & active
+    n_sold = np.maximum(sold.sum(axis=1), 1)
+    size = np.repeat((np.where(sold, history, 0.0).sum(axis=1) / n_sold)[:, None], alpha.shape[1], axis=1)
+    probability = np.repeat((n_sold / np.maximum(active.sum(axis=1), 1))[:, None], alpha.shape[1], axis=1)
+    sse = np.zeros_like(size)
+    for t in range(n_months):
+        x = history[:, t, None]
+        started = (t >= start)[:, None]
+        sse += np.where(started, x - probability * size, 0.0) ** 2
+        sale = started & (x > 0)
+        probability = np.where(started, probability + beta * (sale - probability), probability)
+        size = np.where(sale, size + alpha * (x - size), size)
+    return _best(probability * size, sse)
+
+
+# Fitting function of each statistical method
+FIT_METHODS = {
+    'ses': fit_ses,
+    'croston': fit_croston,
+    'tsb': fit_tsb,
+}
+
+
+def _best(forecasts, sse):
+    """Forecast of the grid point with the lowest error for each SKU"""
+    return forecasts[np.arange(len(forecasts)), sse.argmin(axis=1)]
+
+
+class FitCache:
+    """
+    Fitted models on disk, keyed by fit_keys().
+
+    One .npz file per forecaster fingerprint holds the method and level of
+    every SKU history fitted in the latest full run (plus any partial runs
+    since); histories that no longer occur are dropped by the next full run.
+    SKUs with identical histories share a key, which is stored once.
+    """
+
+    def __init__(self, cache_dir, fingerprint):
+        self.path = os.path.join(cache_dir, f"fits-{fingerprint}.npz") if cache_dir else None
+
+    def lookup(self, keys):
+        """
+        Cached fits for keys.
+
+        Returns:
+            Tuple (method, level, hit) aligned with keys; hit is False where
+            nothing is cached
+        """
+        method = np.zeros(len(keys), dtype=np.int8)
+        level = np.full(len(keys), np.nan)
+        hit = np.zeros(len(keys), dtype=bool)
+        if self.path is None or not os.path.exists(self.path) or len(keys) == 0:
+            return method, level, hit
+        try:
+            with np.load(self.path) as cached:
+                cached_keys, cached_method, cached_level = cached['keys'], cached['method'], cached['level']
+        except (OSError, KeyError, ValueError):
+            return method, level, hit
+        # Files written before keys were deduplicated may repeat a key; use its first fit
+        cached_keys, first = np.unique(cached_keys, return_index=True)
+        cached_method, cached_level = cached_method[first], cached_level[first]
+        found = pd.Index(cached_keys).get_indexer(keys)
+        hit = found >= 0
+        method[hit] = cached_method[found[hit]]
+        level[hit] = cached_level[found[hit]]
+        return method, level, hit
+
+    def save(self, keys, method, level, merge=False):
+        """Replace the cache with these fits, or add them to it when merge is set"""
+        if self.path is None:
+            return
+        if merge and os.path.exists(self.path):
+            try:
+                with np.load(self.path) as cached:
+                    keep = ~pd.Index(cached['keys']).isin(keys)
+                    keys = np.concatenate([cached['keys'][keep], keys])
+                    method = np.concatenate([cached['method'][keep], method])
+                    level = np.concatenate([cached['level'][keep], level])
+            except (OSError, KeyError, ValueError):
+                pass
+        # Identical histories have the same key and the same fit
+        keys, first = np.unique(keys, return_index=True)
+        method, level = np.asarray(method)[first], np.asarray(level)[first]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp.npz'
+        np.savez(tmp_path, keys=keys, method=method, level=level)
+        os.replace(tmp_path, self.path)
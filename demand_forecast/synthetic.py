@@ -0,0 +1,315 @@
+"""
+Synthetic model inputs at production scale.
+
+generate_inputs() writes catalog, inventory, sales, ROS, curve and on-order
+files with the same file names and column schemas as the checked-in samples,
+so input_paths(output_dir) and load_context() read them unchanged. Volumes
+are calibrated on the samples (about half of the catalog sells, roughly 0.6
+order lines per selling SKU-month, one on-order line per eight SKUs) and
+everything is drawn from a seeded generator, so a given size always produces
+the same files.
+"""
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .context import DEFAULT_CURRENT_DATE, input_paths
+from .forecast import PLANNING_CATEGORY_TO_CURVE, get_curve_category
+
+# Planning category mix of the sample catalog (SKU counts)
+PLANNING_CATEGORY_MIX = {
+    'FURNITURE - MTO': 1287,
+    'RUGS - AREA + ROUND': 1042,
+    'BEDDING - SHEETS ETC.': 855,
+    'PILLOWS - ACCENT': 454,
+    'FURNITURE - STOCKED': 274,
+    'RUGS - ACCENT': 241,
+    'TABLEWARE': 186,
+    'BATH - TOWELS': 181,
+    'BLANKETS - THROWS': 164,
+    'BEDDING - QUILTS ETC.': 139,
+    'RUGS - RUNNERS': 128,
+    'BASKETS': 127,
+    'ACCENTS - ART': 120,
+    'BEDDING - DUVETS': 118,
+    'BEDDING - BED BLANKETS': 98,
+    'PILLOWS - OVERSIZED LUMBARS': 95,
+    'HOLIDAY': 84,
+    'ACCENTS - PLANTERS & VASES': 75,
+    'ACCENTS - CANDLE & DEC-ACC': 73,
+    'BEDDING - SWATCH': 69,
+    'ACCENTS - WALL HANGINGS': 45,
+    'ACCENTS - MIRRORS': 41,
+    'Z. MISC': 40,
+    'FURNITURE - SWATCH': 37,
+    'BATH - BATH ROBES': 33,
+    'BATH - ACCESSORIES': 27,
+    'RUGS - MISC': 24,
+    'ACCENTS - BOOKS': 20,
+    'BATH - MATS': 17,
+    'BEDDING - INSERTS': 14,
+    'ACCENTS - MTO': 1,
+}
+
+CATALOG_COLUMNS = [
+    'SKU', 'SKU_DESCRIPTION', 'CATEGORY', 'SUB_CATEGORY', 'COLOR_NAME', 'COLLECTION', 'SIZE',
+    'PLANNING_CATEGORY', 'LAUNCH_YEAR_SEASON', 'LAUNCH_DATE', 'PLANNING_STATUS', 'ASSORTMENT_STATUS',
+    'FULL_PRICE_RETAIL', 'VENDOR_NAME', 'VENDOR_COST', 'VENDOR_COST_USD', 'ITEM_MOQS',
+]
+INVENTORY_COLUMNS = [
+    'SKU', 'ON_HAND_QTY', 'QTY_COMMITTED', 'QTY_BACKORDERED', 'UNFULFILLED_QTY',
+    'AVAILABLE_ON_HAND_QTY', 'CURRENT_INVENTORY_POSITION',
+]
+SALES_COLUMNS = ['ORDER_ID', 'COMPONENT_SKU', 'ORDER_DATE', 'ORDER_MONTH', 'UNITS_SOLD']
+ON_ORDER_COLUMNS = [
+    'Estimate Artisan Ship Date Date', 'Estimate Land Date Date', 'Estimate ECSD Date',
+    'SKU', 'SKU Description', 'Expected Shipment Quantity',
+]
+
+# Share of catalog SKUs with sales history, and with a ROS value
+SELLING_SHARE = 0.5
+ROS_SHARE = 0.47
+# Order lines per selling SKU per month, before popularity and seasonality
+DEFAULT_LINES_PER_SKU_MONTH = 0.6
+# On-order lines per catalog SKU
+ON_ORDER_LINES_PER_SKU = 0.125
+# Selling SKUs generated per block when writing sales
+SALES_BLOCK_SKUS = 20_000
+
+_COLORS = ['BLACK', 'NATURAL', 'IVORY', 'INDIGO', 'RUST', 'SAGE', 'CHARCOAL', 'CLAY', 'OCHRE', 'MULTI']
+_SIZES = {
+    'BEDDING': ['TWIN', 'FULL', 'QUEEN', 'KING', 'CAL-KING'],
+    'RUGS': ["2' x 3'", "5' x 8'", "6' x 9'", "8' x 10'", "9' x 12'"],
+}
+_STATUSES = [
+    ('ACTIVE', 'ACTIVE - ON HAND/ON ORDER', 0.51),
+    ('ARCHIVED', 'ARCHIVED', 0.28),
+    ('DISCONTINUED', 'DISCONTINUED - ON HAND', 0.185),
+    ('PRE-INTRO', 'PD - APPROVED', 0.025),
+]
+_SEASONS = ['SPRING', 'SUMMER', 'FALL', 'HOLIDAY']
+
+
+def _curve_percentages(rng, curve_categories):
+    """Monthly share of annual sales (rows sum to 1) for each curve category, January first"""
+    month = np.arange(12)
+    # Holiday peak plus a category-specific spring/summer bump
+    base = 1.0 + 0.35 * np.exp(-((month - 10.5) ** 2) / 3.0)
+    bump = rng.uniform(0.0, 0.3, size=(len(curve_categories), 1)) * np.cos((month - rng.integers(2, 7)) / 2.0)
+    noise = rng.uniform(0.9, 1.1, size=(len(curve_categories), 12))
+    pct = (base + bump) * noise
+    return pct / pct.sum(axis=1, keepdims=True)
+
+
+def _write_catalog(path, rng, skus, planning_categories):
+    n_skus = len(skus)
+    category = np.array([pc.split(' - ')[0] for pc in planning_categories], dtype=object)
+    sub_category = np.array([pc.split(' - ')[-1] for pc in planning_categories], dtype=object)
+
+    n_collections = max(10, n_skus // 10)
+    collection = np.char.add('COLLECTION ', rng.integers(0, n_collections, n_skus).astype(str)).astype(object)
+    color = np.array(_COLORS, dtype=object)[rng.integers(0, len(_COLORS), n_skus)]
+
+    size = np.full(n_skus, None, dtype=object)
+    for size_category, sizes in _SIZES.items():
+        mask = category == size_category
+        size[mask] = np.array(sizes, dtype=object)[rng.integers(0, len(sizes), mask.sum())]
+
+    launch_year = rng.integers(2016, 2026, n_skus)
+    launch_season = np.array(_SEASONS, dtype=object)[rng.integers(0, len(_SEASONS), n_skus)]
+    launch_date = pd.to_datetime(
+        {'year': launch_year, 'month': rng.integers(1, 13, n_skus), 'day': 1}
+    ).dt.strftime('%Y-%m-%d')
+
+    status_idx = rng.choice(len(_STATUSES), size=n_skus, p=[s[2] for s in _STATUSES])
+    planning_status = np.array([s[0] for s in _STATUSES], dtype=object)[status_idx]
+    assortment_status = np.array([s[1] for s in _STATUSES], dtype=object)[status_idx]
+
+    retail = np.round(np.exp(rng.normal(5.0, 0.9, n_skus))).clip(9, 9999)
+    vendor_cost = np.round(retail * rng.uniform(0.18, 0.35, n_skus), 2)
+    n_vendors = max(10, n_skus // 50)
+    vendor = np.char.add('Vendor ', rng.integers(0, n_vendors, n_skus).astype(str)).astype(object)
+    moq = np.where(rng.random(n_skus) < 0.05, rng.choice([5, 10, 50, 100], n_skus), np.nan)
+
+    catalog = pd.DataFrame({
+        'SKU': skus,
+        'SKU_DESCRIPTION': [f"{c.title()} {s.title()}" for c, s in zip(collection, sub_category)],
+        'CATEGORY': category,
+        'SUB_CATEGORY': sub_category,
+        'COLOR_NAME': color,
+        'COLLECTION': collection,
+        'SIZE': size,
+        'PLANNING_CATEGORY': planning_categories,
+        'LAUNCH_YEAR_SEASON': [f"{y} {s}" for y, s in zip(launch_year, launch_season)],
+        'LAUNCH_DATE': launch_date,
+        'PLANNING_STATUS': planning_status,
+        'ASSORTMENT_STATUS': assortment_status,
+        'FULL_PRICE_RETAIL': retail,
+        'VENDOR_NAME': vendor,
+        'VENDOR_COST': vendor_cost,
+        'VENDOR_COST_USD': vendor_cost,
+        'ITEM_MOQS': moq,
+    }, columns=CATALOG_COLUMNS)
+    catalog.to_csv(path, index=False)
+    return catalog
+
+
+def _write_inventory(path, rng, skus, daily_rate):
+    n_skus = len(skus)
+    in_stock = rng.random(n_skus) < 0.35
+    on_hand = np.where(in_stock, np.round(daily_rate * rng.uniform(5, 150, n_skus)), 0).astype(int)
+    committed = np.minimum(rng.poisson(0.3, n_skus), on_hand)
+    backordered = np.where(rng.random(n_skus) < 0.03, rng.integers(1, 20, n_skus), 0)
+    inventory = pd.DataFrame({
+        'SKU': skus,
+        'ON_HAND_QTY': on_hand,
+        'QTY_COMMITTED': committed,
+        'QTY_BACKORDERED': backordered,
+        'UNFULFILLED_QTY': committed + backordered,
+        'AVAILABLE_ON_HAND_QTY': on_hand - committed,
+        'CURRENT_INVENTORY_POSITION': on_hand - committed - backordered,
+    }, columns=INVENTORY_COLUMNS)
+    inventory.to_csv(path, index=False)
+    return len(inventory)
+
+
+def _write_ros(path, rng, skus, daily_rate):
+    """ROS extract with the sample's padded header and values, and blanks for SKUs without a rate"""
+    has_ros = rng.random(len(skus)) < ROS_SHARE
+    observed = np.round(daily_rate * rng.uniform(0.7, 1.3, len(skus)), 2)
+    with open(path, 'w') as f:
+        f.write("VARIANT_SKU, NORMALIZED_ROS \n")
+        f.writelines(
+            f"{sku}, {ros:.2f} \n" if present else f"{sku},\n"
+            for sku, ros, present in zip(skus, observed, has_ros)
+        )
+    return int(has_ros.sum())
+
+
+def _write_curve(path, curve_categories, curve_months, pct):
+    curve = pd.DataFrame(pct, columns=curve_months)
+    curve.insert(0, 'Gross Item Finance Forecast CURVE', curve_categories)
+    # The sample sheet has a blank first column, read back as 'Unnamed: 0'
+    curve.insert(0, '', np.nan)
+    curve.to_excel(path, index=False)
+
+
+def _write_sales(path, rng, skus, daily_rate, curve_index, pct, sales_months, lines_per_sku_month):
+    """Write order lines block by block so memory stays bounded at any catalog size"""
+    selling = np.flatnonzero(rng.random(len(skus)) < SELLING_SHARE)
+    month_starts = sales_months.to_numpy(dtype='datetime64[D]')
+    days_in_month = sales_months.days_in_month.to_numpy()
+    month_labels = sales_months.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    month_of_year = sales_months.month.to_numpy() - 1
+    # Popularity relative to the average selling SKU
+    popularity = daily_rate[selling] / max(daily_rate[selling].mean(), 1e-9) if len(selling) else daily_rate[selling]
+
+    n_lines = 0
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(SALES_COLUMNS) + '\n')
+        for start in range(0, len(selling), SALES_BLOCK_SKUS):
+            block = selling[start:start + SALES_BLOCK_SKUS]
+            seasonality = pct[curve_index[block]][:, month_of_year] * 12
+            rate = lines_per_sku_month * popularity[start:start + len(block), None] * seasonality
+            lines = rng.poisson(rate).ravel()
+            cell = np.repeat(np.arange(lines.size), lines)
+            if not cell.size:
+                continue
+            sku_pos, month_pos = np.divmod(cell, len(sales_months))
+            order_date = month_starts[month_pos] + (rng.random(cell.size) * days_in_month[month_pos]).astype(int)
+            pd.DataFrame({
+                'ORDER_ID': np.arange(n_lines, n_lines + cell.size),
+                'COMPONENT_SKU': skus[block][sku_pos],
+                'ORDER_DATE': np.datetime_as_string(order_date, unit='D'),
+                'ORDER_MONTH': month_labels[month_pos],
+                'UNITS_SOLD': rng.integers(1, 5, cell.size),
+            }, columns=SALES_COLUMNS).to_csv(f, header=False, index=False)
+            n_lines += cell.size
+    return n_lines
+
+
+def _write_on_order(path, rng, skus, descriptions, daily_rate, current_date):
+    n_lines = int(round(len(skus) * ON_ORDER_LINES_PER_SKU))
+    # Faster sellers are reordered more often
+    weights = daily_rate + daily_rate.mean() + 1e-9
+    rows = rng.choice(len(skus), size=n_lines, p=weights / weights.sum())
+    ship = np.datetime64(current_date, 'D') + rng.integers(-120, 240, n_lines)
+    land = ship + rng.integers(7, 60, n_lines)
+    ecsd = land + rng.integers(5, 30, n_lines)
+    quantity = np.maximum(1, np.round(daily_rate[rows] * 30 * rng.uniform(1, 6, n_lines))).astype(int)
+    on_order = pd.DataFrame({
+        'Estimate Artisan Ship Date Date': ship.astype('datetime64[ns]'),
+        'Estimate Land Date Date': land.astype('datetime64[ns]'),
+        'Estimate ECSD Date': ecsd.astype('datetime64[ns]'),
+        'SKU': skus[rows],
+        'SKU Description': descriptions[rows],
+        'Expected Shipment Quantity': quantity,
+    }, columns=ON_ORDER_COLUMNS)
+    on_order.to_excel(path, index=False)
+    return n_lines
+
+
+def generate_inputs(output_dir, n_skus, years=3, current_date=DEFAULT_CURRENT_DATE, seed=0,
+                    lines_per_sku_month=DEFAULT_LINES_PER_SKU_MONTH):
+    """
+    Write a synthetic set of model inputs.
+
+    Args:
+        output_dir: Directory to write the inputs to (created if missing)
+        n_skus: Number of catalog SKUs
+        years: Years of sales history before current_date
+        current_date: Current planning month; sales run up to the month before
+        seed: Random seed
+        lines_per_sku_month: Average order lines per selling SKU and month
+
+    Returns:
+        Dict with 'paths' (as input_paths(output_dir)) and 'rows', the row
+        count written for each input
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = input_paths(output_dir)
+    rng = np.random.default_rng(seed)
+    current_date = pd.Timestamp(current_date)
+
+    # Catalog SKUs and planning categories in the sample mix
+    skus = np.array([f"SYN{i:07d}-{i % 100:02d}" for i in range(n_skus)], dtype=object)
+    mix = np.array(list(PLANNING_CATEGORY_MIX.values()), dtype=float)
+    planning_categories = np.array(list(PLANNING_CATEGORY_MIX), dtype=object)[
+        rng.choice(len(mix), size=n_skus, p=mix / mix.sum())
+    ]
+
+    # Curves for every curve category, and the curve row used by each SKU
+    curve_categories = sorted(set(PLANNING_CATEGORY_TO_CURVE.values()))
+    curve_position = {category: i for i, category in enumerate(curve_categories)}
+    curve_index = np.array(
+        [curve_position.get(get_curve_category(pc), 0) for pc in planning_categories], dtype=np.intp
+    )
+    pct = _curve_percentages(rng, curve_categories)
+
+    # True daily rate of sale, long-tailed like the sample ROS extract
+    daily_rate = np.exp(rng.normal(-2.4, 1.3, n_skus))
+
+    catalog = _write_catalog(paths['catalog'], rng, skus, planning_categories)
+    rows = {'catalog': len(catalog)}
+    rows['inventory'] = _write_inventory(paths['inventory'], rng, skus, daily_rate)
+    rows['ros'] = _write_ros(paths['ros'], rng, skus, daily_rate)
+
+    curve_year = (current_date + pd.DateOffset(months=1)).year
+    curve_months = [datetime(curve_year, month, 1) for month in range(1, 13)]
+    _write_curve(paths['curve'], curve_categories, curve_months, pct)
+    rows['curve'] = len(curve_categories)
+
+    sales_months = pd.date_range(
+        end=current_date - pd.DateOffset(months=1), periods=int(round(years * 12)), freq='MS'
+    )
+    rows['sales'] = _write_sales(
+        paths['sales'], rng, skus, daily_rate, curve_index, pct, sales_months, lines_per_sku_month
+    )
+    rows['on_order'] = _write_on_order(
+        paths['on_order'], rng, skus, catalog['SKU_DESCRIPTION'].to_numpy(dtype=object), daily_rate,
+        current_date,
+    )
+    return {'paths': paths, 'rows': rows}
+
@@ -0,0 +1,36 @@
+"""Shared fixtures: a small synthetic input set and the context loaded from it."""
+import warnings
+from datetime import datetime
+
+import pytest
+
+from demand_forecast import DEFAULT_CURRENT_DATE, load_context, run_forecast
+from demand_forecast.synthetic import generate_inputs
+
+SYNTHETIC_SKUS = 400
+SYNTHETIC_YEARS = 2
+
+
+@pytest.fixture(scope='session')
+def synthetic_paths(tmp_path_factory):
+    """Input paths of a seeded synthetic input set"""
+    data_dir = tmp_path_factory.mktemp('synthetic')
+    return generate_inputs(data_dir, SYNTHETIC_SKUS, years=SYNTHETIC_YEARS, seed=7)['paths']
+
+
+@pytest.fixture(scope='session')
+def history_start():
+    return datetime(DEFAULT_CURRENT_DATE.year - SYNTHETIC_YEARS, DEFAULT_CURRENT_DATE.month, 1)
+
+
+@pytest.fixture(scope='session')
+def context(synthetic_paths, history_start):
+    """ModelContext over the synthetic inputs; treat as read-only"""
+    warnings.filterwarnings('ignore')
+    return load_context(synthetic_paths, history_start=history_start)
+
+
+@pytest.fixture(scope='session')
+def results(context):
+    """ForecastResults for the synthetic context; treat as read-only"""
+    return run_forecast(context)
@@ -0,0 +1,52 @@
+"""Rolling-origin backtest."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from demand_forecast.backtest import backtest
+
+
+def naive_reference(sales, origins, horizon):
+    """Loop over origins, SKUs and horizons scoring last month's sales, flat"""
+    abs_error = actual_units = forecast_units = cells = 0.0
+    for origin in origins:
+        for row in sales:
+            for h in range(horizon):
+                if origin + h < len(row):
+                    forecast, actual = row[origin - 1], row[origin + h]
+                    abs_error += abs(forecast - actual)
+                    actual_units += actual
+                    forecast_units += forecast
+                    cells += 1
+    return cells, actual_units, forecast_units, abs_error / actual_units
+
+
+def test_naive_matches_loop(context):
+    outcome = backtest(context, methods=('naive',), n_origins=4, horizon=3)
+    n_history = context.projection_start
+    sales = context.sales_units[:, :n_history].astype(float)
+    sales = sales[sales.any(axis=1)]
+    cells, actual, forecast, wape = naive_reference(sales, range(n_history - 4, n_history), 3)
+
+    overall = outcome.overall.iloc[0]
+    assert overall['CELLS'] == cells
+    assert overall['ACTUAL_UNITS'] == pytest.approx(actual)
+    assert overall['FORECAST_UNITS'] == pytest.approx(forecast)
+    assert overall['WAPE'] == pytest.approx(wape)
+    assert len(outcome.origins) == 4
+    # Horizon 3 of the last origins runs past the history and is not scored
+    assert outcome.by_horizon['CELLS'].tolist() == [4 * len(sales), 3 * len(sales), 2 * len(sales)]
+
+
+def test_blocks_do_not_change_results(context):
+    whole = backtest(context, methods=('ros', 'naive'), n_origins=3, horizon=2)
+    blocked = backtest(context, methods=('ros', 'naive'), n_origins=3, horizon=2, block_skus=37)
+    for name in ('overall', 'by_sku', 'by_category', 'by_horizon'):
+        pd.testing.assert_frame_equal(getattr(blocked, name), getattr(whole, name))
+    category_cells = whole.by_category.groupby('METHOD')['CELLS'].sum()
+    assert (category_cells <= whole.overall.set_index('METHOD')['CELLS'].reindex(category_cells.index)).all()
+
+
+def test_unknown_method(context):
+    with pytest.raises(ValueError, match='Unknown backtest methods'):
+        backtest(context, methods=('prophet',))
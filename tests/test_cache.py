@@ -0,0 +1,82 @@
+"""Content-hashed Parquet input cache: hits, invalidation, eviction and the disabled no-op."""
+import os
+
+import pandas as pd
+import pytest
+
+from demand_forecast import InputCache
+
+pytest.importorskip('pyarrow')
+
+
+class CountingReader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return pd.read_csv(path)
+
+
+def write_source(path, values):
+    pd.DataFrame({'SKU': [f"S{i}" for i in range(len(values))], 'QTY': values}).to_csv(path, index=False)
+
+
+def test_hit_then_invalidated_by_content_and_version(tmp_path):
+    source = tmp_path / 'source.csv'
+    write_source(source, [1, 2, 3])
+    cache = InputCache(str(tmp_path / 'cache'))
+    reader = CountingReader()
+
+    first = cache.load('source', str(source), reader)
+    second = cache.load('source', str(source), reader)
+    pd.testing.assert_frame_equal(first, second)
+    assert (reader.calls, cache.hits, cache.misses) == (1, 1, 1)
+
+    # Changed content (same size) and a new cleaning version both miss
+    write_source(source, [1, 2, 4])
+    assert cache.load('source', str(source), reader)['QTY'].tolist() == [1, 2, 4]
+    cache.load('source', str(source), reader, version=2)
+    assert reader.calls == 3
+
+    # A fresh cache over the same directory reuses the stored entries
+    reopened = InputCache(str(tmp_path / 'cache'))
+    reopened.load('source', str(source), reader, version=2)
+    assert (reader.calls, reopened.hits) == (3, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = InputCache(str(tmp_path / 'cache'))
+    reader = CountingReader()
+    for i in range(3):
+        source = tmp_path / f"source{i}.csv"
+        write_source(source, list(range(100 * (i + 1))))
+        cache.load(f"source{i}", str(source), reader)
+    entries = {os.path.basename(path).split('-')[0]: path for path, _size, _mtime in cache._entries()}
+    sizes = {name: os.path.getsize(path) for name, path in entries.items()}
+
+    # source1 was used longest ago; a hit on source0 makes it the most recent
+    os.utime(entries['source0'], (1, 1))
+    os.utime(entries['source1'], (2, 2))
+    os.utime(entries['source2'], (3, 3))
+    cache.load('source0', str(tmp_path / 'source0.csv'), reader)
+    cache.max_bytes = sizes['source0'] + sizes['source2']
+    cache._evict()
+
+    assert sorted(os.path.basename(path).split('-')[0] for path, _size, _mtime in cache._entries()) == [
+        'source0', 'source2',
+    ]
+    assert cache.size() == cache.max_bytes
+
+
+def test_disabled_cache_is_a_pass_through(tmp_path):
+    source = tmp_path / 'source.csv'
+    write_source(source, [1, 2, 3])
+    reader = CountingReader()
+    for cache in (InputCache(None), InputCache(str(tmp_path / 'cache'), enabled=False)):
+        cache.load('source', str(source), reader)
+        cache.load('source', str(source), reader)
+        assert cache.size() == 0
+        cache.clear()
+    assert reader.calls == 4
+    assert not (tmp_path / 'cache').exists()
@@ -0,0 +1,48 @@
+"""Compact labels and 4-byte matrices."""
+import numpy as np
+import pandas as pd
+
+from demand_forecast import QUANTITY_DTYPE, UNITS_DTYPE, intern_columns, month_offsets, scatter_months
+
+
+def test_scatter_months_sums_onto_the_grid():
+    month_axis = pd.date_range('2025-01-01', periods=3, freq='MS')
+    grid = scatter_months(
+        keys=['A', 'B', 'A', 'A', 'Z', None],
+        months=pd.to_datetime(['2025-01-01', '2025-02-01', '2025-01-01', '2024-12-01', '2025-01-01', '2025-01-01']),
+        values=[1, 2, 3, 4, 5, 6],
+        target_keys=['B', 'A', 'C', 'A'],
+        month_axis=month_axis,
+        dtype=UNITS_DTYPE,
+    )
+    assert grid.dtype == UNITS_DTYPE
+    # Duplicate targets share a key's row; months before the axis and unknown or missing keys are dropped
+    np.testing.assert_array_equal(grid, [[0, 2, 0], [4, 0, 0], [0, 0, 0], [4, 0, 0]])
+
+
+def test_month_offsets():
+    offsets = month_offsets(pd.to_datetime(['2024-11-15', '2025-01-01', None]), '2025-01-01')
+    assert offsets.tolist()[:2] == [-2, 0]
+    assert offsets[2] == np.iinfo(offsets.dtype).min
+
+
+def test_intern_columns():
+    frame = pd.DataFrame({
+        'CATEGORY': ['RUGS', 'RUGS', 'BATH'], 'COLLECTION': pd.Categorical(['X', 'Y', 'X']),
+        'SKU': ['A', 'B', 'C'], 'QTY': [1, 2, 3],
+    })
+    interned = intern_columns(frame)
+    assert isinstance(interned['CATEGORY'].dtype, pd.CategoricalDtype)
+    assert interned['CATEGORY'].tolist() == ['RUGS', 'RUGS', 'BATH']
+    # Existing categoricals, SKUs and numbers are left as they are
+    assert interned['COLLECTION'].dtype == frame['COLLECTION'].dtype
+    assert interned['SKU'].dtype == frame['SKU'].dtype and interned['QTY'].dtype == np.int64
+    numbers = frame[['QTY']]
+    assert intern_columns(numbers) is numbers
+
+
+def test_context_uses_compact_dtypes(context, results):
+    assert isinstance(context.sales_agg['SKU'].dtype, pd.CategoricalDtype)
+    assert isinstance(context.sku_master['PLANNING_CATEGORY'].dtype, pd.CategoricalDtype)
+    assert context.sales_units.dtype == UNITS_DTYPE and results.demand.dtype == UNITS_DTYPE
+    assert results.receipts.dtype == QUANTITY_DTYPE and results.projected_eom.dtype == QUANTITY_DTYPE
@@ -0,0 +1,53 @@
+"""Reusable model context and import-time cost."""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from demand_forecast import build_context, export_workbook, load_context, load_inputs, load_sales_aggregate, run_forecast
+from demand_forecast.synthetic import generate_inputs
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_context_is_reused_without_reloading(tmp_path, history_start):
+    paths = generate_inputs(tmp_path / 'inputs', 120, years=2, seed=11)['paths']
+    context = load_context(paths, history_start=history_start)
+    sku_master, sales_units = context.sku_master.copy(), context.sales_units.copy()
+
+    # Nothing is read from the input files after the context is loaded
+    for path in paths.values():
+        os.remove(path)
+    first = run_forecast(context)
+    export_workbook(context, first, str(tmp_path / 'first.xlsx'))
+    second = run_forecast(context)
+    export_workbook(context, second, str(tmp_path / 'second.xlsx'))
+
+    for name, matrix in first.matrices().items():
+        np.testing.assert_array_equal(second.matrices()[name], matrix, err_msg=name)
+    pd.testing.assert_frame_equal(second.stockouts, first.stockouts)
+    # Runs leave the context as they found it
+    pd.testing.assert_frame_equal(context.sku_master, sku_master)
+    np.testing.assert_array_equal(context.sales_units, sales_units)
+
+
+def test_build_context_matches_load_context(synthetic_paths, history_start, context):
+    built = build_context(
+        synthetic_paths, load_inputs(synthetic_paths), load_sales_aggregate(synthetic_paths),
+        history_start=history_start,
+    )
+    pd.testing.assert_frame_equal(built.sku_master, context.sku_master)
+    np.testing.assert_array_equal(built.sales_units, context.sales_units)
+    np.testing.assert_array_equal(built.receipts.to_dense(), context.receipts.to_dense())
+
+
+def test_import_defers_heavy_modules():
+    # Excel writers and scipy are only loaded by the stages that use them
+    code = (
+        "import sys, demand_forecast, demand_forecast_model; "
+        "loaded = [name for name in ('xlsxwriter', 'openpyxl', 'scipy') if name in sys.modules]; "
+        "assert not loaded, loaded"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=REPO_ROOT)
@@ -0,0 +1,61 @@
+"""Memory-mapped forecast cube."""
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from demand_forecast.cube import ForecastCube, write_cube
+
+
+def test_round_trip(context, results, tmp_path):
+    cube = ForecastCube(write_cube(str(tmp_path / 'cube'), context, results, params={'run': 'test'}))
+    assert cube.shape == results.demand.shape and cube.params['run'] == 'test'
+
+    rows = np.asarray(cube.sku_master_rows)
+    np.testing.assert_array_equal(cube['demand'], results.demand[rows])
+    np.testing.assert_array_equal(cube['projected_eom'], results.projected_eom[rows])
+    np.testing.assert_array_equal(cube.skus, context.sku_master['SKU'].astype(str).to_numpy()[rows])
+
+    sku = context.sku_master['SKU'].iloc[5]
+    np.testing.assert_array_equal(cube.sku(sku, 'receipts'), results.receipts[5])
+    assert cube.rows([sku, 'NO SUCH SKU']).tolist() == [cube.row(sku), -1]
+    with pytest.raises(KeyError):
+        cube.row('NO SUCH SKU')
+    month = context.all_months[-1]
+    assert cube.value('demand', sku, f"{month:%Y-%m}") == results.demand[5, -1]
+
+    for category, positions in context.category_partitions.items():
+        np.testing.assert_array_equal(cube.category(str(category), 'demand'), results.demand[positions])
+    category = cube.categories[0]
+    frame = cube.frame('demand', category=category, months=slice(f"{context.all_months[1]:%Y-%m}", None))
+    assert list(frame.columns) == list(context.all_months[1:]) and len(frame) == len(cube.category(category, 'demand'))
+
+
+def test_rebuild_switches_readers_atomically(context, results, tmp_path):
+    cube_dir = str(tmp_path / 'cube')
+    write_cube(cube_dir, context, results)
+    before = ForecastCube(cube_dir)
+    expected = np.array(before['demand'])
+
+    # Rebuild with reversed SKU labels and doubled demand while the first reader has mapped nothing else
+    reversed_master = context.sku_master.assign(SKU=context.sku_master['SKU'].to_numpy()[::-1])
+    rebuilt = SimpleNamespace(**{**vars(context), 'sku_master': reversed_master})
+    doubled = SimpleNamespace(**{**vars(results), 'demand': results.demand * 2})
+    write_cube(cube_dir, rebuilt, doubled)
+
+    # The open reader still sees labels and arrays of the build it was opened on
+    np.testing.assert_array_equal(before['demand'], expected)
+    np.testing.assert_array_equal(before['projected_eom'], results.projected_eom[np.asarray(before.sku_master_rows)])
+    sku = context.sku_master['SKU'].iloc[0]
+    np.testing.assert_array_equal(before.sku(sku, 'demand'), results.demand[0])
+
+    after = ForecastCube(cube_dir)
+    np.testing.assert_array_equal(after['demand'], expected * 2)
+    np.testing.assert_array_equal(after.sku(sku, 'demand'), results.demand[len(context.sku_master) - 1] * 2)
+
+    # One more build keeps only the current and previous data directories
+    write_cube(cube_dir, context, results)
+    data_dirs = sorted(entry for entry in os.listdir(cube_dir) if entry.startswith('data-'))
+    assert len(data_dirs) == 2 and after.meta['data_dir'] in data_dirs
+    assert not [entry for entry in os.listdir(cube_dir) if entry.endswith(('.npy', '.tmp'))]
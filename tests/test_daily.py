@@ -0,0 +1,65 @@
+"""Daily forecast and projected inventory."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from demand_forecast.daily import DailyProfile, daily_forecast
+
+
+def test_profile_weights_sum_to_one_per_month():
+    dates = pd.date_range('2024-01-01', '2024-06-30', freq='D')
+    # Saturdays sell three times as much
+    units = np.where(dates.dayofweek == 5, 3.0, 1.0)
+    profile = DailyProfile.fit(pd.DataFrame({'DATE': dates, 'UNITS_SOLD': units}))
+    assert profile.dow[5] == pytest.approx(3 * profile.dow[0])
+
+    days = pd.date_range('2025-02-01', '2025-03-31', freq='D')
+    weights = profile.weights(days)
+    sums = pd.Series(weights).groupby(days.month).sum()
+    np.testing.assert_allclose(sums.to_numpy(), 1.0)
+    assert weights[days.get_loc('2025-02-01')] > weights[days.get_loc('2025-02-03')]  # Saturday vs Monday
+    empty = DailyProfile.fit(pd.DataFrame({'DATE': [], 'UNITS_SOLD': []}))
+    assert (empty.dow == 1).all() and (empty.dom == 1).all()
+
+
+def test_daily_forecast_adds_up(context, results):
+    profile = DailyProfile(np.linspace(1, 2, 7), np.ones(31))
+    forecast = daily_forecast(context, profile)
+
+    units = forecast.units()
+    for month in range(forecast.monthly_units.shape[1]):
+        np.testing.assert_allclose(
+            units[:, forecast.day_month == month].sum(axis=1), forecast.monthly_units[:, month], rtol=1e-5
+        )
+    by_day = forecast.revenue_by_day()
+    assert by_day['UNITS'].sum() == pytest.approx(forecast.monthly_units.sum(dtype=float), rel=1e-6)
+    by_category = forecast.revenue_by_category()
+    assert by_category['REVENUE'].sum() <= by_day['REVENUE'].sum() * (1 + 1e-9)
+    # The daily window includes the first forecast month of the monthly model
+    first_forecast_month = pd.Timestamp(context.forecast_months[0])
+    month_starts = forecast.days[forecast.days.day == 1]
+    col = int(forecast.day_month[forecast.days.get_loc(first_forecast_month)])
+    assert month_starts[col] == first_forecast_month
+    np.testing.assert_allclose(forecast.monthly_units[:, col], results.forecast[:, 0], rtol=1e-6)
+
+
+def test_projection_from_as_of(context):
+    as_of = pd.Timestamp(context.current_date).normalize() + pd.Timedelta(days=3)
+    forecast = daily_forecast(context, as_of=as_of)
+    start = forecast.as_of_col
+    assert np.isnan(forecast.projected[:, :start]).all()
+
+    receipts = forecast.receipts.to_dense()[:, start:].sum(axis=1)
+    demand = forecast.units()[:, start:].sum(axis=1)
+    on_hand = context.sku_master['AVAILABLE_ON_HAND_QTY'].to_numpy(dtype=float)
+    np.testing.assert_allclose(forecast.projected[:, -1], on_hand + receipts - demand, rtol=1e-4, atol=1e-2)
+
+    stockouts = forecast.stockouts()
+    assert (stockouts['FIRST_STOCKOUT_DATE'] >= as_of).all()
+    assert stockouts['FIRST_STOCKOUT_DATE'].is_monotonic_increasing
+    assert (stockouts['MIN_PROJECTED_INV'] < 0).all()
+
+
+def test_as_of_outside_window(context):
+    with pytest.raises(ValueError, match='outside the daily window'):
+        daily_forecast(context, as_of=pd.Timestamp(context.current_date) + pd.DateOffset(months=3))
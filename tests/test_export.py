@@ -0,0 +1,54 @@
+"""The streaming 'fast' Excel writer against the original cell-by-cell writer."""
+import pytest
+
+from demand_forecast import category_subtotals, export_category_workbooks, export_workbook, sheet_name_for
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def sheet_cells(path):
+    """Value and styling of every cell, by sheet"""
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    cells = {}
+    for worksheet in workbook.worksheets:
+        cells[worksheet.title] = [[cell_style(cell) for cell in row] for row in worksheet.iter_rows()]
+    return cells
+
+
+def cell_style(cell):
+    if not hasattr(cell, 'fill'):
+        # Empty cell without formatting
+        return None
+    font, fill = cell.font, cell.fill
+    font_color = font.color.rgb if font is not None and font.color is not None else None
+    return (
+        None if cell.value == '' else cell.value, cell.number_format, fill.fgColor.rgb if fill is not None else None,
+        font_color, font.b if font is not None else None,
+    )
+
+
+@pytest.mark.parametrize('with_subtotals', [False, True])
+def test_fast_writer_matches_legacy_writer(context, results, tmp_path, with_subtotals):
+    subtotals = category_subtotals(context, results) if with_subtotals else None
+    fast = export_workbook(context, results, str(tmp_path / 'fast.xlsx'), mode='fast', subtotals=subtotals)
+    legacy = export_workbook(context, results, str(tmp_path / 'legacy.xlsx'), mode='legacy', subtotals=subtotals)
+
+    fast_cells, legacy_cells = sheet_cells(fast), sheet_cells(legacy)
+    assert list(fast_cells) == [sheet_name_for(category) for category in context.category_partitions]
+    assert fast_cells == legacy_cells
+
+
+def test_unknown_writer_mode(context, results, tmp_path):
+    with pytest.raises(ValueError, match='Unknown Excel writer mode'):
+        export_workbook(context, results, str(tmp_path / 'out.xlsx'), mode='bulk')
+
+
+def test_parallel_category_workbooks_match_the_serial_workbook(context, results, tmp_path):
+    serial = sheet_cells(export_workbook(context, results, str(tmp_path / 'serial.xlsx')))
+    categories = list(context.category_partitions)[:4]
+    written = export_category_workbooks(context, results, str(tmp_path / 'categories'), categories, workers=2)
+
+    assert [category for category, _path, _skus in written] == categories
+    for category, path, n_skus in written:
+        assert n_skus == len(context.category_partitions[category])
+        assert sheet_cells(path) == {sheet_name_for(category): serial[sheet_name_for(category)]}
@@ -0,0 +1,33 @@
+"""Long-format fact table output."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from demand_forecast import FACT_COLUMNS, write_fact_tables
+
+pytest.importorskip('pyarrow')
+
+
+def test_fact_tables_round_trip(context, results, tmp_path):
+    partitions = context.category_partitions
+    written = write_fact_tables(
+        str(tmp_path / 'facts'), partitions, context.sku_master, results.sheet_data(context),
+        csv_path=str(tmp_path / 'facts.csv'),
+    )
+    n_months = len(context.all_months)
+    assert written['rows'] == sum(len(positions) for positions in partitions.values()) * n_months
+
+    facts = pd.read_parquet(written['parquet'])
+    csv = pd.read_csv(written['csv'])
+    assert list(csv.columns) == FACT_COLUMNS and len(facts) == len(csv) == written['rows']
+
+    # One SKU's rows hold its matrix rows, with committed only in the current month
+    row = next(iter(partitions.values()))[0]
+    sku = context.sku_master['SKU'].iloc[row]
+    sku_facts = facts[facts['SKU'] == sku].sort_values('MONTH')
+    np.testing.assert_array_equal(sku_facts['SALES_DEMAND'], results.demand[row])
+    np.testing.assert_array_equal(sku_facts['PROJECTED_EOM_INV'], results.projected_eom[row])
+    committed = np.zeros(n_months)
+    committed[context.current_month_col] = context.sku_master['QTY_COMMITTED'].iloc[row]
+    np.testing.assert_array_equal(sku_facts['COMMITTED_QTY'], committed)
+    assert sku_facts['IS_FORECAST'].tolist() == list(context.all_months > context.current_date)
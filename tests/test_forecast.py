@@ -0,0 +1,45 @@
+"""The vectorized forecast engine against the per-cell calculate_forecast()."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from demand_forecast import build_curve_matrix, calculate_forecast, compute_forecast, forecast_matrix
+
+
+def legacy_forecast(skus, planning_categories, forecast_months, ros_lookup, curve_data):
+    return np.array([
+        [calculate_forecast(sku, planning_category, month, ros_lookup, curve_data) for month in forecast_months]
+        for sku, planning_category in zip(skus, planning_categories)
+    ])
+
+
+def test_forecast_matrix_matches_calculate_forecast(context):
+    sku_master = context.sku_master
+    forecast = compute_forecast(context)
+    expected = legacy_forecast(
+        sku_master['SKU'], sku_master['PLANNING_CATEGORY'], context.forecast_months, context.ros_lookup,
+        context.curve_data,
+    )
+    assert forecast.shape == (len(sku_master), len(context.forecast_months))
+    np.testing.assert_allclose(forecast, expected, rtol=1e-12, atol=0)
+
+
+def test_unmapped_and_missing_categories_keep_the_base_rate():
+    months = [datetime(2026, month, 1) for month in (1, 6, 12)]
+    curve_data = pd.DataFrame(
+        [[0.05] * 12, [0.1] * 12],
+        index=['BEDDING', 'RUGS'],
+        columns=[datetime(2026, month, 1) for month in range(1, 13)],
+    )
+    skus = ['A', 'B', 'C', 'D', 'E']
+    # Mapped, prefix-matched, unknown, missing and a curve category without curve data
+    planning_categories = ['BEDDING - DUVETS', 'RUGS - NEW', 'GARDEN', None, 'TABLEWARE']
+    ros_lookup = {'A': 1.0, 'B': 2.0, 'C': 0.5, 'D': 3.0}
+
+    ros = np.array([ros_lookup.get(sku, 0) for sku in skus])
+    forecast = forecast_matrix(ros, build_curve_matrix(planning_categories, curve_data), months)
+    expected = legacy_forecast(skus, planning_categories, months, ros_lookup, curve_data)
+    np.testing.assert_allclose(forecast, expected, rtol=1e-12, atol=0)
+    np.testing.assert_allclose(forecast[2], 15.0)
+    np.testing.assert_allclose(forecast[4], 0.0)
@@ -0,0 +1,58 @@
+"""Hierarchy rollups against pandas groupby."""
+import numpy as np
+import pandas as pd
+
+from demand_forecast.hierarchy import (
+    UNKNOWN_GROUP, HierarchyIndex, HierarchyLevel, category_subtotals, hierarchy_summary,
+)
+
+
+def test_rollups_match_groupby(context, results):
+    hierarchy = HierarchyIndex.from_sku_master(context.sku_master)
+    demand = results.demand.astype(float)
+    for name in ('PLANNING_CATEGORY', 'COLLECTION', 'VENDOR_NAME'):
+        labels = context.sku_master[name].astype(object).where(context.sku_master[name].notna(), None)
+        keys = [UNKNOWN_GROUP if value is None or str(value).strip() in ('', '0', 'nan') else str(value).strip()
+                for value in labels]
+        expected = pd.DataFrame(demand).groupby(keys).sum()
+        rolled = hierarchy[name].frame(demand)
+        np.testing.assert_allclose(rolled.loc[expected.index].to_numpy(), expected.to_numpy())
+        assert hierarchy[name].sizes().sum() == len(context.sku_master)
+
+
+def test_rollup_keeps_all_nan_columns_and_weights():
+    level = HierarchyLevel.from_codes('TEST', [0, 1, 0], ['A', 'B'])
+    values = np.array([[np.nan, 1.0, np.nan], [np.nan, np.nan, 2.0], [np.nan, 3.0, 4.0]])
+    totals = level.rollup(values)
+    assert np.isnan(totals[:, 0]).all()
+    np.testing.assert_array_equal(totals[:, 1:], [[4.0, 4.0], [0.0, 2.0]])
+    np.testing.assert_array_equal(level.rollup(np.array([1.0, 2.0, 3.0]), weights=[10, 1, 2]), [16.0, 2.0])
+
+
+def test_combine_and_parents():
+    sku_master = pd.DataFrame({
+        'PLANNING_CATEGORY': ['BEDDING - DUVETS', 'BEDDING - SHEETS', 'RUGS', None],
+        'CATEGORY': ['BEDDING', 'BEDDING', 'RUGS', ''],
+        'COLLECTION': ['X', 'Y', 'X', 'X'],
+    })
+    hierarchy = HierarchyIndex.from_sku_master(sku_master, levels=('PLANNING_CATEGORY', 'CURVE_CATEGORY', 'CATEGORY',
+                                                                   'COLLECTION'))
+    assert list(hierarchy['CURVE_CATEGORY'].labels) == ['BEDDING', 'RUGS', UNKNOWN_GROUP]
+    parents = hierarchy.parents('PLANNING_CATEGORY', 'CATEGORY')
+    assert parents['BEDDING - SHEETS'] == 'BEDDING' and parents[UNKNOWN_GROUP] == UNKNOWN_GROUP
+    combined = hierarchy.combine('CATEGORY', 'COLLECTION')
+    assert combined.n_groups == 4 and combined.sizes().tolist() == [1, 1, 1, 1]
+
+
+def test_summary_and_subtotals_add_up(context, results):
+    summary = hierarchy_summary(context, results, levels=['PLANNING_CATEGORY', 'CATEGORY'], measures=['Sales Demand'])
+    month_totals = summary.groupby('LEVEL')[list(context.all_months)].sum()
+    np.testing.assert_allclose(month_totals.to_numpy(), np.tile(results.demand.sum(axis=0), (2, 1)))
+
+    subtotals = category_subtotals(context, results)
+    for category, blocks in subtotals.items():
+        total = blocks[-1]['rows']['Sales Demand']
+        collection_sum = sum(block['rows']['Sales Demand'] for block in blocks[:-1])
+        np.testing.assert_allclose(collection_sum, total)
+        rows = context.category_partitions[category]
+        np.testing.assert_allclose(total, results.demand[rows].sum(axis=0))
@@ -0,0 +1,74 @@
+"""Incremental planning: only SKUs whose inputs changed are recomputed."""
+from dataclasses import replace
+
+import numpy as np
+
+from demand_forecast import (
+    load_run_state,
+    model_fingerprint,
+    plan_incremental_run,
+    run_forecast,
+    run_model,
+    save_run_state,
+    sku_input_fingerprints,
+)
+
+
+def fingerprints(context):
+    return sku_input_fingerprints(context.sku_master, context.sku_ros, context.sales_agg, context.on_order_agg)
+
+
+def save_state(state_dir, context, results):
+    save_run_state(
+        state_dir, context.sku_master['SKU'], context.sku_master['PLANNING_CATEGORY'], fingerprints(context),
+        model_fingerprint(context.curve_data, context.all_months, context.current_date), results.matrices(), 1.0,
+    )
+    return load_run_state(state_dir)
+
+
+def plan_for(context, previous):
+    return plan_incremental_run(
+        previous, context.sku_master['SKU'], context.sku_master['PLANNING_CATEGORY'], fingerprints(context),
+        model_fingerprint(context.curve_data, context.all_months, context.current_date),
+    )
+
+
+def test_changed_ros_recomputes_one_sku(context, results, tmp_path):
+    previous = save_state(str(tmp_path), context, results)
+    assert not plan_for(context, previous)['changed_skus']
+
+    sku = next(sku for sku in context.sku_master['SKU'] if sku in context.ros_lookup)
+    changed = replace(context, ros_lookup={**context.ros_lookup, sku: context.ros_lookup[sku] * 2 + 1})
+    plan = plan_for(changed, previous)
+    assert not plan['full']
+    assert plan['changed_skus'] == [sku]
+    assert plan['changed_by_source']['ros'] == 1
+    row = int(np.flatnonzero(changed.sku_master['SKU'] == sku)[0])
+    assert plan['affected_categories'] == {str(changed.sku_master['PLANNING_CATEGORY'].iloc[row])}
+
+    incremental = run_forecast(changed, plan, previous)
+    full = run_forecast(changed)
+    for name, matrix in full.matrices().items():
+        np.testing.assert_array_equal(incremental.matrices()[name], matrix, err_msg=name)
+
+
+def test_model_change_forces_full_rebuild(context, results, tmp_path):
+    previous = save_state(str(tmp_path), context, results)
+    curve_data = context.curve_data * 1.1
+    plan = plan_for(replace(context, curve_data=curve_data), previous)
+    assert plan['full'] and 'curve' in plan['reason']
+    assert plan_incremental_run(None, ['A'], ['X'], np.zeros((1, 4), dtype=np.uint64), 'fp')['full']
+
+
+def test_subtotals_change_forces_full_rebuild(context, tmp_path):
+    output_file, state_dir = str(tmp_path / 'model.xlsx'), str(tmp_path / 'state')
+
+    def run(subtotals):
+        return run_model(context, output_file, incremental=True, state_dir=state_dir, subtotals=subtotals)['plan']
+
+    assert run(False)['full']
+    assert not run(False)['full']
+    plan = run(True)
+    assert plan['full'] and 'subtotals' in plan['reason']
+    assert not run(True)['full']
+    assert run(False)['full']
@@ -0,0 +1,61 @@
+"""Stage spans and the JSON run report."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from demand_forecast import NULL_REPORT, RunReport, instrumentation, load_context, run_forecast
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_run_report_records_stages(synthetic_paths, history_start, tmp_path):
+    report = RunReport(profile_stages=['forecast'], metadata={'run': 'test'})
+    context = load_context(synthetic_paths, history_start=history_start, report=report)
+    run_forecast(context, report=report)
+
+    stages = report.stages()
+    assert list(stages) == ['load', 'aggregate', 'forecast', 'projection']
+    assert stages['aggregate']['counts']['skus'] == len(context.sku_master)
+    assert stages['forecast']['profile']['top']
+    assert all(record['wall_seconds'] >= 0 for record in report.spans)
+
+    with open(report.write(str(tmp_path / 'report.json'))) as f:
+        written = json.load(f)
+    assert written['metadata'] == {'run': 'test'} and len(written['spans']) == len(report.spans)
+
+
+def test_spans_nest_and_record_errors():
+    report = RunReport()
+    with pytest.raises(KeyError):
+        with report.span('export') as export:
+            export.count('sheets', 2)
+            with report.span('sheet', label='RUGS'):
+                raise KeyError('boom')
+    sheet, export = report.spans
+    assert (sheet['parent'], sheet['label'], sheet['error']) == ('export', 'RUGS', 'KeyError')
+    assert export['counts'] == {'sheets': 2} and export['parent'] is None
+
+    with NULL_REPORT.span('anything', rows=1) as span:
+        span.count('rows')
+
+
+def test_report_without_resource_module(monkeypatch):
+    # Windows has no resource module; the peak RSS is then unknown
+    monkeypatch.setattr(instrumentation, 'resource', None)
+    assert instrumentation.peak_rss_mb() is None
+    report = RunReport()
+    with report.span('load'):
+        pass
+    assert report.spans[0]['peak_rss_mb'] is None
+    assert report.summary_lines()[0].startswith('load')
+
+
+def test_package_imports_without_resource_module():
+    code = (
+        "import sys; sys.modules['resource'] = None; "
+        "import demand_forecast; assert demand_forecast.instrumentation.resource is None"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=REPO_ROOT)
@@ -0,0 +1,25 @@
+"""Chunked streaming of the sales extract against loading it whole."""
+import pandas as pd
+
+from demand_forecast import aggregate_sales, read_sales, read_sales_aggregate
+
+
+def sorted_aggregate(sales_agg):
+    sales_agg = sales_agg.assign(SKU=sales_agg['SKU'].astype(str))
+    return sales_agg.sort_values(['SKU', 'MONTH']).reset_index(drop=True)
+
+
+def test_streamed_aggregate_matches_whole_file(synthetic_paths):
+    expected = sorted_aggregate(aggregate_sales(read_sales(synthetic_paths['sales'])))
+    # Chunks small enough that partial aggregates are folded several times
+    streamed = read_sales_aggregate(synthetic_paths['sales'], chunksize=97)
+    assert isinstance(streamed['SKU'].dtype, pd.CategoricalDtype)
+    assert streamed['SALES_DEMAND'].dtype == expected['SALES_DEMAND'].dtype
+    pd.testing.assert_frame_equal(sorted_aggregate(streamed), expected)
+
+
+def test_empty_sales_extract(tmp_path):
+    path = tmp_path / 'sales.csv'
+    path.write_text('ORDER_ID,COMPONENT_SKU,ORDER_DATE,ORDER_MONTH,UNITS_SOLD\n')
+    sales_agg = read_sales_aggregate(str(path), chunksize=10)
+    assert list(sales_agg.columns) == ['SKU', 'MONTH', 'SALES_DEMAND'] and len(sales_agg) == 0
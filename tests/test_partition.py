@@ -0,0 +1,34 @@
+"""Category partitioning and SKU ranking against the original per-SKU loop."""
+import numpy as np
+import pandas as pd
+
+from demand_forecast import average_sales, partition_skus
+
+
+def legacy_average(sales_pivot, sku):
+    if sku not in sales_pivot.index:
+        return 0
+    sku_sales = sales_pivot.loc[sku]
+    return sku_sales[sku_sales > 0].mean() if len(sku_sales[sku_sales > 0]) > 0 else 0
+
+
+def test_average_sales_matches_sales_pivot(context):
+    expected = [legacy_average(context.sales_pivot, sku) for sku in context.sku_master['SKU']]
+    np.testing.assert_allclose(context.sku_avg_sales, expected, rtol=1e-12)
+
+
+def test_average_counts_months_outside_the_history_window():
+    sales_agg = pd.DataFrame({
+        'SKU': pd.Categorical(['A', 'A', 'A', 'B', 'B', 'C']),
+        'MONTH': pd.to_datetime(['2019-01-01', '2025-11-01', '2025-12-01', '2025-11-01', '2025-12-01', '2025-12-01']),
+        'SALES_DEMAND': np.array([30, 3, 0, 4, 6, 0], dtype=np.int32),
+    })
+    averages = average_sales(sales_agg, ['A', 'B', 'C', 'D', 'A'])
+    np.testing.assert_allclose(averages, [16.5, 5.0, 0.0, 0.0, 16.5])
+
+    sku_master = pd.DataFrame({'SKU': ['A', 'B', 'C', 'D'], 'PLANNING_CATEGORY': ['X', 'X', 'Y', 'X']})
+    partitions = partition_skus(sku_master, average_sales(sales_agg, sku_master['SKU']))
+    assert list(partitions) == ['X', 'Y']
+    # Ranked highest first; ties keep sku_master order
+    assert partitions['X'].tolist() == [0, 1, 3]
+    assert partitions['Y'].tolist() == [2]
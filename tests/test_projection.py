@@ -0,0 +1,46 @@
+"""Cumulative-sum EOM projection against the original per-SKU running total."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from demand_forecast import project_eom_inventory, stockout_summary
+
+
+def legacy_projection(on_hand, receipts, demand, all_months, current_date):
+    projected = np.full(demand.shape, np.nan)
+    for row in range(len(demand)):
+        running_inv = on_hand[row]
+        for month_idx, month in enumerate(all_months):
+            if month >= current_date:
+                running_inv = running_inv + receipts[row, month_idx] - demand[row, month_idx]
+                projected[row, month_idx] = running_inv
+    return projected
+
+
+def test_projection_matches_running_total(context, results):
+    on_hand = context.sku_master['AVAILABLE_ON_HAND_QTY'].to_numpy(dtype=float)
+    expected = legacy_projection(
+        on_hand, results.receipts.astype(float), results.demand.astype(float), context.all_months,
+        context.current_date,
+    )
+    assert np.array_equal(np.isnan(results.projected_eom), np.isnan(expected))
+    np.testing.assert_allclose(results.projected_eom, expected, rtol=1e-6, atol=1e-2, equal_nan=True)
+
+
+def test_stockout_summary():
+    all_months = pd.date_range(datetime(2025, 10, 1), periods=5, freq='MS')
+    demand = np.array([[9, 9, 5, 5, 5], [0, 0, 1, 1, 1]])
+    receipts = np.array([[0, 0, 0, 10, 0], [0, 0, 0, 0, 0]], dtype=np.float32)
+    projected = project_eom_inventory([7, 10], receipts, demand, projection_start=2)
+
+    assert np.isnan(projected[:, :2]).all()
+    np.testing.assert_array_equal(projected[0, 2:], [2, 7, 2])
+
+    summary = stockout_summary(['A', 'B'], projected, all_months, projection_start=2)
+    assert summary['FIRST_STOCKOUT_MONTH'].isna().tolist() == [True, True]
+    projected[0, 4] = -1
+    summary = stockout_summary(['A', 'B'], projected, all_months, projection_start=2)
+    assert summary.loc[0, 'FIRST_STOCKOUT_MONTH'] == all_months[4]
+    assert summary['STOCKOUT_MONTHS'].tolist() == [1, 0]
+    assert summary['MIN_PROJECTED_EOM'].tolist() == [-1, 7]
@@ -0,0 +1,70 @@
+"""Sparse receipts store and on-order schema resolution."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from demand_forecast.receipts import OnOrderSchema, ReceiptsStore
+
+MONTHS = pd.date_range('2024-01-01', periods=4, freq='MS')
+
+
+def dense_reference(keys, months, quantities, target_keys):
+    dense = np.zeros((len(target_keys), len(MONTHS)))
+    for key, month, quantity in zip(keys, months, quantities):
+        if month in MONTHS:
+            for row, target in enumerate(target_keys):
+                if target == key:
+                    dense[row, MONTHS.get_loc(month)] += 0 if pd.isna(quantity) else quantity
+    return dense
+
+
+def test_from_records_matches_dense_reference():
+    keys = ['A', 'B', 'A', 'A', 'C', 'B', 'Z']
+    months = pd.to_datetime(
+        ['2024-03-01', '2024-01-01', '2024-03-01', '2024-01-01', '2023-12-01', '2024-04-01', '2024-02-01']
+    )
+    quantities = [5, 2, 3, np.nan, 9, 4, 1]
+    # Duplicate target, a target without receipts, and unordered targets
+    target_keys = ['B', 'A', 'D', 'A']
+
+    store = ReceiptsStore.from_records(keys, months, quantities, target_keys, MONTHS)
+
+    expected = dense_reference(keys, months, quantities, target_keys)
+    np.testing.assert_array_equal(store.to_dense(), expected)
+    assert store.n_rows == 4 and store.n_months == 4
+    # A's two March records are summed into one entry; C and Z are dropped
+    assert store.nnz == 2 + 2 + 0 + 2
+    cols, qty = store.row(1)
+    assert cols.tolist() == [0, 2] and qty.tolist() == [0, 8]
+    np.testing.assert_array_equal(store.to_dense([3, 0]), expected[[3, 0]])
+    assert store.to_dense([2]).sum() == 0
+
+
+def test_to_coo_numbers_rows_in_request_order():
+    store = ReceiptsStore.from_records(
+        ['A', 'B'], pd.to_datetime(['2024-02-01', '2024-04-01']), [1, 2], ['A', 'B'], MONTHS
+    )
+    rows, cols, qty = store.to_coo([1, 0])
+    assert rows.tolist() == [0, 1] and cols.tolist() == [3, 1] and qty.tolist() == [2, 1]
+
+
+def test_from_columns_drops_out_of_range():
+    store = ReceiptsStore.from_columns(['A', 'A', 'A', 'B'], [0, 6, -1, 6], [1, 2, 3, 4], ['A', 'B'], 7)
+    np.testing.assert_array_equal(store.to_dense(), [[1, 0, 0, 0, 0, 0, 2], [0, 0, 0, 0, 0, 0, 4]])
+
+
+def test_empty_records():
+    store = ReceiptsStore.from_records([], pd.to_datetime([]), [], ['A', 'B'], MONTHS)
+    assert store.nnz == 0 and store.to_dense().shape == (2, 4)
+
+
+def test_schema_detects_columns_by_timing():
+    columns = ['Item Number', 'Qty On Order', 'Estimate ECSD Date', 'Estimate Land Date Date']
+    assert OnOrderSchema().resolve(columns).date == 'Estimate Land Date Date'
+    schema = OnOrderSchema(timing='ecsd').resolve(columns)
+    assert (schema.sku, schema.quantity, schema.date) == ('Item Number', 'Qty On Order', 'Estimate ECSD Date')
+    assert OnOrderSchema().resolve(['Item Number']) is None
+    with pytest.raises(ValueError):
+        OnOrderSchema(timing='ship').resolve(columns)
+    with pytest.raises(ValueError):
+        OnOrderSchema(sku='SKU').resolve(columns)
@@ -0,0 +1,78 @@
+"""Replenishment recommendations on a hand-built projection."""
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from demand_forecast.replenishment import parse_moq, recommend_orders
+
+START = 6
+MONTHS = pd.date_range('2025-01-01', periods=12, freq='MS')
+
+
+@pytest.fixture
+def case():
+    sku_master = pd.DataFrame({
+        'SKU': ['A', 'B', 'C', 'D'],
+        'PLANNING_CATEGORY': ['RUGS'] * 4,
+        'VENDOR_NAME': ['V1', 'V2', 'V1', 'V1'],
+        'TOTAL_LEAD_TIME': [60, 120, 60, 60],
+        'ITEM_MOQS': ['8 UNITS', None, 0, 0],
+        'VENDOR_COST_USD': [2.0, 3.0, 1.0, 1.0],
+        'IS_MTO': [False, False, True, False],
+        'IS_DROPSHIP': [False, False, False, False],
+    })
+    sales = np.zeros((4, START + 1))
+    sales[0, :START] = [10, 20, 10, 20, 10, 20]  # std 5
+    projected = np.full((4, len(MONTHS)), np.nan)
+    projected[:, START:] = [
+        [100, 80, 5, -10, -20, -30],
+        [50, -5, -5, -5, -5, -5],
+        [-1, -1, -1, -1, -1, -1],
+        [9, 9, 9, 9, 9, 9],
+    ]
+    context = SimpleNamespace(
+        sku_master=sku_master, all_months=MONTHS, projection_start=START, sales_units=sales,
+        current_date=pd.Timestamp('2025-07-10'),
+    )
+    return context, SimpleNamespace(projected_eom=projected)
+
+
+def test_orders(case):
+    plan = recommend_orders(*case, service_level=0.95)
+    # A: ceil(1.645 x 5 x sqrt(2 lead + 1 review)) = 15; B, C, D have no sales spread
+    assert plan.safety_stock.tolist() == [15, 0, 0, 0]
+    # A is short in month 2 when an order can land: 15 - 5 = 10, above its MOQ of 8
+    # B is short in month 1 but only an order landing in month 4 can help: 0 - (-5) = 5
+    assert plan.order_qty.tolist() == [10, 5, 0, 0]
+    assert plan.order_by_col.tolist() == [START, START, -1, -1]
+
+    orders = plan.orders.set_index('SKU')
+    assert list(orders.index) == ['A', 'B']
+    assert orders.loc['A', 'ARRIVAL_MONTH'] == MONTHS[START + 2]
+    assert not orders.loc['A', 'EXPEDITE'] and orders.loc['B', 'EXPEDITE']
+    assert orders.loc['B', 'ORDER_BY_DATE'] == pd.Timestamp('2025-07-10')
+    assert orders.loc['A', 'ORDER_COST_USD'] == 20.0
+    assert plan.by_vendor['VENDOR_NAME'].tolist() == ['V1', 'V2']  # same date, larger cost first
+    assert plan.by_vendor['EXPEDITE_SKUS'].tolist() == [0, 1]
+
+
+def test_moq_rounding(case):
+    context, results = case
+    context.sku_master['ITEM_MOQS'] = ['8 UNITS', 24, 0, 0]
+    assert recommend_orders(context, results).order_qty.tolist() == [10, 24, 0, 0]
+    assert recommend_orders(context, results, moq_multiple=True).order_qty.tolist() == [16, 24, 0, 0]
+
+
+def test_lower_service_level_needs_less_stock(case):
+    low = recommend_orders(*case, service_level=0.5)
+    assert low.safety_stock.tolist() == [0, 0, 0, 0]
+    with pytest.raises(ValueError):
+        recommend_orders(*case, service_level=1.0)
+    with pytest.raises(ValueError):
+        recommend_orders(*case, review_months=0)
+
+
+def test_parse_moq():
+    assert [parse_moq(value) for value in (12, '100 UNITS, 50 UNITS', 'n/a', None, np.nan, -3)] == [12, 100, 0, 0, 0, 0]
@@ -0,0 +1,67 @@
+"""Batched what-if scenarios against the single-run projection."""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from demand_forecast import run_forecast
+from demand_forecast.scenarios import Scenario, run_scenarios
+
+
+def expected_totals(context, results):
+    window = slice(context.projection_start, None)
+    stockout = results.projected_eom[:, window] < 0
+    first_col = np.where(stockout.any(axis=1), stockout.argmax(axis=1) + context.projection_start, -1)
+    return {
+        'STOCKOUT_SKUS': int(stockout.any(axis=1).sum()),
+        'ENDING_INVENTORY': float(results.projected_eom[:, -1].sum()),
+        'FORECAST_UNITS': float(np.rint(results.forecast).sum()),
+    }, first_col
+
+
+def test_scenarios_match_run_forecast(context, results):
+    scaled = dataclasses.replace(context, ros_lookup={sku: ros * 1.5 for sku, ros in context.ros_lookup.items()})
+    outcome = run_scenarios(
+        context, [Scenario('base'), Scenario('up 50%', ros_multipliers={'*': 1.5})], block_skus=97
+    )
+
+    for s, scenario_results in enumerate((results, run_forecast(scaled))):
+        totals, first_col = expected_totals(context, scenario_results)
+        row = outcome.summary.iloc[s]
+        assert row['STOCKOUT_SKUS'] == totals['STOCKOUT_SKUS']
+        assert row['ENDING_INVENTORY'] == pytest.approx(totals['ENDING_INVENTORY'], rel=1e-6)
+        assert row['FORECAST_UNITS'] == pytest.approx(totals['FORECAST_UNITS'], rel=1e-6)
+        np.testing.assert_array_equal(outcome.first_stockout_col[s], first_col)
+
+    # Category rows add up to the summary
+    by_scenario = outcome.categories.groupby('SCENARIO', sort=False)[['SKUS', 'STOCKOUT_SKUS']].sum()
+    np.testing.assert_array_equal(by_scenario.to_numpy(), outcome.summary[['SKUS', 'STOCKOUT_SKUS']].to_numpy())
+
+
+def test_late_receipts_drop_out_of_window(context):
+    outcome = run_scenarios(context, [Scenario('base'), Scenario('never', receipt_delays={'*': 1000})])
+    base, never = outcome.summary.iloc[0], outcome.summary.iloc[1]
+    assert base['RECEIPT_UNITS'] > 0 and never['RECEIPT_UNITS'] == 0
+    assert never['ENDING_INVENTORY'] == pytest.approx(base['ENDING_INVENTORY'] - base['RECEIPT_UNITS'], rel=1e-6)
+    assert never['FORECAST_UNITS'] == base['FORECAST_UNITS']
+    assert never['STOCKOUT_SKUS'] >= base['STOCKOUT_SKUS']
+
+
+def test_most_specific_key_wins(context):
+    category = context.sku_master['PLANNING_CATEGORY'].dropna().iloc[0]
+    outcome = run_scenarios(
+        context, [Scenario('mixed', ros_multipliers={'*': 0, category: 1})], block_skus=len(context.sku_master)
+    )
+    base = run_scenarios(context, [Scenario('base')])
+    forecast = outcome.categories.set_index('PLANNING_CATEGORY')['FORECAST_UNITS']
+    assert forecast[category] == base.categories.set_index('PLANNING_CATEGORY')['FORECAST_UNITS'][category]
+    assert forecast.drop(category).sum() == 0
+
+
+def test_bad_scenarios_raise(context):
+    with pytest.raises(ValueError, match='unknown curve'):
+        run_scenarios(context, [Scenario('bad', curves={'*': 'NO SUCH CURVE'})])
+    with pytest.raises(ValueError, match='12 monthly values'):
+        run_scenarios(context, [Scenario('bad', curves={'*': [1, 2]})])
+    with pytest.raises(ValueError, match='Unknown scenario keys'):
+        Scenario.from_dict({'name': 'bad', 'ros': {}})
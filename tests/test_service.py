@@ -0,0 +1,89 @@
+"""Forecast query service: queries, malformed requests and failed reloads."""
+import asyncio
+import json
+
+from demand_forecast.service import ForecastService
+
+
+async def exchange(port, raw):
+    """Send raw request bytes and return (status, payload) of the response"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    status_line = await reader.readline()
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    writer.close()
+    return int(status_line.split()[1]), json.loads(body)
+
+
+def run_service(context, scenario):
+    """Serve a snapshot of context on a free port while scenario(service, port) runs"""
+    loads = {'count': 0}
+
+    def load():
+        loads['count'] += 1
+        if loads['count'] > 1:
+            raise OSError('inputs are being rewritten')
+        return context
+
+    async def main():
+        service = ForecastService(load)
+        await service.reload()
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        async with server:
+            return await scenario(service, server.sockets[0].getsockname()[1])
+
+    return asyncio.run(main())
+
+
+def test_queries_bad_requests_and_failed_reload(context):
+    sku = str(context.sku_master['SKU'].iloc[0])
+
+    async def scenario(service, port):
+        status, record = await exchange(port, f"GET /sku/{sku} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+        assert status == 200 and record['sku'] == sku
+        assert len(record['demand']) == len(context.all_months) - context.projection_start
+
+        status, error = await exchange(port, f"GET /sku/NOPE HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+        assert status == 404
+
+        for raw in (b'garbage\r\n\r\n', b'GET /health\r\n\r\n', b'\r\n',
+                    b'POST /skus HTTP/1.1\r\nContent-Length: many\r\n\r\n'):
+            status, error = await exchange(port, raw)
+            assert status == 400, raw
+            assert 'error' in error
+
+        # A failed reload answers 500 and keeps serving the previous snapshot
+        snapshot = service.snapshot
+        status, error = await exchange(port, b'POST /reload HTTP/1.1\r\nConnection: close\r\n\r\n')
+        assert status == 500 and 'inputs are being rewritten' in error['error']
+        assert service.snapshot is snapshot and service.generation == 1
+        status, health = await exchange(port, b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n')
+        assert status == 200 and health['generation'] == 1
+
+    run_service(context, scenario)
+
+
+def post_skus(body):
+    data = body.encode()
+    return f"POST /skus HTTP/1.1\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+
+
+def test_sku_batch_validates_body(context):
+    skus = [str(sku) for sku in context.sku_master['SKU'].iloc[:2]]
+
+    async def scenario(service, port):
+        status, payload = await exchange(port, post_skus(json.dumps({'skus': skus + ['NOPE']})))
+        assert status == 200 and payload['generation'] == service.snapshot.generation == 1
+        assert [record['sku'] for record in payload['results']] == skus and payload['missing'] == ['NOPE']
+
+        for body in ('[]', '"x"', '3', '{"skus": "A"}', '{"skus": [1, 2]}', '{"skus": ["A", null]}', '{'):
+            status, error = await exchange(port, post_skus(body))
+            assert status == 400, body
+            assert 'error' in error
+
+    run_service(context, scenario)
@@ -0,0 +1,135 @@
+"""Statistical forecasting backend and its fit cache."""
+import copy
+
+import numpy as np
+import pytest
+
+from demand_forecast import statistical
+from demand_forecast.statistical import (
+    FORECAST_METHODS, FitCache, StatisticalForecaster, fit_chunk, fit_croston, fit_keys, fit_ses, fit_tsb,
+    history_length,
+)
+
+
+@pytest.fixture
+def duplicate_context(context):
+    """Context where every SKU of one planning category shares one sales history"""
+    history_end = context.projection_start
+    sold = history_length(context.sales_units[:, :history_end]) >= 12
+    category = context.sku_master['PLANNING_CATEGORY'].to_numpy()[sold][0]
+    rows = np.flatnonzero((context.sku_master['PLANNING_CATEGORY'] == category).to_numpy())
+    assert len(rows) > 1
+    duplicated = copy.copy(context)
+    duplicated.sales_units = context.sales_units.copy()
+    duplicated.sales_units[rows] = context.sales_units[rows[sold[rows]][0]]
+    return duplicated, rows
+
+
+def test_duplicate_histories_are_cached_once(duplicate_context, tmp_path):
+    context, rows = duplicate_context
+    forecaster = StatisticalForecaster(cache_dir=str(tmp_path))
+    first = forecaster.forecast(context)
+    assert first.stats['fitted'] > 0 and first.stats['cached'] == 0
+    np.testing.assert_array_equal(first.level[rows], first.level[rows[0]])
+
+    second = forecaster.forecast(context)
+    assert second.stats['fitted'] == 0 and second.stats['cached'] == first.stats['fitted']
+    np.testing.assert_array_equal(second.forecast, first.forecast)
+
+    # A partial run merges into the cache instead of replacing it
+    partial = forecaster.forecast(context, rows=rows)
+    assert partial.stats['fitted'] == 0
+    assert forecaster.forecast(context).stats['fitted'] == 0
+
+
+def test_cache_tolerates_duplicate_keys_on_disk(tmp_path):
+    cache = FitCache(str(tmp_path), 'test')
+    keys = np.array([5, 3, 5], dtype=np.uint64)
+    np.savez(cache.path, keys=keys, method=np.array([1, 2, 1], dtype=np.int8), level=np.array([1.0, 2.0, 1.0]))
+    method, level, hit = cache.lookup(np.array([3, 5, 7], dtype=np.uint64))
+    assert hit.tolist() == [True, True, False]
+    assert method[:2].tolist() == [2, 1] and level[:2].tolist() == [2.0, 1.0]
+
+    cache.save(keys, np.array([1, 2, 1], dtype=np.int8), np.array([1.0, 2.0, 1.0]), merge=True)
+    with np.load(cache.path) as saved:
+        assert sorted(saved['keys'].tolist()) == [3, 5]
+
+
+def test_fit_keys_follow_history_and_curve():
+    history = np.array([[0, 1, 2], [0, 1, 2], [0, 1, 3]], dtype=np.int32)
+    curve = np.ones((3, 3))
+    keys = fit_keys(history, curve)
+    assert keys[0] == keys[1] != keys[2]
+    assert fit_keys(history[:1], curve[:1] * 2)[0] != keys[0]
+
+
+@pytest.fixture
+def one_grid_point(monkeypatch):
+    """Smoothing grids of a single point, so fitted values can be worked out by hand"""
+    monkeypatch.setattr(statistical, 'ALPHA_GRID', (0.5,))
+    monkeypatch.setattr(statistical, 'BETA_GRID', (0.5,))
+
+
+def test_fit_methods_by_hand(one_grid_point):
+    # SES from the first sale: level 4, then 4 - 0.5 x 2 = 3, then 3 + 0.5 x 3 = 4.5
+    assert fit_ses(np.array([[0.0, 4, 2, 6]]), np.array([1])).tolist() == [4.5]
+    # Croston: sizes 4 -> 3 -> 4.5, intervals 1 -> 2 (3 months since the last sale) -> 2
+    assert fit_croston(np.array([[4.0, 0, 0, 2, 0, 6]]), np.array([0])).tolist() == [2.25]
+    # TSB from size 3 and probability 0.5: probability 0.75, 0.375, 0.1875, 0.59375 and size 3.5, 2.75
+    assert fit_tsb(np.array([[4.0, 0, 0, 2]]), np.array([0])).tolist() == [0.59375 * 2.75]
+
+
+def test_ses_picks_the_alpha_with_the_lowest_error():
+    rng = np.random.default_rng(0)
+    history = rng.poisson(8, size=(20, 18)).astype(float)
+    start = np.zeros(20, dtype=np.int64)
+
+    def reference(series):
+        best = None
+        for alpha in statistical.ALPHA_GRID:
+            level, sse = series[0], 0.0
+            for x in series[1:]:
+                sse += (x - level) ** 2
+                level += alpha * (x - level)
+            if best is None or sse < best[0]:
+                best = (sse, level)
+        return best[1]
+
+    np.testing.assert_allclose(fit_ses(history, start), [reference(series) for series in history])
+
+
+def test_intermittent_skus_use_the_intermittent_method():
+    history = np.array([
+        [5, 5, 5, 5, 5, 5, 5, 5],  # sells every month: ADI 1
+        [0, 0, 0, 5, 5, 0, 5, 5],  # 4 sales over 5 active months: ADI 1.25
+        [0, 0, 0, 0, 5, 0, 5, 5],  # 3 sales over 4 active months: ADI 1.33
+        [5, 0, 5, 0, 5, 0, 5, 0],  # ADI 2
+    ], dtype=float)
+    curve = np.ones_like(history)
+    for intermittent_method in ('tsb', 'croston'):
+        method, level = fit_chunk(history, curve, intermittent_method)
+        names = [FORECAST_METHODS[m] for m in method]
+        assert names == ['ses', 'ses', intermittent_method, intermittent_method]
+    assert level[0] == 5
+    # Deseasonalised by the curve: doubling the curve halves the level
+    assert fit_chunk(history[:1], curve[:1] * 2)[1][0] == 2.5
+
+
+def test_short_histories_keep_the_ros_forecast(context, results):
+    forecaster = StatisticalForecaster(min_history_months=18)
+    forecast = forecaster.forecast(context)
+    short = history_length(context.sales_units[:, :context.projection_start]) < 18
+    assert short.any() and (~short).any()
+    assert (forecast.method[short] == FORECAST_METHODS.index('ros')).all()
+    assert np.isnan(forecast.level[short]).all()
+    np.testing.assert_array_equal(forecast.forecast[short], results.forecast[short])
+    assert (forecast.method[~short] != FORECAST_METHODS.index('ros')).all()
+    assert forecast.stats['fallback'] == short.sum()
+
+
+def test_process_pool_matches_serial_fit(context):
+    serial = StatisticalForecaster(chunk_skus=64).forecast(context)
+    pooled = StatisticalForecaster(workers=2, chunk_skus=64).forecast(context)
+    np.testing.assert_array_equal(pooled.method, serial.method)
+    np.testing.assert_array_equal(pooled.level, serial.level)
+    np.testing.assert_array_equal(pooled.forecast, serial.forecast)
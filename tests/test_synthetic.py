@@ -0,0 +1,19 @@
+"""Synthetic input generator."""
+import filecmp
+
+from demand_forecast.synthetic import generate_inputs
+
+
+def test_same_seed_same_files(tmp_path):
+    first = generate_inputs(tmp_path / 'first', 50, years=1, seed=3)
+    second = generate_inputs(tmp_path / 'second', 50, years=1, seed=3)
+    assert first['rows'] == second['rows'] and first['rows']['catalog'] == 50
+    for name, path in first['paths'].items():
+        assert filecmp.cmp(path, second['paths'][name], shallow=False), name
+
+
+def test_generated_inputs_load(context):
+    # Every synthetic SKU lands in sku_master with a known planning category and some sell
+    assert len(context.sku_master) == 400
+    assert context.sku_master['PLANNING_CATEGORY'].notna().all()
+    assert context.sales_units.sum() > 0 and context.receipts.nnz > 0